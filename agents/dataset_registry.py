@@ -0,0 +1,141 @@
+"""
+Dataset Registry
+In-process store for tabular tool results, addressed by short handles
+
+Bulk tool results (EEA result pages, filtered and scored lead lists) used
+to be returned as full JSON text, so every lead went through the model
+context between query_database, filter_leads_by_age_and_regulation,
+score_leads_batch and export_leads. Tools now register those tables here
+and return a handle such as "ds_scored_leads_3" with the row count, the
+columns and a few sample rows. Downstream tools accept the handle in place
+of an inline lead list.
+
+The registry lives in the agent process and keeps the most recently used
+MAX_DATASETS tables; an evicted or unknown handle is a ValueError.
+Concurrent campaigns share it, so a table a campaign's prompt refers to
+(e.g. the pre-ranked shortlist) is registered with pin=True and is not
+evicted until the campaign unpins it.
+
+Usage:
+    handle = registry.register(frame, kind="scored_leads")
+    registry.describe(handle)          # {"dataset", "kind", "rows", "columns", "sample"}
+    leads = registry.resolve(args.get("dataset") or args.get("leads"))
+
+    handle = registry.register(shortlist, kind="shortlist", pin=True)
+    ...                                # campaign runs; other tools register freely
+    registry.unpin(handle)
+"""
+import itertools
+import json
+import re
+from collections import OrderedDict
+
+import pandas as pd
+
+MAX_DATASETS = 32
+DEFAULT_SAMPLE_ROWS = 5
+
+
+def json_records(frame):
+    """JSON-safe list of row dicts (NaN -> null, numpy scalars -> numbers, tuples -> lists)"""
+    return json.loads(frame.to_json(orient="records", force_ascii=False, default_handler=str))
+
+
+class DatasetRegistry:
+    """Handles -> DataFrames, least recently used evicted first (pinned handles never)"""
+
+    def __init__(self, max_datasets=MAX_DATASETS):
+        self.max_datasets = max_datasets
+        self._datasets = OrderedDict()
+        self._kinds = {}
+        self._pinned = set()
+        self._ids = itertools.count(1)
+
+    def __contains__(self, handle):
+        return handle in self._datasets
+
+    def __len__(self):
+        return len(self._datasets)
+
+    def register(self, data, kind="dataset", pin=False):
+        """
+        Store a table and return its new handle
+
+        Args:
+            data: DataFrame or list of row dicts
+            kind: Short label used in the handle (e.g. "eea_facilities", "scored_leads")
+            pin: Keep the table until unpin(), whatever else is registered meanwhile
+        """
+        frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data), dtype=object)
+        label = re.sub(r"[^a-z0-9_]+", "_", kind.lower()).strip("_") or "dataset"
+        handle = f"ds_{label}_{next(self._ids)}"
+        self._datasets[handle] = frame.reset_index(drop=True)
+        self._kinds[handle] = label
+        if pin:
+            self._pinned.add(handle)
+        # Least recently used unpinned tables go first, never the one just registered;
+        # when pinned tables fill the registry it grows past max_datasets instead
+        evictable = (h for h in list(self._datasets) if h not in self._pinned and h != handle)
+        while len(self._datasets) > self.max_datasets:
+            evicted = next(evictable, None)
+            if evicted is None:
+                break
+            del self._datasets[evicted]
+            del self._kinds[evicted]
+        return handle
+
+    def unpin(self, handle):
+        """Let a pinned table be evicted again (it stays until it is the least recently used)"""
+        self._pinned.discard(handle)
+
+    def append(self, handle, data):
+        """Append rows to an existing dataset (e.g. the next result page); returns the handle"""
+        frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data), dtype=object)
+        current = self.get(handle)
+        self._datasets[handle] = pd.concat([current, frame], ignore_index=True) if len(current) else frame.reset_index(drop=True)
+        return handle
+
+    def get(self, handle):
+        """
+        The table behind a handle
+
+        Raises:
+            ValueError: Unknown or evicted handle
+        """
+        if handle not in self._datasets:
+            raise ValueError(f"Unknown dataset handle {handle!r} (it may have been evicted; re-run the producing tool)")
+        self._datasets.move_to_end(handle)
+        return self._datasets[handle]
+
+    def resolve(self, value):
+        """DataFrame for a handle, an inline list of lead dicts, or an existing DataFrame"""
+        if value is None:
+            return pd.DataFrame()
+        if isinstance(value, pd.DataFrame):
+            return value
+        if isinstance(value, str):
+            return self.get(value)
+        return pd.DataFrame(list(value), dtype=object)
+
+    def describe(self, handle, sample_rows=DEFAULT_SAMPLE_ROWS, sample_columns=None):
+        """
+        Compact summary for a tool result: handle, kind, row count, columns and a few rows
+
+        Args:
+            sample_columns: Columns shown in the sample (default: all)
+        """
+        frame = self.get(handle)
+        sample = frame.head(sample_rows)
+        if sample_columns is not None:
+            sample = sample[[c for c in sample_columns if c in sample.columns]]
+        return {
+            "dataset": handle,
+            "kind": self._kinds[handle],
+            "rows": len(frame),
+            "columns": [str(c) for c in frame.columns],
+            "sample": json_records(sample),
+        }
+
+
+# Shared by the tools of the agent process
+registry = DatasetRegistry()
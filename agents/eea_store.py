@@ -0,0 +1,294 @@
+"""
+EEA SQLite Store - paged facility search for the agent tools
+
+Backs the query_database tool with the local converted_database.db (v16).
+Agents pass a small JSON filter instead of SQL; every key maps to a fixed
+SQL fragment with bound parameters, so no agent-supplied text ever reaches
+the query string.
+
+Filter keys (all optional, combined with AND):
+    country         "SE" or ["SE", "FI"]          ISO country codes
+    region          "EU"                          see REGION_COUNTRY_CODES
+    activity_code   "5(b)" or ["5(b)", "1"]       exact code, or all sub-codes of "1"
+    pollutant       "PCDD+PCDF(DIOXINS+FURANS)"   pollutant code or name, any release
+    year_from       2019                          release year range (with or
+    year_to         2024                          without pollutant)
+    min_age         20                            years since dateOfStartOfOperation
+    max_age         40
+    min_capacity_mw 50                            summed rated thermal input of the parts
+
+Results come in pages ordered by Facility_INSPIRE_ID (keyset paging): each
+page carries an opaque next_cursor for the following page, and page sizes
+are capped server-side at MAX_PAGE_SIZE whatever the caller asks for.
+"""
+import base64
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import date
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "processed" / "converted_database.db"
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+MAX_FILTER_VALUES = 50  # per list-valued key
+
+FACILITY_TABLE = "2_ProductionFacility"
+RELEASE_TABLE = "2f_PollutantRelease"
+INSTALLATION_TABLE = "3_ProductionInstallation"
+PART_TABLE = "4_ProductionInstallationPart"
+
+# Regions as used by the lead generation agent's regulatory weights; the EEA
+# register only covers European facilities
+REGION_COUNTRY_CODES = {
+    "EU": [
+        "AT", "BE", "BG", "CY", "CZ", "DE", "DK", "EE", "ES", "FI", "FR", "GB", "GR", "HR",
+        "HU", "IE", "IT", "LT", "LU", "LV", "MT", "NL", "PL", "PT", "RO", "SE", "SI", "SK",
+    ],
+}
+
+# Country names as used by lead_scoring's country_to_region
+COUNTRY_NAMES = {
+    "AT": "Austria", "BE": "Belgium", "BG": "Bulgaria", "CH": "Switzerland",
+    "CY": "Cyprus", "CZ": "Czech Republic", "DE": "Germany", "DK": "Denmark",
+    "EE": "Estonia", "ES": "Spain", "FI": "Finland", "FR": "France",
+    "GB": "United Kingdom", "GR": "Greece", "HR": "Croatia", "HU": "Hungary",
+    "IE": "Ireland", "IS": "Iceland", "IT": "Italy", "LI": "Liechtenstein",
+    "LT": "Lithuania", "LU": "Luxembourg", "LV": "Latvia", "MT": "Malta",
+    "NL": "Netherlands", "NO": "Norway", "PL": "Poland", "PT": "Portugal",
+    "RO": "Romania", "RS": "Serbia", "SE": "Sweden", "SI": "Slovenia", "SK": "Slovakia",
+}
+
+DIOXIN_POLLUTANTS = ["PCDD+PCDF(DIOXINS+FURANS)", "PCDD + PCDF (dioxins + furans) (as Teq)"]
+
+FILTER_KEYS = {
+    "country", "region", "activity_code", "pollutant", "year_from", "year_to",
+    "min_age", "max_age", "min_capacity_mw",
+}
+
+
+def _string_list(key, value):
+    """Validate a string or list of strings filter value"""
+    values = [value] if isinstance(value, str) else value
+    if not isinstance(values, list) or not values or not all(isinstance(v, str) and v for v in values):
+        raise ValueError(f"Filter '{key}' must be a non-empty string or list of strings")
+    if len(values) > MAX_FILTER_VALUES:
+        raise ValueError(f"Filter '{key}' accepts at most {MAX_FILTER_VALUES} values")
+    return values
+
+
+def _number(key, value, integer=False):
+    """Validate a numeric filter value"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or (integer and not isinstance(value, int)):
+        raise ValueError(f"Filter '{key}' must be {'an integer' if integer else 'a number'}")
+    return value
+
+
+def _in_clause(column, values):
+    return f"{column} IN ({','.join('?' * len(values))})", list(values)
+
+
+def compile_filter(filters, as_of_year, capacity_available=True):
+    """
+    Translate a filter dict to a WHERE clause over facilities f and capacity cap
+
+    Args:
+        filters: Filter dict (see module docstring)
+        as_of_year: Year plant ages are counted to
+        capacity_available: Whether the capacity join exists in this database
+
+    Returns:
+        tuple: (where_sql, params)
+
+    Raises:
+        ValueError: Unknown key or invalid value
+    """
+    filters = filters or {}
+    if not isinstance(filters, dict):
+        raise ValueError("Filter must be a JSON object")
+    unknown = set(filters) - FILTER_KEYS
+    if unknown:
+        raise ValueError(f"Unknown filter keys: {sorted(unknown)} (allowed: {sorted(FILTER_KEYS)})")
+
+    clauses, params = [], []
+
+    if "country" in filters:
+        sql, values = _in_clause("f.countryCode", [c.upper() for c in _string_list("country", filters["country"])])
+        clauses.append(sql)
+        params += values
+
+    if "region" in filters:
+        region = filters["region"]
+        if region not in REGION_COUNTRY_CODES:
+            raise ValueError(f"Unknown region {region!r} (EEA data covers: {sorted(REGION_COUNTRY_CODES)})")
+        sql, values = _in_clause("f.countryCode", REGION_COUNTRY_CODES[region])
+        clauses.append(sql)
+        params += values
+
+    if "activity_code" in filters:
+        codes = _string_list("activity_code", filters["activity_code"])
+        clauses.append("(" + " OR ".join("f.mainActivityCode = ? OR f.mainActivityCode LIKE ?" for _ in codes) + ")")
+        for code in codes:
+            params += [code, f"{code}(%"]
+
+    # Releases: one uncorrelated IN (...) subquery, evaluated once
+    release_clauses, release_params = [], []
+    if "pollutant" in filters:
+        pollutants = _string_list("pollutant", filters["pollutant"])
+        code_sql, code_params = _in_clause("pollutantCode", pollutants)
+        name_sql, name_params = _in_clause("pollutantName", pollutants)
+        release_clauses.append(f"({code_sql} OR {name_sql})")
+        release_params += code_params + name_params
+    if "year_from" in filters:
+        release_clauses.append("reportingYear >= ?")
+        release_params.append(_number("year_from", filters["year_from"], integer=True))
+    if "year_to" in filters:
+        release_clauses.append("reportingYear <= ?")
+        release_params.append(_number("year_to", filters["year_to"], integer=True))
+    if release_clauses:
+        clauses.append(
+            f'f.Facility_INSPIRE_ID IN (SELECT Facility_INSPIRE_ID FROM "{RELEASE_TABLE}" '
+            f'WHERE {" AND ".join(release_clauses)})'
+        )
+        params += release_params
+
+    start_year = "CAST(substr(f.dateOfStartOfOperation, 1, 4) AS INTEGER)"
+    if "min_age" in filters:
+        clauses.append(f"{start_year} <= ?")
+        params.append(as_of_year - _number("min_age", filters["min_age"]))
+    if "max_age" in filters:
+        clauses.append(f"{start_year} >= ?")
+        params.append(as_of_year - _number("max_age", filters["max_age"]))
+
+    if "min_capacity_mw" in filters:
+        if not capacity_available:
+            raise ValueError("Capacity filter unavailable: no rated thermal input in this database")
+        clauses.append("cap.capacity_mw >= ?")
+        params.append(_number("min_capacity_mw", filters["min_capacity_mw"]))
+
+    return (" AND ".join(clauses) or "1=1"), params
+
+
+def _filter_digest(filters, as_of_year):
+    payload = json.dumps([filters or {}, as_of_year], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def encode_cursor(after_id, digest):
+    token = json.dumps({"after": after_id, "q": digest}).encode()
+    return base64.urlsafe_b64encode(token).decode()
+
+
+def decode_cursor(cursor, digest):
+    """Last facility ID of the previous page (ValueError for a foreign or corrupt cursor)"""
+    try:
+        token = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        after_id, cursor_digest = token["after"], token["q"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_digest != digest:
+        raise ValueError("Cursor belongs to a different filter; restart without a cursor")
+    return after_id
+
+
+class EEAStore:
+    """Read-only, paged facility search over the converted EEA SQLite database"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_page_size=MAX_PAGE_SIZE):
+        self.db_path = Path(db_path)
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"EEA database not found: {self.db_path}")
+        self.max_page_size = max_page_size
+        self.conn = sqlite3.connect(f"file:{self.db_path.as_posix()}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()  # searches run on executor threads; one at a time on the shared connection
+        self.capacity_sql = self._capacity_query()
+
+    def _columns(self, table):
+        return {row[1] for row in self.conn.execute(f'PRAGMA table_info("{table}")')}
+
+    def _capacity_query(self):
+        """Facility capacity (MW) as summed part totalRatedThermalInput, or None if not in the database"""
+        part_columns = self._columns(PART_TABLE)
+        if "totalRatedThermalInput" not in part_columns or "Parent_Facility_INSPIRE_ID" not in self._columns(INSTALLATION_TABLE):
+            return None
+        # Parts carry their installation link in newer extracts; otherwise the part ID is the installation ID
+        part_link = "Parent_Installation_INSPIRE_ID" if "Parent_Installation_INSPIRE_ID" in part_columns else "Installation_Part_INSPIRE_ID"
+        return (
+            f'SELECT i.Parent_Facility_INSPIRE_ID AS facility_id, SUM(p.totalRatedThermalInput) AS capacity_mw '
+            f'FROM "{PART_TABLE}" p JOIN "{INSTALLATION_TABLE}" i ON p.{part_link} = i.Installation_INSPIRE_ID '
+            f'GROUP BY i.Parent_Facility_INSPIRE_ID'
+        )
+
+    def search_facilities(self, filters=None, cursor=None, page_size=DEFAULT_PAGE_SIZE, as_of_year=None):
+        """
+        One page of facilities matching the filter
+
+        Args:
+            filters: Filter dict (see module docstring)
+            cursor: next_cursor of the previous page (None for the first page)
+            page_size: Requested rows, capped at max_page_size
+            as_of_year: Year for plant ages (default: current year)
+
+        Returns:
+            dict: rows (with the country name next to country_code), page_size,
+            next_cursor (None on the last page) and, on the first page, total_matches
+
+        Raises:
+            ValueError: Invalid filter or cursor
+        """
+        as_of_year = as_of_year or date.today().year
+        page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), self.max_page_size))
+        where, params = compile_filter(filters, as_of_year, capacity_available=self.capacity_sql is not None)
+        digest = _filter_digest(filters, as_of_year)
+
+        capacity_join = f"LEFT JOIN ({self.capacity_sql}) cap ON cap.facility_id = f.Facility_INSPIRE_ID" if self.capacity_sql else ""
+        capacity_column = "cap.capacity_mw" if self.capacity_sql else "NULL"
+        base = f'FROM "{FACILITY_TABLE}" f {capacity_join} WHERE {where}'
+
+        page_where, page_params = "", []
+        if cursor:
+            page_where = " AND f.Facility_INSPIRE_ID > ?"
+            page_params = [decode_cursor(cursor, digest)]
+
+        sql = f"""
+            SELECT f.Facility_INSPIRE_ID AS facility_id,
+                   f.nameOfFeature AS facility,
+                   f.parentCompanyName AS parent_company,
+                   f.city AS city,
+                   f.countryCode AS country_code,
+                   f.mainActivityCode AS activity_code,
+                   f.mainActivityName AS activity,
+                   CAST(substr(f.dateOfStartOfOperation, 1, 4) AS INTEGER) AS start_year,
+                   {capacity_column} AS capacity_mw
+            {base}{page_where}
+            GROUP BY f.Facility_INSPIRE_ID
+            ORDER BY f.Facility_INSPIRE_ID
+            LIMIT ?
+        """
+        with self._lock:
+            rows = [dict(r) for r in self.conn.execute(sql, params + page_params + [page_size + 1])]
+            total = None
+            if not cursor:
+                count_sql = f"SELECT COUNT(DISTINCT f.Facility_INSPIRE_ID) {base}"
+                total = self.conn.execute(count_sql, params).fetchone()[0]
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        for row in rows:
+            row["plant_age"] = as_of_year - row["start_year"] if row["start_year"] else None
+            # Country name as the lead filter and scorers read it (regulatory region)
+            row["country"] = COUNTRY_NAMES.get(row["country_code"], row["country_code"])
+
+        page = {
+            "rows": rows,
+            "page_size": page_size,
+            "next_cursor": encode_cursor(rows[-1]["facility_id"], digest) if has_more else None,
+        }
+        if not cursor:
+            page["total_matches"] = total
+        return page
+
+    def close(self):
+        self.conn.close()
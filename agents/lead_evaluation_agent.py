@@ -18,6 +18,7 @@ Takes leads from lead generation and performs:
 import asyncio
 import json
 from claude_agent_sdk import query, tool, create_sdk_mcp_server, ClaudeAgentOptions
+from telemetry import telemetry, traced_tool
 
 
 # Define evaluation tools
@@ -32,6 +33,7 @@ from claude_agent_sdk import query, tool, create_sdk_mcp_server, ClaudeAgentOpti
         }
     }
 )
+@traced_tool
 async def dioxin_compliance_analysis(args, extra):
     """
     Evaluate dioxin/PCDD/PCDF compliance status and APCD technology need
@@ -109,6 +111,7 @@ async def dioxin_compliance_analysis(args, extra):
         }
     }
 )
+@traced_tool
 async def technical_feasibility_analysis(args, extra):
     """
     Evaluate technical feasibility of GMAB waste heat recovery system
@@ -172,6 +175,7 @@ async def technical_feasibility_analysis(args, extra):
         }
     }
 )
+@traced_tool
 async def detailed_roi_calculation(args, extra):
     """
     Detailed financial analysis for waste heat recovery project
@@ -249,6 +253,7 @@ async def detailed_roi_calculation(args, extra):
         }
     }
 )
+@traced_tool
 async def competitive_analysis(args, extra):
     """
     Competitive intelligence and positioning analysis
@@ -330,6 +335,7 @@ async def competitive_analysis(args, extra):
         }
     }
 )
+@traced_tool
 async def sales_action_plan(args, extra):
     """
     Generate actionable sales strategy and engagement plan
@@ -492,29 +498,31 @@ async def evaluate_leads():
     print("📊 GMAB Lead Evaluation Agent")
     print("   Analyzing leads from lead generation...\n")
 
-    async for message in query(
-        prompt=prompt,
-        options=ClaudeAgentOptions(
-            cwd="C:\\Users\\staff\\anthropicFun\\EEA_Industrial_Emissions_Data",
-            max_turns=40,
-            model="sonnet",
-            mcp_servers={
-                "evaluation": mcp_server
-            }
-        )
-    ):
-        if message.type == "assistant":
-            for content in message.message.content:
-                if hasattr(content, 'text') and content.text:
-                    print(f"\n{content.text}")
-                elif hasattr(content, 'name'):
-                    print(f"\n🔧 Evaluating: {content.name}")
-
-        elif message.type == "result":
-            print(f"\n\n✅ Evaluation Complete!")
-            print(f"   Duration: {message.duration_ms/1000:.2f} seconds")
-            print(f"   Cost: ${message.total_cost_usd:.4f}")
-            print(f"   Turns: {message.num_turns}")
+    async with telemetry.run("evaluate_leads") as run:
+        async for message in query(
+            prompt=prompt,
+            options=ClaudeAgentOptions(
+                cwd="C:\\Users\\staff\\anthropicFun\\EEA_Industrial_Emissions_Data",
+                max_turns=40,
+                model="sonnet",
+                mcp_servers={
+                    "evaluation": mcp_server
+                }
+            )
+        ):
+            run.observe(message)
+            if message.type == "assistant":
+                for content in message.message.content:
+                    if hasattr(content, 'text') and content.text:
+                        print(f"\n{content.text}")
+                    elif hasattr(content, 'name'):
+                        print(f"\n🔧 Evaluating: {content.name}")
+
+            elif message.type == "result":
+                print(f"\n\n✅ Evaluation Complete!")
+                print(f"   Duration: {message.duration_ms/1000:.2f} seconds")
+                print(f"   Cost: ${message.total_cost_usd:.4f}")
+                print(f"   Turns: {message.num_turns}")
 
 
 # Specialized evaluation modes
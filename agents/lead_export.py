@@ -0,0 +1,144 @@
+"""
+Lead Export
+Writes the export_leads workbook: PRIORITY 1-5 sheets plus ALL LEADS, partitioned in one pass
+
+Each lead goes to one priority sheet: its own "priority" (1-5) when set,
+otherwise the tier of its total_score (scored with lead_scoring when the
+lead has no score yet). The sheets are row-position partitions of a single
+frame (export_engine.PartitionedExport). They are streamed through
+openpyxl's write-only workbook with the LEAD_COLUMN_STYLES template, and can
+also be written as CSV or Parquet files, one per sheet.
+
+Usage:
+    summary = export_leads_workbook(leads, "GMAB_waste_to_energy_leads.xlsx", also_write=["csv"])
+    summary["row_counts"]
+"""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts" / "analysis"))
+
+from export_engine import ColumnStyle, PartitionedExport, tier_labels
+from lead_scoring import score_leads_batch
+
+DEFAULT_EXPORT_FILENAME = "GMAB_waste_to_energy_leads.xlsx"
+EXTRA_FORMATS = ("csv", "parquet")
+
+PRIORITY_SHEETS = {
+    1: "PRIORITY 1 - CRITICAL & URGENT",
+    2: "PRIORITY 2 - HIGH VALUE",
+    3: "PRIORITY 3 - HIGH NEED",
+    4: "PRIORITY 4 - GOOD OPPORTUNITIES",
+    5: "PRIORITY 5 - LONG TERM",
+}
+ALL_LEADS_SHEET = "ALL LEADS - MASTER LIST"
+
+# total_score -> priority for leads without an explicit one: (priority, lower_inclusive, upper_exclusive)
+SCORE_PRIORITY_TIERS = [
+    (1, 90, np.inf),
+    (2, 70, 90),
+    (3, 50, 70),
+    (4, 30, 50),
+    (5, -np.inf, 30),
+]
+
+LEAD_COLUMN_STYLES = {
+    "priority": ColumnStyle(width=9, number_format="0"),
+    "total_score": ColumnStyle(width=12, number_format="0"),
+    "qualification": ColumnStyle(width=14),
+    "facility": ColumnStyle(width=45),
+    "country": ColumnStyle(width=16),
+    "waste_throughput_tonnes_year": ColumnStyle(width=16, number_format="#,##0"),
+    "current_efficiency_percent": ColumnStyle(width=12, number_format="0.0"),
+}
+LEADING_COLUMNS = ["priority", "total_score", "qualification", "facility", "country"]
+
+
+def _cell_value(value):
+    """Lists / dicts (e.g. reasons) as JSON text; xlsx cells hold scalars only"""
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (list, tuple, dict)) else value
+
+
+def _uniform_column(values):
+    """Columns mixing text with other values become text, so every sheet converts to Parquet / Arrow"""
+    present = values.dropna()
+    kinds = set(present.map(type))
+    if str in kinds and len(kinds) > 1:
+        return values.where(values.isna(), values.astype(str))
+    return values
+
+
+def lead_priorities(leads):
+    """
+    Priority 1-5 per lead: the lead's own "priority" where valid, else its score tier
+
+    Args:
+        leads: DataFrame of leads (score_lead field names, optional priority / total_score)
+
+    Returns:
+        (priorities, total_scores) as arrays aligned with leads
+    """
+    if "total_score" in leads.columns:
+        scores = pd.to_numeric(leads["total_score"], errors="coerce")
+    else:
+        scores = pd.Series(np.nan, index=leads.index)
+    unscored = scores.isna().to_numpy()
+    if unscored.any():
+        scores[unscored] = score_leads_batch(leads[unscored])["total_score"].to_numpy()
+
+    priorities = tier_labels(scores, SCORE_PRIORITY_TIERS).astype("int64")
+    if "priority" in leads.columns:
+        own = pd.to_numeric(leads["priority"], errors="coerce")
+        valid = own.isin(list(PRIORITY_SHEETS)).to_numpy()
+        priorities[valid] = own[valid].astype("int64")
+    return priorities, scores.to_numpy()
+
+
+def export_leads_workbook(leads, filename=DEFAULT_EXPORT_FILENAME, also_write=()):
+    """
+    Write the priority workbook (and optional CSV / Parquet copies)
+
+    Args:
+        leads: List of lead dicts or DataFrame
+        filename: Workbook path (.xlsx is added when missing)
+        also_write: Extra formats from EXTRA_FORMATS, one file per sheet in <stem>_<format>/
+
+    Returns:
+        dict: path, sheet -> row count, and format -> directory for the extra formats
+
+    Raises:
+        ValueError: Unsupported extra format
+    """
+    unknown = set(also_write) - set(EXTRA_FORMATS)
+    if unknown:
+        raise ValueError(f"Unsupported export format(s): {sorted(unknown)}. Use {list(EXTRA_FORMATS)}")
+    if not isinstance(leads, pd.DataFrame):
+        leads = pd.DataFrame(list(leads), dtype=object)
+
+    priorities, scores = lead_priorities(leads)
+    frame = leads.map(_cell_value).apply(_uniform_column) if len(leads) else leads.copy()
+    frame["priority"] = priorities
+    frame["total_score"] = scores
+    if "qualification" not in frame.columns:
+        frame["qualification"] = np.select([scores >= 70, scores >= 50], ["🔥 HOT LEAD", "⚠️ WARM"], "COLD")
+    leading = [c for c in LEADING_COLUMNS if c in frame.columns]
+    frame = frame[leading + [c for c in frame.columns if c not in leading]]
+    frame = frame.sort_values("total_score", ascending=False, kind="stable")
+
+    export = PartitionedExport(frame, column_styles=LEAD_COLUMN_STYLES, bold_header=True)
+    export.add_partitions(frame["priority"].to_numpy(), PRIORITY_SHEETS, skip_empty=False)
+    export.add_sheet(ALL_LEADS_SHEET, skip_empty=False)
+
+    path = Path(filename)
+    stem = path.with_suffix("") if path.suffix.lower() == ".xlsx" else path
+    stem.parent.mkdir(parents=True, exist_ok=True)
+    written = export.write(stem, formats=("xlsx",) + tuple(f for f in EXTRA_FORMATS if f in also_write))
+    return {
+        "path": str(written.pop("xlsx")),
+        "row_counts": export.row_counts(),
+        "also_written": {fmt: str(directory) for fmt, directory in written.items()},
+    }
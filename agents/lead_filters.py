@@ -0,0 +1,126 @@
+"""
+Streaming Age / Region Lead Filter
+should_filter_lead's age and regulatory-region rules as boolean masks over chunks of leads
+
+Leads (a list, a DataFrame or any iterator/generator of lead dicts) are
+taken chunk_size at a time, so million-row global plant lists stream
+through in constant memory. Per chunk, the start year is taken from the
+first truthy of plant_start_year / start_year / Start /
+dateOfStartOfOperation and parsed in one vectorised pass: only raw values
+not seen before are parsed (years, "1998-05-01" dates, timestamps), the
+rest come from a memo shared across chunks. Parsed years are also cached
+per facility, so a later lead for the same facility without a start year
+reuses it (both caches are bounded by MAX_MEMO_VALUES). Age and region
+predicates are then evaluated as masks, with the same reasons as
+should_filter_lead.
+
+Usage:
+    lead_filter = LeadFilter(min_age=15, regions=['EU', 'Developed_Asia'])
+    for chunk in lead_filter.stream(read_leads()):   # any iterable of dicts
+        chunk[chunk['passes_filter']]
+"""
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from lead_scoring import country_to_region
+from lead_signals import START_FIELDS, first_start_values, parse_years  # shared with the scorers
+
+FILTER_START_FIELDS = START_FIELDS
+DEFAULT_PRIORITY_REGIONS = ['EU', 'Developed_Asia', 'Emerging_Asia']
+STRICT_REGIONS = ['EU', 'Developed_Asia']
+DEFAULT_CHUNK_SIZE = 50000
+MAX_MEMO_VALUES = 100000
+
+RESULT_COLUMNS = ['facility', 'country', 'plant_age', 'region', 'passes_filter', 'filter_reason']
+
+
+def iter_chunks(leads, chunk_size=DEFAULT_CHUNK_SIZE):
+    """DataFrames of at most chunk_size leads from a DataFrame or any iterable of lead dicts"""
+    if isinstance(leads, pd.DataFrame):
+        for start in range(0, len(leads), chunk_size):
+            yield leads.iloc[start:start + chunk_size]
+        return
+    leads = iter(leads)
+    while True:
+        batch = list(islice(leads, chunk_size))
+        if not batch:
+            return
+        yield pd.DataFrame(batch, dtype=object)
+
+
+class LeadFilter:
+    """should_filter_lead over whole chunks of leads, with memoised start-year parsing"""
+
+    def __init__(self, min_age=15, regions=None, as_of_year=None):
+        self.min_age = min_age
+        self.regions = list(DEFAULT_PRIORITY_REGIONS if regions is None else regions)
+        self.as_of_year = as_of_year or datetime.now().year
+        self.facility_years = {}
+        self._year_memo = {}
+
+    def start_years(self, leads):
+        """Parsed start year per lead (NaN where unknown)"""
+        start = first_start_values(leads)
+        codes, uniques = pd.factorize(start)
+        new = [value for value in uniques if value not in self._year_memo]
+        if new and len(self._year_memo) + len(new) > MAX_MEMO_VALUES:
+            self._year_memo.clear()  # restart from this chunk's values, so every lookup below is in the memo
+            new = list(uniques)
+        if new:
+            self._year_memo.update(zip(new, parse_years(new).tolist()))
+        lookup = np.array([self._year_memo[value] for value in uniques] + [np.nan], dtype=float)
+        years = pd.Series(lookup[codes], index=leads.index)  # code -1 (no value) -> NaN
+
+        if 'facility' in leads.columns:
+            facility = leads['facility']
+            known = years.notna() & facility.notna()
+            if len(self.facility_years) + int(known.sum()) > MAX_MEMO_VALUES:
+                self.facility_years.clear()
+            self.facility_years.update(zip(facility[known], years[known]))
+            missing = years.isna() & facility.notna()
+            if missing.any() and self.facility_years:
+                years[missing] = facility[missing].map(self.facility_years).astype(float)
+        return years
+
+    def evaluate(self, leads):
+        """
+        Filter decision for every lead in one chunk
+
+        Returns:
+            DataFrame: facility, country, plant_age, region, passes_filter, filter_reason
+        """
+        if not isinstance(leads, pd.DataFrame):
+            leads = pd.DataFrame(list(leads), dtype=object)
+        age = self.as_of_year - self.start_years(leads)
+        country = leads['country'] if 'country' in leads.columns else pd.Series(None, index=leads.index, dtype=object)
+        region = country.map(country_to_region).fillna('Other')
+
+        has_age = age.notna() & (age != 0)
+        age_text = age.fillna(0).astype(int).astype(str)
+        too_young = has_age & (age < self.min_age)
+        outside = ~too_young & ~region.isin(self.regions)
+        aged = ~too_young & ~outside & has_age & (age > 20)
+        strict = ~too_young & ~outside & ~aged & has_age & (age > 15) & region.isin(STRICT_REGIONS)
+
+        reason = pd.Series("Meets age and regulatory criteria", index=leads.index, dtype=object)
+        reason[too_young] = "Plant age " + age_text[too_young] + f" < minimum {self.min_age} years"
+        reason[outside] = "Region " + region[outside] + " not in priority list"
+        reason[aged] = "Aged plant (" + age_text[aged] + " years) + " + region[aged] + " regulation = HIGH priority"
+        reason[strict] = "Plant age " + age_text[strict] + " years + " + region[strict] + " strict regulation"
+
+        return pd.DataFrame({
+            'facility': leads['facility'].fillna('Unknown') if 'facility' in leads.columns else 'Unknown',
+            'country': country.fillna('Unknown'),
+            'plant_age': age,
+            'region': region,
+            'passes_filter': ~(too_young | outside),
+            'filter_reason': reason,
+        }, index=leads.index, columns=RESULT_COLUMNS)
+
+    def stream(self, leads, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Evaluated chunks for any iterable of leads (constant memory in the number of leads)"""
+        for chunk in iter_chunks(leads, chunk_size):
+            yield self.evaluate(chunk)
@@ -32,96 +32,28 @@ UPDATED: Enhanced with global WtE market data integration (Nov 2025)
 """
 import asyncio
 import json
-from datetime import datetime
+import math
+import sqlite3
 from pathlib import Path
+import pandas as pd
 from claude_agent_sdk import query, tool, create_sdk_mcp_server, ClaudeAgentOptions
+from dataset_registry import json_records, registry
+from eea_store import EEAStore, DEFAULT_PAGE_SIZE, DIOXIN_POLLUTANTS, MAX_PAGE_SIZE, REGION_COUNTRY_CODES
+from lead_export import ALL_LEADS_SHEET, DEFAULT_EXPORT_FILENAME, export_leads_workbook
+from lead_filters import LeadFilter, iter_chunks
+from lead_signals import extract_signals, is_signal_frame
+from lead_scoring import (
+    country_to_region, regulatory_weights,
+    POINT_COLUMNS, render_reasons, score_leads_batch as score_leads_table
+)
+from prerank import DEFAULT_TOP_N, prerank, shortlist_table
+from telemetry import telemetry, traced_tool
 
 # Global data storage for WtE facilities
-wte_global_data = None
-regulatory_weights = {
-    "EU": 25,  # EU countries - BAT compliance
-    "N.America": 15,  # North America - EPA enforcement
-    "Developed_Asia": 20,  # Japan, South Korea - strict enforcement
-    "Emerging_Asia": 10,  # China, SE Asia - emerging regulation
-    "Other": 5  # Rest of world
-}
-
-# Country to region mapping
-country_to_region = {
-    # EU Countries
-    "Germany": "EU", "France": "EU", "Italy": "EU", "Spain": "EU", "Poland": "EU",
-    "Netherlands": "EU", "Belgium": "EU", "Austria": "EU", "Czech Republic": "EU",
-    "Denmark": "EU", "Sweden": "EU", "Finland": "EU", "Greece": "EU", "Portugal": "EU",
-    "Hungary": "EU", "Romania": "EU", "Slovakia": "EU", "Slovenia": "EU", "Bulgaria": "EU",
-    "Croatia": "EU", "Estonia": "EU", "Latvia": "EU", "Lithuania": "EU", "Malta": "EU",
-    "Cyprus": "EU", "Luxembourg": "EU", "Ireland": "EU", "United Kingdom": "EU",
-    # North America
-    "USA": "N.America", "Canada": "N.America", "Mexico": "N.America",
-    # Developed Asia
-    "Japan": "Developed_Asia", "South Korea": "Developed_Asia", "Singapore": "Developed_Asia",
-    # Emerging Asia
-    "China": "Emerging_Asia", "India": "Emerging_Asia", "Vietnam": "Emerging_Asia",
-    "Thailand": "Emerging_Asia", "Indonesia": "Emerging_Asia", "Malaysia": "Emerging_Asia",
-    "Philippines": "Emerging_Asia", "Pakistan": "Emerging_Asia",
-}
-
-
-def load_wte_global_data():
-    """Load global WtE facility data from CSV files"""
-    global wte_global_data
-
-    try:
-        import pandas as pd
+eea_store = None
+mcp_server = None
 
-        # Load the global WtE data files
-        csv_files = {
-            "active_plants": "Active Plants Global WtE market 2024-2033.csv",
-            "market_outlook": "Market outlook Global WtE market 2024-2033.csv",
-            "projects": "Projects Global WtE market 2024-2033.csv"
-        }
-
-        wte_global_data = {}
-        for key, filename in csv_files.items():
-            try:
-                df = pd.read_csv(filename, encoding='utf-8-sig')
-                wte_global_data[key] = df
-                print(f"✓ Loaded {key}: {len(df)} rows")
-            except FileNotFoundError:
-                print(f"⚠ File not found: {filename}")
-            except Exception as e:
-                print(f"⚠ Error loading {filename}: {e}")
-
-        return wte_global_data
-    except ImportError:
-        print("⚠ pandas not available - using mock data only")
-        return None
-
-
-def get_plant_age(start_year_or_date):
-    """Calculate plant age from start year or date"""
-    try:
-        current_year = datetime.now().year
-
-        # Handle different date formats
-        if isinstance(start_year_or_date, int):
-            return current_year - start_year_or_date
-        elif isinstance(start_year_or_date, str):
-            # Try to parse year from string
-            year_str = str(start_year_or_date).split('-')[0] if '-' in str(start_year_or_date) else str(start_year_or_date)
-            try:
-                start_year = int(year_str)
-                return current_year - start_year
-            except:
-                return None
-        return None
-    except:
-        return None
-
-
-def get_regulatory_weight(country):
-    """Get regulatory weight factor for a country"""
-    region = country_to_region.get(country, "Other")
-    return regulatory_weights.get(region, regulatory_weights["Other"])
+CAMPAIGN_CWD = "C:\\Users\\staff\\anthropicFun\\EEA_Industrial_Emissions_Data"
 
 
 def get_regulatory_description(country):
@@ -151,183 +83,127 @@ def should_filter_lead(lead, min_age=15, regulatory_regions=None):
     Returns:
         tuple: (passes_filter, reason)
     """
-    if regulatory_regions is None:
-        regulatory_regions = ["EU", "Developed_Asia", "Emerging_Asia"]
+    decision = LeadFilter(min_age=min_age, regions=regulatory_regions).evaluate([lead]).iloc[0]
+    return bool(decision['passes_filter']), decision['filter_reason']
 
-    # Check plant age
-    plant_age = get_plant_age(lead.get('plant_start_year') or lead.get('start_year') or lead.get('Start'))
-    if plant_age and plant_age < min_age:
-        return False, f"Plant age {plant_age} < minimum {min_age} years"
 
-    # Check regulatory region
-    country = lead.get('country', '')
-    region = country_to_region.get(country, "Other")
-    if region not in regulatory_regions:
-        return False, f"Region {region} not in priority list"
+def lead_rows(args):
+    """Leads from a dataset handle ('dataset') or an inline list ('leads')"""
+    if args.get('dataset'):
+        return registry.get(args['dataset'])
+    return args.get('leads', [])
+
 
-    # Check for dioxin compliance issues or age-related risk
-    if plant_age and plant_age > 20:
-        return True, f"Aged plant ({plant_age} years) + {region} regulation = HIGH priority"
+def tool_error(message, **details):
+    return {"content": [{"type": "text", "text": json.dumps({"error": message, **details}, indent=2)}]}
 
-    if plant_age and plant_age > 15 and region in ["EU", "Developed_Asia"]:
-        return True, f"Plant age {plant_age} years + {region} strict regulation"
 
-    return True, "Meets age and regulatory criteria"
+def get_eea_store():
+    """Shared read-only EEA store, opened on first use"""
+    global eea_store
+    if eea_store is None:
+        eea_store = EEAStore()
+    return eea_store
 
 
 # Define custom tools for database access
 @tool(
     name="query_database",
-    description="Query the leads database for waste-to-energy and dioxin emissions",
+    description=(
+        "Search EEA industrial facilities page by page. Pass a JSON filter in 'query' with any of: "
+        "country, region, activity_code, pollutant, year_from, year_to, min_age, max_age, min_capacity_mw. "
+        "Pass next_cursor back as 'cursor' to get the following page. Rows are stored as a dataset: "
+        "the reply has its handle and a sample; pass the handle as 'dataset' to add the next page to it."
+    ),
     input_schema={  # Change from inputSchema
         "query_type": {
             "type": "string",
-            "enum": ["sql", "filter"],
-            "description": "Type of query to run"
+            "enum": ["filter"],
+            "description": "Type of query to run (only JSON filters are supported)"
         },
         "query": {
             "type": "string",
-            "description": "SQL query or filter criteria as JSON"
+            "description": "Filter criteria as JSON, e.g. {\"country\": [\"DE\", \"NL\"], \"activity_code\": \"5(b)\", \"min_age\": 20}"
         },
         "dioxin_focus": {
             "type": "boolean",
             "description": "Filter for facilities with dioxin/PCDD/PCDF emissions"
+        },
+        "cursor": {
+            "type": "string",
+            "description": "next_cursor from the previous page"
+        },
+        "page_size": {
+            "type": "integer",
+            "description": f"Rows per page (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})"
+        },
+        "dataset": {
+            "type": "string",
+            "description": "Handle from an earlier page of the same query; the rows are appended to it"
         }
     }
 )
+@traced_tool
 async def query_database(args, extra):
     """
-    Query global WtE facilities database with dioxin/age/regulatory filtering
+    Query the EEA Industrial Emissions store with dioxin/age/regulatory filtering
 
-    DATA SOURCES:
-    1. Global WtE CSV files (Active Plants Global WtE market 2024-2033)
-       - 576 active plants worldwide with capacity and start dates
-       - 1,300+ pipeline projects with status
-    2. EEA Industrial Emissions Database (converted_csv/)
-       - 4e_EmissionsToAir.csv (dioxin/PCDD/PCDF emissions)
-       - 2_ProductionFacility.csv (facility information)
-       - 3d_BATConclusions.csv (Best Available Techniques compliance)
+    DATA SOURCE: data/processed/converted_database.db (EEA v16, 2007-2024)
+    - 2_ProductionFacility (facility, activity, start of operation)
+    - 2f_PollutantRelease (PCDD/PCDF and other releases by year)
+    - 3_ProductionInstallation / 4_ProductionInstallationPart (rated thermal input)
 
     FILTERING PRIORITY:
-    1. DIOXIN VIOLATIONS (PCDD, PCDF, I-TEQ/TEQ)
+    1. DIOXIN RELEASES (PCDD, PCDF, I-TEQ/TEQ) via dioxin_focus
     2. PLANT AGE >20 years (critical dioxin risk from de novo + memory effect)
-    3. REGULATORY PRESSURE (EU BAT, EPA enforcement, emerging standards)
+    3. REGULATORY PRESSURE (EU BAT)
+
+    Results are paged (see eea_store): walk all matches by passing next_cursor back.
+    The rows are kept in the dataset registry; the reply carries the handle and a sample.
     """
-    # Load global WtE data if not already loaded
-    global wte_global_data
-    if wte_global_data is None:
-        load_wte_global_data()
-
-    # Get filter criteria
-    filter_age_min = args.get('min_age', 0)
-    filter_regulatory = args.get('regulatory_region', None)
-    filter_capacity_min = args.get('min_capacity', 0)
-
-    # Mock results showing WASTE-TO-ENERGY plant opportunities
-    mock_results = [
-        {
-            "facility": "Amsterdam Waste Energy Center (AEB)",
-            "facility_type": "Municipal Solid Waste Incinerator",
-            "country": "Netherlands",
-            "waste_throughput_tonnes_year": 550000,
-            "waste_type": "Mixed municipal solid waste (MSW)",
-            "current_electricity_output_MW": 62,
-            "current_heat_output_MW": 85,
-            "current_efficiency_percent": 68,
-            "flue_gas_temp_post_boiler": "185°C",
-            "waste_heat_potential": "VERY HIGH - Additional 25 MW thermal recoverable from flue gas",
-            "current_recovery": "Basic steam boiler + turbine, NO flue gas condenser",
-            "energy_revenue_million_euro": 42,
-            "improvement_potential": "€8-12M/year via advanced heat recovery",
-            "emission_levels": "NOx: 85 mg/Nm³, Dioxins: compliant",
-            "compliance_status": "Compliant but optimizable",
-            "contact": "Plant Manager / Technical Director",
-            "urgency": "HIGH - Plant upgrade planned 2025-2026"
-        },
-        {
-            "facility": "SYSAV Waste-to-Energy Plant",
-            "facility_type": "MSW + RDF Incineration",
-            "country": "Sweden (Malmö)",
-            "waste_throughput_tonnes_year": 650000,
-            "waste_type": "MSW + Refuse-Derived Fuel (RDF)",
-            "current_electricity_output_MW": 75,
-            "current_heat_output_MW": 180,
-            "current_efficiency_percent": 72,
-            "flue_gas_temp_post_boiler": "140°C",
-            "waste_heat_potential": "HIGH - 18 MW thermal from low-temp flue gas",
-            "current_recovery": "Modern CHP, but low-grade heat unutilized",
-            "energy_revenue_million_euro": 68,
-            "improvement_potential": "€5-7M/year + district heating expansion",
-            "emission_levels": "Best-in-class, carbon neutral certified",
-            "contact": "Energy Optimization Manager",
-            "urgency": "MEDIUM - Seeking to maximize energy output"
-        },
-        {
-            "facility": "Brescia Waste Incinerator",
-            "facility_type": "Municipal Waste-to-Energy",
-            "country": "Italy",
-            "waste_throughput_tonnes_year": 750000,
-            "waste_type": "Municipal solid waste",
-            "current_electricity_output_MW": 85,
-            "current_heat_output_MW": 95,
-            "current_efficiency_percent": 65,
-            "flue_gas_temp_post_boiler": "220°C",
-            "waste_heat_potential": "VERY HIGH - 35 MW thermal potential (old technology)",
-            "current_recovery": "Aging boiler system, inefficient heat recovery",
-            "energy_revenue_million_euro": 52,
-            "improvement_potential": "€12-18M/year via boiler retrofit + advanced recovery",
-            "emission_levels": "APPROACHING EU limits, warning issued (<90 days to improve NOx)",
-            "compliance_status": "At risk - NOx approaching 200 mg/Nm³ limit",
-            "contact": "Plant Director / Sustainability Officer",
-            "urgency": "CRITICAL - Boiler end-of-life, replacement 2025"
-        },
-        {
-            "facility": "Berlin-Ruhleben Waste Incineration Plant",
-            "facility_type": "MSW Thermal Treatment",
-            "country": "Germany",
-            "waste_throughput_tonnes_year": 520000,
-            "waste_type": "Municipal waste + commercial waste",
-            "current_electricity_output_MW": 60,
-            "current_heat_output_MW": 110,
-            "current_efficiency_percent": 70,
-            "flue_gas_temp_post_boiler": "165°C",
-            "waste_heat_potential": "HIGH - 22 MW thermal via ORC or heat pump integration",
-            "current_recovery": "Standard steam cycle, NO advanced systems",
-            "energy_revenue_million_euro": 48,
-            "improvement_potential": "€7-10M/year + 15% efficiency boost",
-            "emission_levels": "Compliant, but seeking optimization",
-            "contact": "Technical Operations Manager",
-            "urgency": "HIGH - Energy prices driving efficiency push"
-        },
-        {
-            "facility": "Warsaw-Targówek Waste Thermal Treatment",
-            "facility_type": "MSW Incineration + Biomass",
-            "country": "Poland",
-            "waste_throughput_tonnes_year": 480000,
-            "waste_type": "MSW + sewage sludge + biomass",
-            "current_electricity_output_MW": 52,
-            "current_heat_output_MW": 125,
-            "current_efficiency_percent": 66,
-            "flue_gas_temp_post_boiler": "195°C",
-            "waste_heat_potential": "VERY HIGH - 28 MW thermal (multi-fuel optimization needed)",
-            "current_recovery": "Basic boiler, NO flue gas condensation",
-            "energy_revenue_million_euro": 38,
-            "improvement_potential": "€9-14M/year + carbon credit bonus",
-            "emission_levels": "Recent violation (6 months ago) - dioxin exceedance, corrective action implemented",
-            "compliance_status": "Currently compliant, but history of issues",
-            "contact": "Plant Manager / Energy Engineer",
-            "urgency": "HIGH - Expansion project 2026 - ideal timing for upgrade"
-        }
-    ]
+    def reply(payload):
+        return {"content": [{"type": "text", "text": json.dumps(payload, indent=2)}]}
 
-    return {
-        "content": [
-            {
-                "type": "text",
-                "text": json.dumps(mock_results, indent=2)
-            }
-        ]
-    }
+    if args.get('query_type', 'filter') != 'filter':
+        return reply({"error": "Only JSON filter queries are supported; raw SQL is not accepted"})
+
+    try:
+        filters = json.loads(args['query']) if args.get('query') else {}
+    except json.JSONDecodeError as e:
+        return reply({"error": f"query is not valid JSON: {e}"})
+    if not isinstance(filters, dict):
+        return reply({"error": "query must be a JSON object"})
+
+    # Older callers pass these as top-level arguments
+    if args.get('dioxin_focus'):
+        filters.setdefault('pollutant', DIOXIN_POLLUTANTS)
+    if args.get('min_age'):
+        filters.setdefault('min_age', args['min_age'])
+    if args.get('regulatory_region'):
+        filters.setdefault('region', args['regulatory_region'])
+    if args.get('min_capacity'):
+        filters.setdefault('min_capacity_mw', args['min_capacity'])
+
+    try:
+        # SQLite work runs on a worker thread so concurrent campaigns keep the event loop free
+        page = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: get_eea_store().search_facilities(
+                filters, cursor=args.get('cursor'), page_size=args.get('page_size', DEFAULT_PAGE_SIZE)))
+    except (ValueError, FileNotFoundError, sqlite3.Error) as e:
+        return reply({"error": str(e), "filter": filters})
+
+    for row in page["rows"]:
+        region = "EU" if row["country_code"] in REGION_COUNTRY_CODES["EU"] else "Other"
+        row["regulatory_weight"] = regulatory_weights[region]
+
+    try:
+        if args.get('dataset'):
+            handle = registry.append(args['dataset'], page.pop("rows"))
+        else:
+            handle = registry.register(page.pop("rows"), kind="eea_facilities")
+    except ValueError as e:
+        return reply({"error": str(e)})
+    return reply({**page, **registry.describe(handle)})
 
 
 @tool(
@@ -344,109 +220,14 @@ async def query_database(args, extra):
         }
     }
 )
+@traced_tool
 async def score_lead(args, extra):
     """Calculate lead score based on DIOXIN REDUCTION & waste-to-energy plant optimization with age/regulatory factors"""
     lead = args.get('lead_data', {})
-    criteria = args.get('criteria', {})
 
     # GMAB scoring logic - PRIORITY FOCUS: DIOXIN/PCDD/PCDF REDUCTION + PLANT AGE + REGULATORY PRESSURE
-    score = 0
-    reasons = []
-
-    # PRELIMINARY: Plant Age (NEW - Dioxin risk indicator)
-    plant_age = get_plant_age(lead.get('plant_start_year') or lead.get('start_year') or lead.get('Start'))
-    if plant_age:
-        if plant_age > 20:
-            score += 20
-            reasons.append(f"⚠️ AGED PLANT ({plant_age} years) - HIGH dioxin risk from de novo synthesis + memory effect")
-        elif plant_age > 15:
-            score += 15
-            reasons.append(f"Moderate age ({plant_age} years) - dioxin risk increasing, APCD upgrade opportunity")
-        elif plant_age > 10:
-            score += 10
-            reasons.append(f"Relatively mature ({plant_age} years) - preventive APCD maintenance recommended")
-
-    # REGULATORY PRESSURE (NEW - Geography-based weight)
-    country = lead.get('country', 'Unknown')
-    reg_weight = get_regulatory_weight(country)
-    if reg_weight > 5:
-        score += reg_weight
-        reasons.append(f"🌍 Regulatory pressure ({country}): +{reg_weight} points")
-
-    # 1. DIOXIN/PCDD/PCDF EMISSIONS (40 points - HIGHEST PRIORITY) - Regulatory & health driver
-    emission_status = lead.get('emission_levels', '').lower()
-    compliance = lead.get('compliance_status', '').lower()
-
-    # DIOXIN-SPECIFIC VIOLATIONS - Highest Priority
-    has_dioxin_issue = 'dioxin' in emission_status or 'pcdd' in emission_status or 'pcdf' in emission_status
-
-    if has_dioxin_issue and ('exceed' in emission_status or 'violation' in emission_status or 'critical' in compliance):
-        score += 40
-        reasons.append("🚨 CRITICAL DIOXIN/PCDD/PCDF VIOLATION - HIGHEST PRIORITY (APCD technology needed)")
-    elif has_dioxin_issue and ('approaching' in emission_status or 'warning' in emission_status or '<90 days' in emission_status):
-        score += 35
-        reasons.append("⚠️ DIOXIN emissions APPROACHING limits - urgent APCD installation needed")
-    elif has_dioxin_issue and ('recent violation' in emission_status or 'within 12 months' in emission_status):
-        score += 30
-        reasons.append("Recent DIOXIN violations - APCD retrofit needed to prevent recurrence")
-    elif has_dioxin_issue and 'at risk' in emission_status:
-        score += 25
-        reasons.append("At risk of DIOXIN violations - proactive APCD system recommended")
-
-    # General emission violations (lower priority than dioxin-specific)
-    elif 'exceed' in emission_status or 'violation' in emission_status or 'critical' in compliance or 'enforcement' in emission_status:
-        score += 20
-        reasons.append("🚨 EMISSION VIOLATION - exceeding limits, enforcement action")
-    elif 'approaching' in emission_status or 'warning' in emission_status or '<90 days' in emission_status:
-        score += 15
-        reasons.append("⚠️ APPROACHING emission limits - compliance deadline imminent")
-    elif 'recent violation' in emission_status or 'within 12 months' in emission_status:
-        score += 10
-        reasons.append("Recent emission violations - upgrade needed to ensure compliance")
-    elif 'at risk' in emission_status or 'within 20%' in emission_status:
-        score += 5
-        reasons.append("At risk of violations - proactive upgrade recommended")
-
-    # 2. Low current efficiency (25 points) - More room for improvement
-    efficiency = lead.get('current_efficiency_percent', 75)
-    if efficiency < 67:
-        score += 25
-        reasons.append(f"🔥 LOW efficiency ({efficiency}%) - huge improvement potential via GMAB systems")
-    elif efficiency < 70:
-        score += 20
-        reasons.append(f"MEDIUM efficiency ({efficiency}%) - good improvement opportunity")
-    elif efficiency < 73:
-        score += 15
-        reasons.append(f"Moderate efficiency ({efficiency}%) - optimization possible")
-
-    # 3. Waste heat recovery potential (20 points)
-    waste_heat = lead.get('waste_heat_potential', '').lower()
-    if 'very high' in waste_heat or '25 mw' in waste_heat or '28 mw' in waste_heat or '35 mw' in waste_heat:
-        score += 20
-        reasons.append("VERY HIGH waste heat potential from flue gas - advanced GMAB recovery systems ideal")
-    elif 'high' in waste_heat or '18 mw' in waste_heat or '22 mw' in waste_heat:
-        score += 15
-        reasons.append("HIGH waste heat potential - excellent for GMAB ORC/heat recovery")
-
-    # 4. Large waste throughput (15 points) - Economy of scale
-    throughput = lead.get('waste_throughput_tonnes_year', 0)
-    if throughput > 600000:
-        score += 15
-        reasons.append(f"Large facility ({throughput:,} tonnes/year) - economy of scale for GMAB systems")
-    elif throughput > 500000:
-        score += 12
-        reasons.append(f"Medium-large facility ({throughput:,} tonnes/year) - good project size")
-
-    # 5. Urgency/Timing (15 points) - Planned upgrades = perfect opportunity
-    urgency = lead.get('urgency', '').lower()
-    current_recovery = lead.get('current_recovery', '').lower()
-
-    if 'critical' in urgency or 'end-of-life' in current_recovery or 'replacement' in urgency:
-        score += 15
-        reasons.append("CRITICAL timing - boiler replacement/major upgrade planned (ideal for GMAB integration)")
-    elif 'high' in urgency or 'upgrade planned' in urgency or 'expansion' in urgency:
-        score += 10
-        reasons.append("HIGH urgency - plant upgrade or expansion planned (good timing)")
+    # (see lead_scoring for the factors; one lead is a batch of one)
+    scored = score_leads_table([lead]).iloc[0]
 
     result = {
         "facility": lead.get('facility'),
@@ -454,11 +235,11 @@ async def score_lead(args, extra):
         "country": lead.get('country'),
         "waste_throughput": lead.get('waste_throughput_tonnes_year'),
         "current_efficiency": lead.get('current_efficiency_percent'),
-        "total_score": score,
-        "qualification": "🔥 HOT LEAD" if score >= 70 else "⚠️ WARM" if score >= 50 else "COLD",
+        "total_score": int(scored['total_score']),
+        "qualification": scored['qualification'],
         "waste_heat_potential": lead.get('waste_heat_potential'),
         "improvement_potential": lead.get('improvement_potential'),
-        "reasons": reasons
+        "reasons": render_reasons(scored)
     }
 
     return {
@@ -471,13 +252,102 @@ async def score_lead(args, extra):
     }
 
 
+@tool(
+    name="score_leads_batch",
+    description=(
+        "Score many leads in one call. Pass a dataset handle (or inline leads); the scored leads are stored "
+        "as a new dataset, best first, and the reply lists the top leads with points per factor, "
+        "compact reason codes and the parsed signals"
+    ),
+    input_schema={
+        "dataset": {
+            "type": "string",
+            "description": "Handle of a lead dataset (from query_database or filter_leads_by_age_and_regulation)"
+        },
+        "leads": {
+            "type": "array",
+            "description": "Inline lead objects with the same fields as score_lead's lead_data (small lists only)"
+        },
+        "top": {
+            "type": "integer",
+            "description": "Number of best leads to show in the reply (default 10)"
+        },
+        "include_reasons": {
+            "type": "boolean",
+            "description": "Also return the full reason sentences for the shown leads (default false: codes only)"
+        }
+    }
+)
+@traced_tool
+async def score_leads_batch(args, extra):
+    """Score a whole table of leads with the vectorised score_lead factors (lead_scoring)"""
+    try:
+        leads = registry.resolve(lead_rows(args))
+    except ValueError as e:
+        return tool_error(str(e))
+    # free text parsed once (pre-ranked shortlists already are signal frames); scoring runs on the typed signals
+    signals = leads if is_signal_frame(leads) else extract_signals(leads)
+    scores = score_leads_table(signals)
+
+    # The scored dataset keeps every lead field next to its points, so export_leads can take the handle
+    scored = leads.reset_index(drop=True).assign(**{
+        column: scores[column].to_numpy()
+        for column in POINT_COLUMNS + ['total_score', 'qualification', 'reason_codes']
+    })
+    order = scores['total_score'].to_numpy().argsort(kind='stable')[::-1]
+    handle = registry.register(scored.iloc[order], kind="scored_leads")
+
+    top = []
+    for position in order[:args.get('top', 10)]:
+        row, signal = scores.iloc[position], signals.iloc[position]
+        result = {
+            "facility": row['facility'] if isinstance(row['facility'], str) else None,
+            "total_score": int(row['total_score']),
+            "qualification": row['qualification'],
+            "points": {column[:-len('_points')]: int(row[column]) for column in POINT_COLUMNS if row[column]},
+            "reason_codes": list(row['reason_codes']),
+            "signals": {
+                "dioxin_status": signal['dioxin_status'],
+                "emission_status": signal['emission_status'],
+                "heat_potential_mw": None if math.isnan(signal['heat_potential_mw']) else signal['heat_potential_mw'],
+                "heat_level": signal['heat_level'],
+                "urgency_level": signal['urgency_level'],
+            },
+        }
+        if args.get('include_reasons'):
+            result["reasons"] = render_reasons(row)
+        top.append(result)
+
+    summary = {
+        "dataset": handle,
+        "total_leads": len(scored),
+        "qualification_counts": {k: int(v) for k, v in scores['qualification'].value_counts().items()},
+        "top_leads": top,
+    }
+    return {
+        "content": [
+            {
+                "type": "text",
+                "text": json.dumps(summary, indent=2)
+            }
+        ]
+    }
+
+
 @tool(
     name="filter_leads_by_age_and_regulation",
-    description="Filter leads by plant age (>15 years) and regulatory region (EU or Emerging Asia)",
+    description=(
+        "Filter leads by plant age (>15 years) and regulatory region (EU or Emerging Asia). "
+        "The passing leads are stored as a new dataset; the reply has its handle and a sample"
+    ),
     input_schema={
+        "dataset": {
+            "type": "string",
+            "description": "Handle of a lead dataset to filter"
+        },
         "leads": {
             "type": "array",
-            "description": "List of leads to filter"
+            "description": "Inline list of leads to filter (small lists only)"
         },
         "min_age": {
             "type": "integer",
@@ -489,6 +359,7 @@ async def score_lead(args, extra):
         }
     }
 )
+@traced_tool
 async def filter_leads_by_age_and_regulation(args, extra):
     """
     Filter leads by age and regulatory region
@@ -497,46 +368,52 @@ async def filter_leads_by_age_and_regulation(args, extra):
     - Plant age > 15 years (critical dioxin risk: de novo synthesis + memory effect)
     - Regulatory regions: EU (BAT), Developed_Asia (strict), Emerging_Asia (tightening)
 
-    Returns: Filtered lead list with filtering reasons
+    Returns: Handle of the filtered lead dataset, counts and filtering reasons
     """
-    leads = args.get('leads', [])
+    try:
+        leads = lead_rows(args)
+    except ValueError as e:
+        return tool_error(str(e))
     min_age = args.get('min_age', 15)
     priority_regions = args.get('priority_regions', ['EU', 'Developed_Asia', 'Emerging_Asia'])
 
-    filtered_leads = []
+    # Evaluated in chunks with vectorised year parsing and boolean masks (lead_filters);
+    # the passing leads keep all their fields for scoring and export
+    lead_filter = LeadFilter(min_age=min_age, regions=priority_regions)
+    passing = []
     filtered_out = []
-
-    for lead in leads:
-        passes, reason = should_filter_lead(lead, min_age=min_age, regulatory_regions=priority_regions)
-
-        lead_info = {
-            "facility": lead.get('facility', 'Unknown'),
-            "country": lead.get('country', 'Unknown'),
-            "plant_age": get_plant_age(lead.get('plant_start_year') or lead.get('start_year') or lead.get('Start')),
-            "region": country_to_region.get(lead.get('country', ''), 'Other'),
-            "passes_filter": passes,
-            "filter_reason": reason
-        }
-
-        if passes:
-            filtered_leads.append(lead_info)
-        else:
-            filtered_out.append(lead_info)
+    total = 0
+
+    for chunk in iter_chunks(leads):
+        decisions = lead_filter.evaluate(chunk)
+        passes = decisions['passes_filter'].to_numpy()
+        total += len(chunk)
+        passing.append(chunk[passes].assign(
+            plant_age=decisions['plant_age'][passes].astype('Int64'),
+            region=decisions['region'][passes],
+            filter_reason=decisions['filter_reason'][passes],
+        ))
+        if len(filtered_out) < 5:  # Only the first 5 are reported
+            filtered_out += json_records(decisions[~passes].head(5 - len(filtered_out)))
+    filtered_leads = pd.concat(passing, ignore_index=True) if passing else pd.DataFrame()
+    handle = registry.register(filtered_leads, kind="filtered_leads")
+    n_out = total - len(filtered_leads)
 
     summary = {
-        "total_input_leads": len(leads),
+        "total_input_leads": total,
         "filtered_passes": len(filtered_leads),
-        "filtered_out": len(filtered_out),
+        "filtered_out": n_out,
         "filter_criteria": f"Age > {min_age} years AND Region in {priority_regions}",
-        "pass_rate": f"{len(filtered_leads) / max(1, len(leads)) * 100:.1f}%",
-        "filtered_leads": filtered_leads,
+        "pass_rate": f"{len(filtered_leads) / max(1, total) * 100:.1f}%",
+        "filtered_leads": registry.describe(
+            handle, sample_columns=['facility', 'country', 'plant_age', 'region', 'filter_reason']),
         "filtered_out_summary": [
             {
                 "facility": l["facility"],
                 "country": l["country"],
                 "reason": l["filter_reason"]
             }
-            for l in filtered_out[:5]  # Show first 5 filtered out
+            for l in filtered_out  # Show first 5 filtered out
         ]
     }
 
@@ -552,23 +429,28 @@ async def filter_leads_by_age_and_regulation(args, extra):
 
 @tool(
     name="export_leads",
-    description="Export qualified leads to Excel file with multiple priority sheets",
-    input_schema={  # Change from inputSchema
+    description="Export leads to an Excel file with PRIORITY 1-5 sheets and an ALL LEADS sheet; returns the file path and row counts",
+    input_schema={
+        "dataset": {
+            "type": "string",
+            "description": "Handle of the lead dataset to export (e.g. from score_leads_batch)"
+        },
         "leads": {
             "type": "array",
-            "description": "List of leads to export"
-        },
-        "format": {
-            "type": "string",
-            "enum": ["csv", "json", "excel"],
-            "description": "Export format"
+            "description": "Inline list of leads to export (an optional 'priority' 1-5 overrides the score tier)"
         },
         "filename": {
             "type": "string",
-            "description": "Output filename"
+            "description": "Output workbook path (default GMAB_waste_to_energy_leads.xlsx)"
+        },
+        "also_write": {
+            "type": "array",
+            "items": {"type": "string", "enum": ["csv", "parquet"]},
+            "description": "Also write one CSV / Parquet file per sheet next to the workbook"
         }
     }
 )
+@traced_tool
 async def export_leads(args, extra):
     """
     Export leads to Excel file with multiple priority sheets
@@ -580,57 +462,100 @@ async def export_leads(args, extra):
     - PRIORITY 4: GOOD OPPORTUNITIES (Medium value + Medium need)
     - PRIORITY 5: LONG TERM (Lower priority but qualified)
     - ALL LEADS: Complete list
+
+    Leads are partitioned once and streamed to a write-only workbook (lead_export);
+    only the path and row counts are returned, not the data.
     """
-    # Implementation with pandas and openpyxl
-    # import pandas as pd
-    # leads_data = args.get('leads', [])
-    #
-    # # Categorize leads into priority groups
-    # priority_1 = [l for l in leads_data if l.get('priority') == 1]
-    # priority_2 = [l for l in leads_data if l.get('priority') == 2]
-    # ...
-    #
-    # with pd.ExcelWriter(args.get('filename'), engine='openpyxl') as writer:
-    #     pd.DataFrame(priority_1).to_excel(writer, sheet_name='PRIORITY 1 - CRITICAL', index=False)
-    #     pd.DataFrame(priority_2).to_excel(writer, sheet_name='PRIORITY 2 - HIGH VALUE', index=False)
-    #     ...
-
-    leads_count = len(args.get('leads', []))
-    filename = args.get('filename', 'GMAB_waste_to_energy_leads.xlsx')
-
-    # Mock response showing multi-sheet export
-    export_summary = {
-        "total_leads": leads_count,
-        "filename": filename,
-        "sheets_created": [
-            "PRIORITY 1 - CRITICAL & URGENT",
-            "PRIORITY 2 - HIGH VALUE",
-            "PRIORITY 3 - HIGH NEED",
-            "PRIORITY 4 - GOOD OPPORTUNITIES",
-            "PRIORITY 5 - LONG TERM",
-            "ALL LEADS - MASTER LIST"
-        ],
-        "priority_breakdown": {
-            "priority_1_critical": "High urgency + High value + Low efficiency",
-            "priority_2_high_value": "Revenue potential >€10M/year",
-            "priority_3_high_need": "Very low efficiency or aging equipment",
-            "priority_4_good": "Medium value + Medium need",
-            "priority_5_long_term": "Qualified but lower priority"
-        }
-    }
+    filename = args.get('filename') or DEFAULT_EXPORT_FILENAME
+    try:
+        export_summary = await asyncio.get_running_loop().run_in_executor(
+            None, export_leads_workbook, lead_rows(args), filename, tuple(args.get('also_write') or ()))
+    except (ValueError, OSError) as e:
+        return tool_error(str(e))
 
+    row_counts = export_summary['row_counts']
     return {
         "content": [
             {
                 "type": "text",
-                "text": f"✅ Exported {leads_count} leads to {filename} with {len(export_summary['sheets_created'])} priority sheets:\n" +
-                       json.dumps(export_summary, indent=2)
+                "text": f"✅ Exported {row_counts[ALL_LEADS_SHEET]} leads to {export_summary['path']} "
+                        f"with {len(row_counts)} sheets:\n" + json.dumps(export_summary, indent=2)
             }
         ]
     }
 
 
-async def find_qualified_leads():
+def get_mcp_server():
+    """Lead tool server shared by every campaign in the process, created on first use"""
+    global mcp_server
+    if mcp_server is None:
+        mcp_server = create_sdk_mcp_server(
+            name="lead-tools",
+            version="1.0.0",
+            tools=[query_database, filter_leads_by_age_and_regulation, score_lead, score_leads_batch, export_leads]
+        )
+    return mcp_server
+
+
+async def run_campaign(name, prompt, max_turns=30, output_dir=None, quiet=False):
+    """
+    Run one campaign prompt against the shared lead tools
+
+    The assistant's text is kept as the campaign report. With output_dir, the
+    prompt asks for every exported file to go there, and the report and run
+    details are written to report.md and summary.json in it, so concurrent
+    campaigns never share an output file.
+
+    Returns:
+        dict: campaign, duration_s, cost_usd, turns, output_dir and report (text)
+    """
+    if output_dir is not None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        prompt += f"\n    Save every exported file in {output_dir.resolve()} (pass the full path as filename).\n"
+
+    report = []
+    summary = {"campaign": name, "duration_s": None, "cost_usd": None, "turns": None,
+               "output_dir": str(output_dir) if output_dir else None}
+
+    async with telemetry.run(name) as run:
+        async for message in query(
+            prompt=prompt,
+            options=ClaudeAgentOptions(
+                cwd=CAMPAIGN_CWD,
+                max_turns=max_turns,
+                model="sonnet",
+                mcp_servers={
+                    "leads": get_mcp_server()
+                }
+            )
+        ):
+            run.observe(message)
+            if message.type == "assistant":
+                for content in message.message.content:
+                    if hasattr(content, 'text') and content.text:
+                        report.append(content.text)
+                        if not quiet:
+                            print(f"\n{content.text}")
+                    elif hasattr(content, 'name') and not quiet:
+                        print(f"\n[TOOL] Using tool: {content.name}")
+
+            elif message.type == "result":
+                summary.update(duration_s=message.duration_ms / 1000, cost_usd=message.total_cost_usd,
+                               turns=message.num_turns)
+                if not quiet:
+                    print(f"\n\n[DONE] Analysis Complete!")
+                    print(f"   Duration: {message.duration_ms/1000:.2f} seconds")
+                    print(f"   Cost: ${message.total_cost_usd:.4f}")
+                    print(f"   Turns: {message.num_turns}")
+
+    if output_dir is not None:
+        (output_dir / "report.md").write_text("\n\n".join(report), encoding="utf-8")
+        (output_dir / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return {**summary, "report": "\n\n".join(report)}
+
+
+async def find_qualified_leads(top_n=DEFAULT_TOP_N, output_dir=None, quiet=False):
     """
     Main function to find qualified leads
 
@@ -640,17 +565,23 @@ async def find_qualified_leads():
     - Geographic preferences
     - Industry focus
     - Budget requirements
-    """
 
-    # Create MCP server with database tools
-    mcp_server = create_sdk_mcp_server(
-        name="lead-tools",
-        version="1.0.0",
-        tools=[query_database, score_lead, export_leads]
-    )
+    Every WtE facility in the EEA register is scored offline first (prerank);
+    the agent only gets the top_n shortlist, as a dataset handle and a table.
+    output_dir and quiet are passed to run_campaign.
+    """
+    try:
+        ranking = await asyncio.get_running_loop().run_in_executor(None, prerank, None, top_n)
+    except (FileNotFoundError, sqlite3.Error) as e:
+        print(f"⚠ Pre-ranking failed: {e}")
+        return
+    shortlist = ranking['shortlist']
+    # Pinned: concurrent campaigns share the registry and must not evict the handle the prompt names
+    shortlist_handle = registry.register(shortlist, kind="shortlist", pin=True)
+    shortlist_rows = "\n".join("       " + line for line in shortlist_table(shortlist).splitlines())
 
     # GMAB DIOXIN REDUCTION & WASTE-TO-ENERGY PLANT OPTIMIZATION LEAD FINDER
-    prompt = """
+    prompt = f"""
     Find WASTE-TO-ENERGY PLANTS with DIOXIN/PCDD/PCDF EMISSIONS and energy efficiency opportunities from the EEA Industrial Emissions Database.
 
     Company: SPIG-GMAB (www.SPIG-GMAB.com)
@@ -783,30 +714,24 @@ async def find_qualified_leads():
     - Example: Small plants, currently compliant but in dioxin-emitting sectors
 
     TASKS:
-    1. Query the EEA database for ALL WASTE-TO-ENERGY facilities (waste management sector)
-       ** CRITICAL: FILTER FOR DIOXIN/PCDD/PCDF EMISSIONS FIRST **
-
-    2. Identify ALL plants with dioxin/PCDD/PCDF emissions:
-       - Municipal waste incineration WITH dioxin data/violations
-       - RDF/SRF combustion WITH dioxin risks
-       - Biomass waste processing WITH dioxin profile analysis
-       - Industrial waste thermal treatment (HIGHEST dioxin risk)
-       - Sewage sludge incineration (HIGH dioxin risk)
-       - Look for: PCDD, PCDF, Dioxin, I-TEQ, TEQ columns in emissions data
-       - Flag: Memory effect history, de novo synthesis indicators, APCD status
-
-    3. Filter for plants with current dioxin issues:
-       - Exceeding I-TEQ/TEQ limits
-       - Approaching dioxin limits (<90 days warning)
-       - Recent violation history (within 24 months)
-       - At-risk status (>80% of limit)
-       - NO adequate APCD system in place
-
-    4. Score EVERY facility using GMAB DIOXIN-FOCUSED criteria above (no limit - find all)
-       - DIOXIN violations = TOP priority (40+ points)
-       - Other factors secondary to dioxin control need
-
-    5. DO NOT filter to "top 30" - include ALL qualified leads (score >30 with dioxin concern, >50 without)
+    1. The EEA register has ALREADY been ranked offline: all {ranking['candidates']} WASTE-TO-ENERGY facilities
+       (activities 5(a)/5(b)) were scored with the criteria above from plant age, regulatory region and
+       reported dioxin/PCDD/PCDF releases. Do NOT query or score the whole register again.
+
+    2. The top {len(shortlist)} are stored as dataset {shortlist_handle} (signals and points per factor):
+{shortlist_rows}
+       Qualification over all candidates: {ranking['qualification_counts']}
+
+    3. For the shortlisted plants only, establish what the register does not hold:
+       - Dioxin compliance status (exceeding I-TEQ/TEQ limits, approaching limits, recent violations, at-risk)
+       - APCD status, memory effect and de novo synthesis indicators
+       - Current efficiency, waste throughput, waste heat potential, planned upgrades
+       - Use query_database only to look up details of shortlisted facilities
+
+    4. Rescore only where your findings change a lead's signals (score_leads_batch with the shortlist
+       dataset or the updated leads); the register-based points are already in the dataset
+
+    5. Keep the shortlist order unless your findings justify moving a plant, and say why
 
     6. Categorize each lead into Priority 1-5 based on dioxin-focused criteria above
 
@@ -835,7 +760,7 @@ async def find_qualified_leads():
        - Payback analysis: APCD ROI + Energy savings
        - Regulatory risk if dioxin not addressed
 
-    8. Export to 'GMAB_Dioxin_Control_Leads.xlsx' (Excel with 6 sheets):
+    8. Export to 'GMAB_Dioxin_Control_Leads.xlsx' (export_leads with dataset {shortlist_handle} or the rescored dataset):
        - Sheet 1: PRIORITY 1 - DIOXIN CRITICAL & URGENT (violations, <3 months compliance deadline)
        - Sheet 2: PRIORITY 2 - DIOXIN HIGH VALUE (APCD+Energy combined ROI)
        - Sheet 3: PRIORITY 3 - DIOXIN AT-RISK (proactive APCD opportunity)
@@ -853,39 +778,21 @@ async def find_qualified_leads():
     Analyze the database and identify WASTE-TO-ENERGY plants with MAXIMUM efficiency improvement potential!
     """
 
-    print("[HOT] GMAB Waste-to-Energy Plant Optimization Lead Finder")
-    print("   Finding WtE plants with efficiency improvement opportunities...\n")
-
-    qualified_leads = []
-
-    async for message in query(
-        prompt=prompt,
-        options=ClaudeAgentOptions(
-            cwd="C:\\Users\\staff\\anthropicFun\\EEA_Industrial_Emissions_Data",
-            max_turns=30,
-            model="sonnet",
-            mcp_servers={
-                "leads": mcp_server
-            }
-        )
-    ):
-        if message.type == "assistant":
-            for content in message.message.content:
-                if hasattr(content, 'text') and content.text:
-                    print(f"\n{content.text}")
-                elif hasattr(content, 'name'):
-                    print(f"\n[TOOL] Using tool: {content.name}")
+    if not quiet:
+        print("[HOT] GMAB Waste-to-Energy Plant Optimization Lead Finder")
+        print("   Finding WtE plants with efficiency improvement opportunities...")
+        print(f"   Pre-ranked {ranking['candidates']} facilities offline; shortlist of {len(shortlist)} -> {shortlist_handle}\n")
 
-        elif message.type == "result":
-            print(f"\n\n[DONE] Analysis Complete!")
-            print(f"   Duration: {message.duration_ms/1000:.2f} seconds")
-            print(f"   Cost: ${message.total_cost_usd:.4f}")
-            print(f"   Turns: {message.num_turns}")
+    # The ranking is done offline; turns go to the shortlist only
+    try:
+        return await run_campaign("find_qualified_leads", prompt, max_turns=10, output_dir=output_dir, quiet=quiet)
+    finally:
+        registry.unpin(shortlist_handle)
 
 
 # GMAB Waste-to-Energy Specialized Analysis Functions
 
-async def aging_plants_boiler_replacement():
+async def aging_plants_boiler_replacement(output_dir=None, quiet=False):
     """Find WtE plants with CRITICAL boiler replacement needs - URGENT"""
     prompt = """
     Find WASTE-TO-ENERGY plants with aging boilers needing IMMEDIATE replacement for GMAB.
@@ -910,9 +817,10 @@ async def aging_plants_boiler_replacement():
 
     Export to 'WTE_BOILER_REPLACEMENT_URGENT.csv' for immediate project pursuit.
     """
+    return await run_campaign("aging_plants_boiler_replacement", prompt, output_dir=output_dir, quiet=quiet)
 
 
-async def facility_type_analysis():
+async def facility_type_analysis(output_dir=None, quiet=False):
     """Analyze waste-to-energy opportunities by facility type"""
     prompt = """
     Segment waste-to-energy leads by facility type for GMAB:
@@ -953,9 +861,10 @@ async def facility_type_analysis():
 
     Recommend which facility type to prioritize for WtE campaign.
     """
+    return await run_campaign("facility_type_analysis", prompt, output_dir=output_dir, quiet=quiet)
 
 
-async def geographic_wte_market_priority():
+async def geographic_wte_market_priority(output_dir=None, quiet=False):
     """Prioritize EU countries by waste-to-energy market opportunity"""
     prompt = """
     Rank European countries by GMAB waste-to-energy market opportunity:
@@ -987,6 +896,7 @@ async def geographic_wte_market_priority():
     - Reference accounts in that country
     - Cultural considerations for sales approach
     """
+    return await run_campaign("geographic_wte_market_priority", prompt, output_dir=output_dir, quiet=quiet)
 
 
 if __name__ == "__main__":
@@ -1014,6 +924,7 @@ if __name__ == "__main__":
     asyncio.run(find_qualified_leads())
 
     # Or run specialized analyses:
+    # (several at once, concurrently: python run_campaigns.py --help)
     # asyncio.run(aging_plants_boiler_replacement())    # URGENT: Boiler end-of-life plants
     # asyncio.run(facility_type_analysis())             # Segment by WtE facility type
     # asyncio.run(geographic_wte_market_priority())     # Prioritize EU countries for WtE
@@ -0,0 +1,208 @@
+"""
+Batch WtE Lead Scoring
+score_lead's points, computed for a whole table of leads as column operations
+
+Every factor of the score_lead tool (plant age, regulatory region, dioxin /
+emission status, efficiency, waste heat, throughput, urgency) is evaluated
+once per column with np.select over the typed signals from lead_signals
+(the free text is parsed there, once), in the same order and with the same
+thresholds as the per-lead tool. Each lead gets its
+points per factor plus compact reason codes; the full reason sentences are
+rendered on demand (render_reasons) and are identical to score_lead's.
+
+Usage:
+    scores = score_leads_batch(leads)            # leads: list of dicts or DataFrame
+    scores[['total_score', 'qualification', 'reason_codes']]
+    render_reasons(scores.iloc[0])
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from lead_signals import extract_signals, is_signal_frame
+
+regulatory_weights = {
+    "EU": 25,  # EU countries - BAT compliance
+    "N.America": 15,  # North America - EPA enforcement
+    "Developed_Asia": 20,  # Japan, South Korea - strict enforcement
+    "Emerging_Asia": 10,  # China, SE Asia - emerging regulation
+    "Other": 5  # Rest of world
+}
+
+# Country to region mapping
+country_to_region = {
+    # EU Countries
+    "Germany": "EU", "France": "EU", "Italy": "EU", "Spain": "EU", "Poland": "EU",
+    "Netherlands": "EU", "Belgium": "EU", "Austria": "EU", "Czech Republic": "EU",
+    "Denmark": "EU", "Sweden": "EU", "Finland": "EU", "Greece": "EU", "Portugal": "EU",
+    "Hungary": "EU", "Romania": "EU", "Slovakia": "EU", "Slovenia": "EU", "Bulgaria": "EU",
+    "Croatia": "EU", "Estonia": "EU", "Latvia": "EU", "Lithuania": "EU", "Malta": "EU",
+    "Cyprus": "EU", "Luxembourg": "EU", "Ireland": "EU", "United Kingdom": "EU",
+    # North America
+    "USA": "N.America", "Canada": "N.America", "Mexico": "N.America",
+    # Developed Asia
+    "Japan": "Developed_Asia", "South Korea": "Developed_Asia", "Singapore": "Developed_Asia",
+    # Emerging Asia
+    "China": "Emerging_Asia", "India": "Emerging_Asia", "Vietnam": "Emerging_Asia",
+    "Thailand": "Emerging_Asia", "Indonesia": "Emerging_Asia", "Malaysia": "Emerging_Asia",
+    "Philippines": "Emerging_Asia", "Pakistan": "Emerging_Asia",
+}
+
+# Signal level -> (points, reason code)
+DIOXIN_TIERS = {'violation': (40, 'DIOXIN_VIOLATION'), 'approaching': (35, 'DIOXIN_APPROACHING'),
+                'recent': (30, 'DIOXIN_RECENT'), 'at_risk': (25, 'DIOXIN_AT_RISK')}
+EMISSION_TIERS = {'violation': (20, 'EMISSION_VIOLATION'), 'approaching': (15, 'EMISSION_APPROACHING'),
+                  'recent': (10, 'EMISSION_RECENT'), 'at_risk': (5, 'EMISSION_AT_RISK')}
+HEAT_TIERS = {'very_high': (20, 'HEAT_VERY_HIGH'), 'high': (15, 'HEAT_HIGH')}
+URGENCY_TIERS = {'critical': (15, 'TIMING_CRITICAL'), 'high': (10, 'TIMING_HIGH')}
+
+# Reason code -> score_lead reason text
+REASON_TEXT = {
+    'AGE_20': "⚠️ AGED PLANT ({age} years) - HIGH dioxin risk from de novo synthesis + memory effect",
+    'AGE_15': "Moderate age ({age} years) - dioxin risk increasing, APCD upgrade opportunity",
+    'AGE_10': "Relatively mature ({age} years) - preventive APCD maintenance recommended",
+    'REGULATORY': "🌍 Regulatory pressure ({country}): +{weight} points",
+    'DIOXIN_VIOLATION': "🚨 CRITICAL DIOXIN/PCDD/PCDF VIOLATION - HIGHEST PRIORITY (APCD technology needed)",
+    'DIOXIN_APPROACHING': "⚠️ DIOXIN emissions APPROACHING limits - urgent APCD installation needed",
+    'DIOXIN_RECENT': "Recent DIOXIN violations - APCD retrofit needed to prevent recurrence",
+    'DIOXIN_AT_RISK': "At risk of DIOXIN violations - proactive APCD system recommended",
+    'EMISSION_VIOLATION': "🚨 EMISSION VIOLATION - exceeding limits, enforcement action",
+    'EMISSION_APPROACHING': "⚠️ APPROACHING emission limits - compliance deadline imminent",
+    'EMISSION_RECENT': "Recent emission violations - upgrade needed to ensure compliance",
+    'EMISSION_AT_RISK': "At risk of violations - proactive upgrade recommended",
+    'EFFICIENCY_LOW': "🔥 LOW efficiency ({efficiency}%) - huge improvement potential via GMAB systems",
+    'EFFICIENCY_MEDIUM': "MEDIUM efficiency ({efficiency}%) - good improvement opportunity",
+    'EFFICIENCY_MODERATE': "Moderate efficiency ({efficiency}%) - optimization possible",
+    'HEAT_VERY_HIGH': "VERY HIGH waste heat potential from flue gas - advanced GMAB recovery systems ideal",
+    'HEAT_HIGH': "HIGH waste heat potential - excellent for GMAB ORC/heat recovery",
+    'SIZE_LARGE': "Large facility ({throughput:,} tonnes/year) - economy of scale for GMAB systems",
+    'SIZE_MEDIUM_LARGE': "Medium-large facility ({throughput:,} tonnes/year) - good project size",
+    'TIMING_CRITICAL': "CRITICAL timing - boiler replacement/major upgrade planned (ideal for GMAB integration)",
+    'TIMING_HIGH': "HIGH urgency - plant upgrade or expansion planned (good timing)",
+}
+
+POINT_COLUMNS = ['age_points', 'regulatory_points', 'emission_points', 'efficiency_points',
+                 'heat_points', 'throughput_points', 'urgency_points']
+
+
+def get_plant_age(start_year_or_date):
+    """Calculate plant age from start year or date"""
+    try:
+        current_year = datetime.now().year
+
+        # Handle different date formats
+        if isinstance(start_year_or_date, int):
+            return current_year - start_year_or_date
+        elif isinstance(start_year_or_date, str):
+            # Try to parse year from string
+            year_str = str(start_year_or_date).split('-')[0] if '-' in str(start_year_or_date) else str(start_year_or_date)
+            try:
+                start_year = int(year_str)
+                return current_year - start_year
+            except:
+                return None
+        return None
+    except:
+        return None
+
+
+def get_regulatory_weight(country):
+    """Get regulatory weight factor for a country"""
+    region = country_to_region.get(country, "Other")
+    return regulatory_weights.get(region, regulatory_weights["Other"])
+
+
+def _tier(levels, tiers):
+    """Points and reason code per row for a categorical signal (0 / '' for unlisted levels)"""
+    matches = [(levels == level).to_numpy(dtype=bool) for level in tiers]
+    return (np.select(matches, [points for points, _ in tiers.values()], 0),
+            np.select(matches, [code for _, code in tiers.values()], ''))
+
+
+def score_leads_batch(leads, as_of_year=None):
+    """
+    Score every lead as score_lead would
+
+    Args:
+        leads: list of lead dicts or DataFrame (score_lead field names), or a
+            signal frame from lead_signals.extract_signals (scored without re-parsing)
+        as_of_year: Year plant ages are counted to (default: current year)
+
+    Returns:
+        DataFrame aligned with leads: plant_age, region, one *_points column per
+        factor, total_score, qualification and reason_codes (tuple of REASON_TEXT keys);
+        the raw fields needed by render_reasons are carried along
+    """
+    signals = leads if is_signal_frame(leads) else extract_signals(leads)
+    as_of_year = as_of_year or datetime.now().year
+    n = len(signals)
+
+    # Plant age
+    age = as_of_year - signals['start_year'].to_numpy(dtype=float)
+    known_age = ~np.isnan(age) & (age != 0)
+    age_points = np.select([known_age & (age > 20), known_age & (age > 15), known_age & (age > 10)], [20, 15, 10], 0)
+    age_code = np.select([age_points == 20, age_points == 15, age_points == 10], ['AGE_20', 'AGE_15', 'AGE_10'], '')
+
+    # Regulatory region
+    country = signals['country']
+    region = country.map(country_to_region).fillna('Other')
+    weight = region.map(regulatory_weights).to_numpy(dtype='int64')
+    regulatory_points = np.where(weight > 5, weight, 0)
+    regulatory_code = np.where(weight > 5, 'REGULATORY', '')
+
+    # Dioxin / emission status: a dioxin tier outranks the general tiers
+    dioxin_points, dioxin_code = _tier(signals['dioxin_status'], DIOXIN_TIERS)
+    general_points, general_code = _tier(signals['emission_status'], EMISSION_TIERS)
+    emission_points = np.where(dioxin_points > 0, dioxin_points, general_points)
+    emission_code = np.where(dioxin_points > 0, dioxin_code, general_code)
+
+    # Efficiency
+    efficiency = signals['efficiency_pct'].to_numpy(dtype=float)
+    efficiency_points = np.select([efficiency < 67, efficiency < 70, efficiency < 73], [25, 20, 15], 0)
+    efficiency_code = np.select([efficiency < 67, efficiency < 70, efficiency < 73],
+                                ['EFFICIENCY_LOW', 'EFFICIENCY_MEDIUM', 'EFFICIENCY_MODERATE'], '')
+
+    # Waste heat
+    heat_points, heat_code = _tier(signals['heat_level'], HEAT_TIERS)
+
+    # Throughput
+    throughput = signals['throughput_tpy'].to_numpy(dtype=float)
+    throughput_points = np.select([throughput > 600000, throughput > 500000], [15, 12], 0)
+    throughput_code = np.select([throughput > 600000, throughput > 500000], ['SIZE_LARGE', 'SIZE_MEDIUM_LARGE'], '')
+
+    # Urgency / timing
+    urgency_points, urgency_code = _tier(signals['urgency_level'], URGENCY_TIERS)
+
+    points = [age_points, regulatory_points, emission_points, efficiency_points,
+              heat_points, throughput_points, urgency_points]
+    total = np.sum(points, axis=0) if n else np.zeros(0, dtype='int64')
+    codes = [age_code, regulatory_code, emission_code, efficiency_code, heat_code, throughput_code, urgency_code]
+
+    scores = pd.DataFrame({
+        'facility': signals['facility'],
+        'country': country,
+        'plant_age': np.where(np.isnan(age), np.nan, age),
+        'region': region,
+    }, index=signals.index)
+    for column, values in zip(POINT_COLUMNS, points):
+        scores[column] = np.asarray(values, dtype='int64')
+    scores['total_score'] = np.asarray(total, dtype='int64')
+    scores['qualification'] = np.select([total >= 70, total >= 50], ["🔥 HOT LEAD", "⚠️ WARM"], "COLD")
+    scores['reason_codes'] = [tuple(c for c in row if c) for row in zip(*codes)] if n else []
+    scores['current_efficiency'] = signals['current_efficiency']
+    scores['waste_throughput'] = signals['waste_throughput']
+    return scores
+
+
+def render_reasons(score_row):
+    """score_lead's reason sentences for one row of score_leads_batch"""
+    age = score_row['plant_age']
+    values = {
+        'age': int(age) if not pd.isna(age) else None,
+        'country': score_row['country'],
+        'weight': regulatory_weights[score_row['region']],
+        'efficiency': score_row['current_efficiency'],
+        'throughput': score_row['waste_throughput'],
+    }
+    return [REASON_TEXT[code].format(**values) for code in score_row['reason_codes']]
@@ -0,0 +1,193 @@
+"""
+Lead Signal Extraction
+Parses the free-text lead fields once into typed columns for the scorers
+
+score_lead used to re-lowercase and rescan emission_levels,
+compliance_status, waste_heat_potential, urgency and current_recovery on
+every scoring pass. extract_signals() runs the precompiled patterns below
+over each column once and keeps only typed results:
+
+    start_year         float    first truthy of START_FIELDS (years, whole floats, dates)
+    has_dioxin         bool     dioxin / PCDD / PCDF mentioned in emission_levels
+    dioxin_status      ordered  none < at_risk < recent < approaching < violation
+    emission_status    ordered  same scale, for the general (non-dioxin) tiers
+    heat_potential_mw  float    largest "<n> MW" figure in waste_heat_potential
+    heat_level         ordered  none < high < very_high (words or MW thresholds)
+    urgency_level      ordered  none < high < critical
+    efficiency_pct     float    current_efficiency_percent (default 75)
+    throughput_tpy     float    waste_throughput_tonnes_year (default 0)
+
+The signal frame is plain typed columns (categoricals, floats, bools), so it
+can be stored (e.g. parquet) and rescored without the raw text.
+
+Usage:
+    signals = extract_signals(leads)
+    scores = score_leads_batch(signals)   # lead_scoring accepts signals directly
+"""
+import re
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+START_FIELDS = ['plant_start_year', 'start_year', 'Start', 'dateOfStartOfOperation']
+DEFAULT_EFFICIENCY = 75
+
+STATUS_LEVELS = ['none', 'at_risk', 'recent', 'approaching', 'violation']
+HEAT_LEVELS = ['none', 'high', 'very_high']
+URGENCY_LEVELS = ['none', 'high', 'critical']
+STATUS_DTYPE = pd.CategoricalDtype(STATUS_LEVELS, ordered=True)
+HEAT_DTYPE = pd.CategoricalDtype(HEAT_LEVELS, ordered=True)
+URGENCY_DTYPE = pd.CategoricalDtype(URGENCY_LEVELS, ordered=True)
+
+# Heat potential thresholds (MW thermal), replacing the literal '25 mw' / '18 mw' checks
+HEAT_VERY_HIGH_MW = 25
+HEAT_HIGH_MW = 18
+
+DIOXIN = re.compile(r'dioxin|pcdd|pcdf', re.IGNORECASE)
+VIOLATION = re.compile(r'exceed|violation', re.IGNORECASE)
+CRITICAL = re.compile(r'critical', re.IGNORECASE)
+APPROACHING = re.compile(r'approaching|warning|<90 days', re.IGNORECASE)
+RECENT = re.compile(r'recent violation|within 12 months', re.IGNORECASE)
+AT_RISK = re.compile(r'at risk', re.IGNORECASE)
+ENFORCEMENT = re.compile(r'enforcement', re.IGNORECASE)
+WITHIN_20_PCT = re.compile(r'within 20%', re.IGNORECASE)
+HEAT_MW = re.compile(r'(\d+(?:\.\d+)?) mw', re.IGNORECASE)
+VERY_HIGH = re.compile(r'very high', re.IGNORECASE)
+HIGH = re.compile(r'high', re.IGNORECASE)
+URGENT = re.compile(r'critical|replacement', re.IGNORECASE)
+END_OF_LIFE = re.compile(r'end-of-life', re.IGNORECASE)
+PLANNED = re.compile(r'high|upgrade planned|expansion', re.IGNORECASE)
+
+SIGNAL_COLUMNS = ['start_year', 'has_dioxin', 'dioxin_status', 'emission_status', 'heat_potential_mw',
+                  'heat_level', 'urgency_level', 'efficiency_pct', 'throughput_tpy']
+
+
+def _column(leads, name, default=None):
+    return leads[name] if name in leads.columns else pd.Series(default, index=leads.index, dtype=object)
+
+
+def _text(leads, name):
+    return _column(leads, name).fillna('').astype(str)
+
+
+def _matches(text, pattern):
+    return text.str.contains(pattern).to_numpy(dtype=bool)
+
+
+def _levels(conditions, levels, dtype, index):
+    """First true condition's level per row, as an ordered categorical"""
+    values = np.select(conditions, levels, default=dtype.categories[0])
+    return pd.Series(pd.Categorical(values, dtype=dtype), index=index)
+
+
+def first_start_values(leads):
+    """Raw start value per lead: the first truthy of START_FIELDS (None where there is none)"""
+    start = pd.Series(None, index=leads.index, dtype=object)
+    for field in reversed(START_FIELDS):  # earlier fields win where truthy
+        if field in leads.columns:
+            values = leads[field]
+            truthy = values.map(bool, na_action='ignore').fillna(False).astype(bool)
+            start = start.where(~truthy, values)
+    return start
+
+
+def parse_years(values):
+    """
+    Start year per value (float, NaN where unknown): ints and whole floats as they
+    are, strings up to the first '-', dates / timestamps by their year
+    """
+    values = pd.Series(values, dtype=object)
+    years = pd.Series(np.nan, index=values.index)
+    kind = values.map(type)
+
+    is_number = kind.map(lambda t: issubclass(t, (int, float, np.integer, np.floating))).astype(bool)
+    numbers = pd.to_numeric(values[is_number], errors='coerce')
+    whole = numbers[numbers.notna() & (numbers == np.floor(numbers))]
+    years[whole.index] = whole.astype(float)
+
+    is_date = kind.map(lambda t: issubclass(t, (date, datetime, pd.Timestamp))).astype(bool)
+    years[is_date] = values[is_date].map(lambda d: float(d.year))
+
+    is_str = kind.map(lambda t: issubclass(t, str)).astype(bool)
+    year_text = values[is_str].str.split('-', n=1).str[0]
+    integral = year_text.str.fullmatch(r'\s*[+-]?\d+\s*')
+    years[integral[integral].index] = year_text[integral].astype(int).astype(float)
+    return years
+
+
+def start_years(leads):
+    """
+    Start year per lead (NaN where unknown), parsed exactly as lead_filters does,
+    so a lead passed by the age filter gets the same age when scored
+    """
+    return parse_years(first_start_values(leads))
+
+
+def extract_signals(leads):
+    """
+    Typed signal columns for every lead (see module docstring)
+
+    Args:
+        leads: list of lead dicts or DataFrame (score_lead field names)
+
+    Returns:
+        DataFrame aligned with leads: facility, country, the SIGNAL_COLUMNS and
+        the raw current_efficiency / waste_throughput values used in reason text
+    """
+    if not isinstance(leads, pd.DataFrame):
+        leads = pd.DataFrame(list(leads), dtype=object)
+    index = leads.index
+
+    emission = _text(leads, 'emission_levels')
+    compliance = _text(leads, 'compliance_status')
+    dioxin = _matches(emission, DIOXIN)
+    violation = _matches(emission, VIOLATION) | _matches(compliance, CRITICAL)
+    approaching = _matches(emission, APPROACHING)
+    recent = _matches(emission, RECENT)
+    at_risk = _matches(emission, AT_RISK)
+
+    heat = _text(leads, 'waste_heat_potential')
+    heat_mw = pd.Series(np.nan, index=index)
+    figures = heat.str.extractall(HEAT_MW)
+    if len(figures):
+        heat_mw = figures[0].astype(float).groupby(level=0).max().reindex(index)
+    mw = heat_mw.to_numpy()
+
+    urgency = _text(leads, 'urgency')
+    recovery = _text(leads, 'current_recovery')
+
+    efficiency_raw = _column(leads, 'current_efficiency_percent', DEFAULT_EFFICIENCY).fillna(DEFAULT_EFFICIENCY)
+    throughput_raw = _column(leads, 'waste_throughput_tonnes_year', 0).fillna(0)
+
+    with np.errstate(invalid='ignore'):
+        very_high = _matches(heat, VERY_HIGH) | (mw >= HEAT_VERY_HIGH_MW)
+        high = _matches(heat, HIGH) | (mw >= HEAT_HIGH_MW)
+
+    signals = pd.DataFrame({
+        'facility': _column(leads, 'facility'),
+        'country': _column(leads, 'country', 'Unknown'),
+        'start_year': start_years(leads),
+        'has_dioxin': dioxin,
+        'dioxin_status': _levels(
+            [dioxin & violation, dioxin & approaching, dioxin & recent, dioxin & at_risk],
+            ['violation', 'approaching', 'recent', 'at_risk'], STATUS_DTYPE, index),
+        'emission_status': _levels(
+            [violation | _matches(emission, ENFORCEMENT), approaching, recent,
+             at_risk | _matches(emission, WITHIN_20_PCT)],
+            ['violation', 'approaching', 'recent', 'at_risk'], STATUS_DTYPE, index),
+        'heat_potential_mw': heat_mw,
+        'heat_level': _levels([very_high, high], ['very_high', 'high'], HEAT_DTYPE, index),
+        'urgency_level': _levels(
+            [_matches(urgency, URGENT) | _matches(recovery, END_OF_LIFE), _matches(urgency, PLANNED)],
+            ['critical', 'high'], URGENCY_DTYPE, index),
+        'efficiency_pct': pd.to_numeric(efficiency_raw).astype(float),
+        'throughput_tpy': pd.to_numeric(throughput_raw).astype(float),
+        'current_efficiency': efficiency_raw,
+        'waste_throughput': throughput_raw,
+    }, index=index)
+    return signals
+
+
+def is_signal_frame(frame):
+    return isinstance(frame, pd.DataFrame) and all(c in frame.columns for c in SIGNAL_COLUMNS)
@@ -0,0 +1,191 @@
+"""
+Offline Lead Pre-Ranking
+Scores every candidate WtE facility with the deterministic scorers before the agent runs
+
+find_qualified_leads used to ask the model to query ALL waste-to-energy
+facilities page by page and score them through tool calls, so ranking the
+register took dozens of model turns. The ranking itself needs no model:
+prerank() walks the EEA store once for the WtE activity codes, marks the
+dioxin reporters from a second filtered walk, builds the typed signal frame
+(lead_signals) and scores it with lead_scoring - the same points
+score_leads_batch gives in the agent. Only the top-N shortlist, with its
+signals and points per factor, is handed to the agent for the qualitative
+work (research, categorisation, recommendations).
+
+Signals taken from the register:
+    start_year      dateOfStartOfOperation
+    country         name for the country code (regulatory region)
+    has_dioxin      any PCDD/PCDF release reported
+    dioxin_status   "at_risk" when a release was reported in the last
+                    RECENT_RELEASE_YEARS years
+    capacity_mw     rated thermal input; breaks ties between equal scores
+
+Efficiency, throughput, heat potential and urgency are not in the register;
+they keep the scorer defaults (no points) and are left to the agent.
+
+The shortlist is itself a signal frame, so score_leads_batch rescores it
+without re-parsing.
+
+Usage:
+    ranking = prerank(top_n=50)
+    ranking["shortlist"], ranking["candidates"]
+
+    python prerank.py [--top 50] [--db converted_database.db] [--output shortlist.csv]
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from eea_store import COUNTRY_NAMES, DEFAULT_DB_PATH, DIOXIN_POLLUTANTS, EEAStore
+from lead_scoring import POINT_COLUMNS, score_leads_batch
+from lead_signals import DEFAULT_EFFICIENCY, HEAT_DTYPE, SIGNAL_COLUMNS, STATUS_DTYPE, URGENCY_DTYPE
+
+# Incineration of hazardous / non-hazardous waste (E-PRTR annex I)
+WTE_ACTIVITY_CODES = ["5(a)", "5(b)"]
+DEFAULT_TOP_N = 50
+RECENT_RELEASE_YEARS = 3
+OFFLINE_PAGE_SIZE = 5000  # one walk of the register, not an agent-sized page
+
+SHORTLIST_COLUMNS = [
+    'rank', 'facility_id', 'facility', 'parent_company', 'city', 'country_code', 'country', 'region',
+    'activity_code', 'activity', 'plant_age', 'capacity_mw', *SIGNAL_COLUMNS,
+    'current_efficiency', 'waste_throughput', *POINT_COLUMNS, 'total_score', 'qualification', 'reason_codes',
+]
+PROMPT_COLUMNS = ['rank', 'facility', 'country', 'plant_age', 'capacity_mw', 'dioxin_status',
+                  'total_score', 'reason_codes']
+
+
+def walk_facilities(store, filters, as_of_year):
+    """Every row matching the filter, following next_cursor to the last page"""
+    rows, cursor = [], None
+    while True:
+        page = store.search_facilities(filters, cursor=cursor, page_size=store.max_page_size, as_of_year=as_of_year)
+        rows += page["rows"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return rows
+
+
+def candidate_signals(candidates, dioxin_ids, recent_dioxin_ids):
+    """
+    Signal frame (lead_signals.SIGNAL_COLUMNS) for EEA facility rows
+
+    Args:
+        candidates: DataFrame of search_facilities rows
+        dioxin_ids: Facility IDs with any reported dioxin release
+        recent_dioxin_ids: Facility IDs with a release in the recent window
+    """
+    index = candidates.index
+    facility_ids = candidates['facility_id']
+    recent = facility_ids.isin(recent_dioxin_ids).to_numpy()
+    return pd.DataFrame({
+        'facility': candidates['facility'],
+        'country': candidates['country_code'].map(COUNTRY_NAMES).fillna(candidates['country_code']),
+        'start_year': pd.to_numeric(candidates['start_year'], errors='coerce').astype(float),
+        'has_dioxin': facility_ids.isin(dioxin_ids).to_numpy(),
+        'dioxin_status': pd.Categorical(np.where(recent, 'at_risk', 'none'), dtype=STATUS_DTYPE),
+        'emission_status': pd.Categorical(np.where(recent, 'at_risk', 'none'), dtype=STATUS_DTYPE),
+        'heat_potential_mw': np.nan,
+        'heat_level': pd.Categorical(['none'] * len(index), dtype=HEAT_DTYPE),
+        'urgency_level': pd.Categorical(['none'] * len(index), dtype=URGENCY_DTYPE),
+        'efficiency_pct': float(DEFAULT_EFFICIENCY),
+        'throughput_tpy': 0.0,
+        'current_efficiency': DEFAULT_EFFICIENCY,
+        'waste_throughput': 0,
+    }, index=index)
+
+
+def rank_candidates(candidates, signals, top_n=DEFAULT_TOP_N, as_of_year=None):
+    """
+    Score all candidates and keep the best top_n
+
+    Ordered by total_score, then capacity_mw (largest first, unknown last), then
+    facility_id, so the shortlist is the same on every run.
+
+    Returns:
+        DataFrame of SHORTLIST_COLUMNS, rank 1 first
+    """
+    scores = score_leads_batch(signals, as_of_year=as_of_year)
+    ranked = pd.concat([
+        candidates[['facility_id', 'parent_company', 'city', 'country_code', 'activity_code', 'activity', 'capacity_mw']],
+        signals,
+        scores[['region', 'plant_age', *POINT_COLUMNS, 'total_score', 'qualification', 'reason_codes']],
+    ], axis=1)
+    ranked['capacity_mw'] = pd.to_numeric(ranked['capacity_mw'], errors='coerce')
+    ranked = ranked.sort_values(['total_score', 'capacity_mw', 'facility_id'], ascending=[False, False, True],
+                                na_position='last', kind='stable').head(top_n).reset_index(drop=True)
+    ranked['rank'] = np.arange(1, len(ranked) + 1)
+    return ranked[SHORTLIST_COLUMNS]
+
+
+def prerank(store=None, top_n=DEFAULT_TOP_N, activity_codes=None, as_of_year=None, db_path=DEFAULT_DB_PATH):
+    """
+    Rank every WtE facility in the EEA register and return the top-N shortlist
+
+    Args:
+        store: Open EEAStore (default: a store on db_path with OFFLINE_PAGE_SIZE pages)
+        top_n: Shortlist length
+        activity_codes: Candidate activity codes (default WTE_ACTIVITY_CODES)
+        as_of_year: Year plant ages and the recent-release window are counted to
+
+    Returns:
+        dict: shortlist (DataFrame), candidates (facilities scored) and
+        qualification_counts over all candidates
+    """
+    as_of_year = as_of_year or date.today().year
+    filters = {"activity_code": list(activity_codes or WTE_ACTIVITY_CODES)}
+    own_store = store is None
+    if own_store:
+        store = EEAStore(db_path, max_page_size=OFFLINE_PAGE_SIZE)
+    try:
+        candidates = pd.DataFrame(walk_facilities(store, filters, as_of_year), columns=[
+            'facility_id', 'facility', 'parent_company', 'city', 'country_code', 'activity_code', 'activity',
+            'start_year', 'capacity_mw', 'plant_age'])
+        dioxin = {**filters, "pollutant": DIOXIN_POLLUTANTS}
+        dioxin_ids = {row['facility_id'] for row in walk_facilities(store, dioxin, as_of_year)}
+        recent = {**dioxin, "year_from": as_of_year - RECENT_RELEASE_YEARS}
+        recent_ids = {row['facility_id'] for row in walk_facilities(store, recent, as_of_year)}
+    finally:
+        if own_store:
+            store.close()
+
+    signals = candidate_signals(candidates, dioxin_ids, recent_ids)
+    shortlist = rank_candidates(candidates, signals, top_n=len(candidates), as_of_year=as_of_year)
+    return {
+        "shortlist": shortlist.head(top_n),
+        "candidates": len(candidates),
+        "qualification_counts": {k: int(v) for k, v in shortlist['qualification'].value_counts().items()},
+    }
+
+
+def shortlist_table(shortlist, columns=PROMPT_COLUMNS):
+    """Compact fixed-width text table of the shortlist for a prompt or the console"""
+    table = shortlist[[c for c in columns if c in shortlist.columns]].copy()
+    if 'reason_codes' in table.columns:
+        table['reason_codes'] = table['reason_codes'].map(' '.join)
+    if 'plant_age' in table.columns:
+        table['plant_age'] = table['plant_age'].astype('Int64')
+    return table.to_string(index=False, na_rep='-')
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rank EEA waste-to-energy facilities offline with the lead scorers")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_N, help="Shortlist length")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Converted EEA SQLite database")
+    parser.add_argument("--output", help="Write the full shortlist to this CSV file")
+    args = parser.parse_args()
+
+    ranking = prerank(top_n=args.top, db_path=args.db)
+    print(f"=== Top {len(ranking['shortlist'])} of {ranking['candidates']} WtE facilities ===")
+    print(f"Qualification over all candidates: {ranking['qualification_counts']}\n")
+    print(shortlist_table(ranking['shortlist']))
+    if args.output:
+        ranking['shortlist'].to_csv(args.output, index=False)
+        print(f"\n✓ Shortlist written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ OUTPUT: Complete dioxin-control proposal package per lead, ready for sales team
 import asyncio
 import json
 from claude_agent_sdk import query, tool, create_sdk_mcp_server
+from telemetry import telemetry, traced_tool
 
 
 # Define proposal generation tools
@@ -37,6 +38,7 @@ from claude_agent_sdk import query, tool, create_sdk_mcp_server
         }
     }
 )
+@traced_tool
 async def generate_executive_proposal(args, extra):
     """
     Generate APCD-focused executive proposal document (18-25 pages)
@@ -249,6 +251,7 @@ async def generate_executive_proposal(args, extra):
         }
     }
 )
+@traced_tool
 async def build_financial_model(args, extra):
     """
     Build comprehensive Excel financial model
@@ -410,6 +413,7 @@ async def build_financial_model(args, extra):
         }
     }
 )
+@traced_tool
 async def create_stakeholder_presentations(args, extra):
     """
     Create customized PowerPoint presentations
@@ -538,6 +542,7 @@ async def create_stakeholder_presentations(args, extra):
         }
     }
 )
+@traced_tool
 async def enrich_lead_data(args, extra):
     """
     Enrich lead with additional data:
@@ -636,6 +641,7 @@ async def enrich_lead_data(args, extra):
         }
     }
 )
+@traced_tool
 async def generate_compliance_documentation(args, extra):
     """
     Generate compliance and regulatory documentation
@@ -840,29 +846,31 @@ async def generate_proposals():
     print("📄 GMAB Proposal Generation Agent")
     print("   Creating complete proposal packages for Priority leads...\n")
 
-    async for message in query(
-        prompt=prompt,
-        options={
-            "cwd": "C:\\Users\\staff\\anthropicFun\\EEA_Industrial_Emissions_Data",
-            "maxTurns": 50,
-            "model": "sonnet",
-            "mcpServers": {
-                "proposals": mcp_server
+    async with telemetry.run("generate_proposals") as run:
+        async for message in query(
+            prompt=prompt,
+            options={
+                "cwd": "C:\\Users\\staff\\anthropicFun\\EEA_Industrial_Emissions_Data",
+                "maxTurns": 50,
+                "model": "sonnet",
+                "mcpServers": {
+                    "proposals": mcp_server
+                }
             }
-        }
-    ):
-        if message.type == "assistant":
-            for content in message.message.content:
-                if hasattr(content, 'text') and content.text:
-                    print(f"\n{content.text}")
-                elif hasattr(content, 'name'):
-                    print(f"\n📝 Generating: {content.name}")
-
-        elif message.type == "result":
-            print(f"\n\n✅ Proposal Generation Complete!")
-            print(f"   Duration: {message.duration_ms/1000:.2f} seconds")
-            print(f"   Cost: ${message.total_cost_usd:.4f}")
-            print(f"   Turns: {message.num_turns}")
+        ):
+            run.observe(message)
+            if message.type == "assistant":
+                for content in message.message.content:
+                    if hasattr(content, 'text') and content.text:
+                        print(f"\n{content.text}")
+                    elif hasattr(content, 'name'):
+                        print(f"\n📝 Generating: {content.name}")
+
+            elif message.type == "result":
+                print(f"\n\n✅ Proposal Generation Complete!")
+                print(f"   Duration: {message.duration_ms/1000:.2f} seconds")
+                print(f"   Cost: ${message.total_cost_usd:.4f}")
+                print(f"   Turns: {message.num_turns}")
 
 
 # Specialized proposal modes
@@ -0,0 +1,137 @@
+"""
+Concurrent Campaign Runner
+Runs any set of the lead generation campaigns at once, sharing one tool server and warm data
+
+lead_generation_agent defines four independent campaigns (find_qualified_leads,
+aging_plants_boiler_replacement, facility_type_analysis and
+geographic_wte_market_priority) that used to be run one at a time from its
+__main__ block. run_campaigns() starts them together with asyncio.gather,
+with at most `concurrency` running at once (asyncio.Semaphore). They run in
+one process, so they share the lead tool server (get_mcp_server), the EEA
+store and the dataset registry. warm_cache() opens the EEA store once
+before the first campaign starts. When concurrency covers every
+campaign, a batch takes about as long as its slowest campaign.
+
+Each campaign writes to its own directory, data/campaigns/<batch>/<campaign>/
+(report.md, summary.json and its exports). The batch directory gets
+batch.json with every campaign's status, wall time and cost. A failing
+campaign is recorded there and does not stop the others.
+
+Usage:
+    python run_campaigns.py                      # all four campaigns
+    python run_campaigns.py find_qualified_leads facility_type_analysis --concurrency 2
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+CAMPAIGN_ROOT = Path(__file__).resolve().parent.parent / "data" / "campaigns"
+CAMPAIGN_NAMES = [
+    "find_qualified_leads",
+    "aging_plants_boiler_replacement",
+    "facility_type_analysis",
+    "geographic_wte_market_priority",
+]
+DEFAULT_CONCURRENCY = len(CAMPAIGN_NAMES)
+
+
+def lead_campaigns(names=None):
+    """Campaign name -> coroutine function from lead_generation_agent (imports the agent SDK)"""
+    import lead_generation_agent as agent
+
+    return {name: getattr(agent, name) for name in (names or CAMPAIGN_NAMES)}
+
+
+async def warm_cache():
+    """Open the EEA store once, before the campaigns share it"""
+    import lead_generation_agent as agent
+
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, agent.get_eea_store)
+    except Exception as e:
+        print(f"⚠ Could not warm EEA store: {e}")
+
+
+async def run_campaigns(campaigns, concurrency=DEFAULT_CONCURRENCY, output_root=CAMPAIGN_ROOT, warm=None):
+    """
+    Run campaigns concurrently, each into its own output directory
+
+    Args:
+        campaigns: dict name -> async function accepting output_dir and quiet
+        concurrency: Most campaigns running at the same time
+        output_root: Directory the batch directory is created in
+        warm: Optional async function awaited once before any campaign starts
+
+    Returns:
+        dict: batch_dir, concurrency, wall_s and one result per campaign, in the given order
+
+    Raises:
+        ValueError: concurrency below 1
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    batch_dir = Path(output_root) / datetime.now().strftime("%Y%m%d_%H%M%S")
+    if warm is not None:
+        await warm()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+
+    async def run_one(name, campaign):
+        async with semaphore:
+            print(f"▶ {name} started")
+            campaign_started = time.perf_counter()
+            result, error = None, None
+            try:
+                result = await campaign(output_dir=batch_dir / name, quiet=True)
+            except Exception as e:
+                error = repr(e)
+            wall_s = time.perf_counter() - campaign_started
+
+        status = "failed" if error else "skipped" if result is None else "done"
+        print(f"{'✓' if status == 'done' else '✗'} {name} {status} in {wall_s:.1f}s" + (f": {error}" if error else ""))
+        result = result or {}
+        return {
+            "campaign": name,
+            "status": status,
+            "wall_s": round(wall_s, 3),
+            "cost_usd": result.get("cost_usd"),
+            "turns": result.get("turns"),
+            "output_dir": str(batch_dir / name),
+            "error": error,
+        }
+
+    results = await asyncio.gather(*(run_one(name, campaign) for name, campaign in campaigns.items()))
+    batch = {
+        "batch_dir": str(batch_dir),
+        "concurrency": concurrency,
+        "wall_s": round(time.perf_counter() - started, 3),
+        "campaigns": results,
+    }
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    (batch_dir / "batch.json").write_text(json.dumps(batch, indent=2), encoding="utf-8")
+    return batch
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run lead generation campaigns concurrently")
+    parser.add_argument("campaigns", nargs="*", choices=CAMPAIGN_NAMES, metavar="campaign",
+                        help=f"Campaigns to run (default: all of {', '.join(CAMPAIGN_NAMES)})")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Campaigns running at once")
+    parser.add_argument("--output-root", default=CAMPAIGN_ROOT, help="Directory for the batch outputs")
+    args = parser.parse_args()
+
+    batch = asyncio.run(run_campaigns(lead_campaigns(args.campaigns), concurrency=args.concurrency,
+                                      output_root=args.output_root, warm=warm_cache))
+    print(f"\n=== Batch finished in {batch['wall_s']:.1f}s -> {batch['batch_dir']} ===")
+    for result in batch["campaigns"]:
+        cost = f"${result['cost_usd']:.4f}" if result["cost_usd"] is not None else "-"
+        print(f"   {result['campaign']:<34} {result['status']:<8} {result['wall_s']:>8.1f}s  {cost}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Agent Telemetry
+Per-turn and per-tool spans for the agent pipelines, appended to a local JSONL store
+
+Each pipeline run (find_qualified_leads, evaluate_leads, generate_proposals)
+is wrapped in `telemetry.run(name)`, and every message from query() is
+passed to run.observe(). The run records:
+- one "turn" span per assistant message: wall time since the previous
+  message, the tools it requested and its token usage when the SDK reports it
+- one "tool" span per tool call (tools are wrapped with @traced_tool): wall
+  time, argument and result sizes in bytes, an estimated token count
+  (bytes / 4) and errors
+- one "run" span from the result message: duration, cost, turns and usage
+
+The result message is the only place the SDK reports cost, so cost is
+spread over the run's spans when the run finishes: turns by their share of
+the reported tokens (evenly when there are none), tools by their estimated
+tokens against the run total. Tool costs are therefore estimates of the
+context their inputs and outputs occupied.
+
+Spans go to data/telemetry/spans.jsonl, one JSON object per line.
+
+Usage:
+    async with telemetry.run("find_qualified_leads") as run:
+        async for message in query(...):
+            run.observe(message)
+
+    python telemetry.py summary [--path spans.jsonl] [--top 10]
+"""
+import contextvars
+import functools
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+TELEMETRY_PATH = Path(__file__).resolve().parent.parent / "data" / "telemetry" / "spans.jsonl"
+BYTES_PER_TOKEN = 4
+
+current_run = contextvars.ContextVar("current_run", default=None)
+_active_runs = []  # fallback for tool calls dispatched outside the run's context
+
+
+def _json_size(value):
+    try:
+        return len(json.dumps(value, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(value).encode("utf-8"))
+
+
+def _result_size(result):
+    """Bytes of text an MCP tool result hands back to the model"""
+    if isinstance(result, dict) and isinstance(result.get("content"), list):
+        return sum(len(str(part.get("text", "")).encode("utf-8")) for part in result["content"] if isinstance(part, dict))
+    return _json_size(result)
+
+
+def _usage_tokens(usage):
+    """(input, output) tokens from an SDK usage dict or object; None where not reported"""
+    if usage is None:
+        return None, None
+    get = usage.get if isinstance(usage, dict) else (lambda key: getattr(usage, key, None))
+    input_tokens = sum(get(key) or 0 for key in ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"))
+    output_tokens = get("output_tokens")
+    return (input_tokens or None), output_tokens
+
+
+class RunRecorder:
+    """Spans of one pipeline run, written to the store when the run finishes"""
+
+    def __init__(self, telemetry, pipeline):
+        self.telemetry = telemetry
+        self.pipeline = pipeline
+        self.run_id = uuid.uuid4().hex[:12]
+        self.spans = []
+        self.result = None
+        self._started = self._last = time.perf_counter()
+        self._turn = 0
+        self._lock = threading.Lock()
+
+    def _span(self, kind, name, wall_ms, **fields):
+        span = {
+            "run_id": self.run_id,
+            "pipeline": self.pipeline,
+            "kind": kind,
+            "name": name,
+            "turn": self._turn,
+            "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "wall_ms": round(wall_ms, 3),
+            **fields,
+        }
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def observe(self, message):
+        """Record a turn span per assistant message and the run span from the result message"""
+        now = time.perf_counter()
+        kind = getattr(message, "type", None)
+        if kind == "assistant":
+            self._turn += 1
+            body = getattr(message, "message", message)
+            tools = [c.name for c in getattr(body, "content", None) or [] if getattr(c, "name", None)]
+            input_tokens, output_tokens = _usage_tokens(getattr(body, "usage", None))
+            self._span("turn", f"turn {self._turn}", (now - self._last) * 1000, tool_calls=tools,
+                       input_tokens=input_tokens, output_tokens=output_tokens)
+        elif kind == "result":
+            self.result = message
+        self._last = now
+
+    def record_tool(self, name, wall_ms, args, result, error=None):
+        arg_bytes = _json_size(args)
+        result_bytes = _result_size(result) if result is not None else 0
+        return self._span("tool", name, wall_ms, arg_bytes=arg_bytes, result_bytes=result_bytes,
+                          est_tokens=(arg_bytes + result_bytes) // BYTES_PER_TOKEN, error=error)
+
+    def finish(self, error=None):
+        """Allocate the reported cost over the spans, add the run span and write everything"""
+        wall_ms = (time.perf_counter() - self._started) * 1000
+        result = self.result
+        cost = getattr(result, "total_cost_usd", None)
+        input_tokens, output_tokens = _usage_tokens(getattr(result, "usage", None))
+
+        turns = [s for s in self.spans if s["kind"] == "turn"]
+        tools = [s for s in self.spans if s["kind"] == "tool"]
+        turn_tokens = [(s["input_tokens"] or 0) + (s["output_tokens"] or 0) for s in turns]
+        run_tokens = (input_tokens or 0) + (output_tokens or 0) or sum(turn_tokens) or None
+        if cost is not None:
+            for span, tokens in zip(turns, turn_tokens):
+                share = tokens / sum(turn_tokens) if sum(turn_tokens) else 1 / len(turns)
+                span["cost_usd"] = cost * share
+            for span in tools:
+                span["cost_usd"] = cost * min(1.0, span["est_tokens"] / run_tokens) if run_tokens else None
+
+        self._span("run", self.pipeline, getattr(result, "duration_ms", None) or wall_ms,
+                   num_turns=getattr(result, "num_turns", None) or self._turn,
+                   input_tokens=input_tokens, output_tokens=output_tokens, cost_usd=cost, error=error)
+        self.telemetry.write(self.spans)
+
+
+class _RunContext:
+    def __init__(self, telemetry, pipeline):
+        self.recorder = RunRecorder(telemetry, pipeline)
+        self._token = None
+
+    def __enter__(self):
+        self._token = current_run.set(self.recorder)
+        _active_runs.append(self.recorder)
+        return self.recorder
+
+    def __exit__(self, exc_type, exc, tb):
+        current_run.reset(self._token)
+        _active_runs.remove(self.recorder)
+        self.recorder.finish(error=repr(exc) if exc else None)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+class Telemetry:
+    """JSONL span store"""
+
+    def __init__(self, path=TELEMETRY_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def run(self, pipeline):
+        """Context manager (sync or async) recording one pipeline run"""
+        return _RunContext(self, pipeline)
+
+    def write(self, spans):
+        if not spans:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps(span, default=str) + "\n" for span in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def read(self):
+        """All spans as a DataFrame (empty when nothing was recorded)"""
+        import pandas as pd
+
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return pd.DataFrame()
+        return pd.read_json(self.path, lines=True)
+
+    def summary(self, top=10):
+        """
+        Tools ranked by wall time and by cost across all recorded runs
+
+        Returns:
+            dict: "slowest" and "most_expensive" DataFrames (one row per tool) and "runs"
+                (one row per pipeline)
+        """
+        spans = self.read()
+        if spans.empty:
+            return {}
+        tools = spans[spans["kind"] == "tool"]
+        for column in ("cost_usd", "error", "est_tokens", "result_bytes"):
+            if column not in tools.columns:
+                tools = tools.assign(**{column: None})
+        per_tool = tools.groupby("name").agg(
+            calls=("wall_ms", "size"),
+            total_ms=("wall_ms", "sum"),
+            mean_ms=("wall_ms", "mean"),
+            p95_ms=("wall_ms", lambda s: s.quantile(0.95)),
+            result_kb=("result_bytes", lambda s: s.sum() / 1024),
+            est_tokens=("est_tokens", "sum"),
+            cost_usd=("cost_usd", lambda s: s.sum(min_count=1)),
+            errors=("error", lambda s: int(s.notna().sum())),
+        )
+        runs = spans[spans["kind"] == "run"]
+        if "cost_usd" not in runs.columns:
+            runs = runs.assign(cost_usd=None)
+        per_pipeline = runs.groupby("name").agg(
+            runs=("run_id", "nunique"),
+            mean_s=("wall_ms", lambda s: s.mean() / 1000),
+            total_cost_usd=("cost_usd", lambda s: s.sum(min_count=1)),
+        )
+        return {
+            "slowest": per_tool.sort_values("total_ms", ascending=False).head(top),
+            "most_expensive": per_tool.sort_values("cost_usd", ascending=False, na_position="last").head(top),
+            "runs": per_pipeline,
+        }
+
+
+telemetry = Telemetry()
+
+
+def traced_tool(func):
+    """
+    Record a tool span (wall time, argument / result size, errors) for every call
+
+    Apply below @tool so the SDK registers the traced function:
+
+        @tool(name="score_lead", ...)
+        @traced_tool
+        async def score_lead(args, extra): ...
+    """
+    @functools.wraps(func)
+    async def wrapper(args, *rest, **kwargs):
+        run = current_run.get() or (_active_runs[0] if len(_active_runs) == 1 else None)
+        started = time.perf_counter()
+        result, error = None, None
+        try:
+            result = await func(args, *rest, **kwargs)
+            return result
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            if run is not None:
+                run.record_tool(func.__name__, (time.perf_counter() - started) * 1000, args, result, error)
+    return wrapper
+
+
+def main():
+    import argparse
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Agent telemetry: rank tools by latency and cost across runs")
+    parser.add_argument("command", choices=["summary"], help="summary: slowest and most expensive tools")
+    parser.add_argument("--path", default=TELEMETRY_PATH, help="Span store (JSONL)")
+    parser.add_argument("--top", type=int, default=10, help="Tools per ranking")
+    args = parser.parse_args()
+
+    summary = Telemetry(args.path).summary(top=args.top)
+    if not summary:
+        print(f"No spans recorded in {args.path}")
+        return
+    with pd.option_context("display.width", 160, "display.max_columns", 20, "display.float_format", "{:,.4f}".format):
+        print("\n=== Pipelines ===")
+        print(summary["runs"].to_string())
+        print(f"\n=== Slowest tools (total wall time, top {args.top}) ===")
+        print(summary["slowest"].to_string())
+        print(f"\n=== Most expensive tools (estimated cost, top {args.top}) ===")
+        print(summary["most_expensive"].to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Global WtE Market Data - lazy, cached, event-loop friendly loading
+
+The three "Global WtE market 2024-2033" CSVs in data/market/ are parsed at
+most once per content: the parsed table is kept as parquet in
+data/market/.cache/ next to a small manifest (source mtime, size, SHA-1).
+A cached table is used while the source mtime and size are unchanged; if
+they changed, the SHA-1 decides (a touched but identical file keeps its
+cache).
+
+Async callers (the agent tools) get tables through MarketData.get(),
+which runs the blocking read in the default executor. Each table is loaded
+on first use only, and concurrent calls for the same table share one
+in-flight load.
+
+Usage:
+    market = MarketData()
+    plants = await market.get("active_plants")
+    tables = await market.get_all()
+"""
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+MARKET_DIR = Path(__file__).resolve().parent.parent / "data" / "market"
+CACHE_DIRNAME = ".cache"
+
+WTE_MARKET_FILES = {
+    "active_plants": "Active Plants Global WtE market 2024-2033.csv",
+    "market_outlook": "Market outlook Global WtE market 2024-2033.csv",
+    "projects": "Projects Global WtE market 2024-2033.csv",
+}
+
+
+def file_sha1(path, chunk_bytes=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MarketData:
+    """Lazy loader for the global WtE market tables with a parquet cache"""
+
+    def __init__(self, data_dir=MARKET_DIR, cache_dir=None, files=None):
+        self.data_dir = Path(data_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.data_dir / CACHE_DIRNAME
+        self.files = dict(files or WTE_MARKET_FILES)
+        self._tables = {}
+        self._inflight = {}
+
+    # ── Blocking load (runs in the executor) ─────────────────
+
+    def load_table(self, key):
+        """
+        Parsed table for key, from the cache when the source is unchanged
+
+        Raises:
+            KeyError: Unknown table key
+            FileNotFoundError: Source CSV missing
+        """
+        source = self.data_dir / self.files[key]
+        stat = source.stat()
+        manifest_path = self.cache_dir / f"{key}.json"
+        cached = self.cache_dir / f"{key}.parquet"
+
+        manifest = None
+        if manifest_path.exists() and cached.exists():
+            manifest = json.loads(manifest_path.read_text())
+            if manifest.get("source") != source.name:
+                manifest = None
+        if manifest and (manifest["mtime_ns"], manifest["size"]) == (stat.st_mtime_ns, stat.st_size):
+            return pd.read_parquet(cached)
+
+        sha1 = file_sha1(source)
+        if manifest and manifest["sha1"] == sha1:
+            self._write_manifest(manifest_path, source, stat, sha1)  # touched, same content
+            return pd.read_parquet(cached)
+
+        df = self._parse(source)
+        self._store(key, df, source, stat, sha1)
+        return df
+
+    def _parse(self, source):
+        return pd.read_csv(source, encoding="utf-8-sig")
+
+    def _write_manifest(self, manifest_path, source, stat, sha1):
+        manifest = {"source": source.name, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": sha1}
+        tmp = manifest_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, manifest_path)
+
+    def _store(self, key, df, source, stat, sha1):
+        """Write the parquet cache; without pyarrow (or for unconvertible columns) just skip caching"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_dir / f"{key}.parquet.tmp"
+        try:
+            df.to_parquet(tmp)
+        except (ImportError, ValueError, TypeError) as e:
+            print(f"⚠ Not caching {source.name}: {e}")
+            tmp.unlink(missing_ok=True)
+            return
+        os.replace(tmp, self.cache_dir / f"{key}.parquet")
+        self._write_manifest(self.cache_dir / f"{key}.json", source, stat, sha1)
+
+    # ── Async access ─────────────────────────────────────────
+
+    async def get(self, key):
+        """Table for key, loaded in the executor on first use; concurrent callers share the load"""
+        if key in self._tables:
+            return self._tables[key]
+        if key not in self._inflight:
+            loop = asyncio.get_running_loop()
+            self._inflight[key] = loop.run_in_executor(None, self.load_table, key)
+        future = self._inflight[key]
+        try:
+            df = await asyncio.shield(future)
+        finally:
+            if future.done() and self._inflight.get(key) is future:
+                del self._inflight[key]  # a failed load is retried by the next call
+        self._tables[key] = df
+        return df
+
+    async def get_all(self, keys=None):
+        """
+        All available tables (missing files are reported and skipped)
+
+        Returns:
+            dict: key -> DataFrame
+        """
+        keys = list(keys or self.files)
+        results = await asyncio.gather(*(self.get(key) for key in keys), return_exceptions=True)
+        tables = {}
+        for key, result in zip(keys, results):
+            if isinstance(result, FileNotFoundError):
+                print(f"⚠ File not found: {self.files[key]}")
+            elif isinstance(result, Exception):
+                print(f"⚠ Error loading {self.files[key]}: {result}")
+            else:
+                tables[key] = result
+        return tables
@@ -20,6 +20,7 @@ from claude_agent_sdk import query, tool, create_sdk_mcp_server, ClaudeAgentOpti
 
 # IMPORT EU COMPLIANCE CHECKER
 from emission_compliance_checker import EmissionComplianceChecker, ComplianceStatus, RegulatoryUrgency
+from facility_index import GroupedIndex
 
 # Initialize compliance checker
 compliance_checker = EmissionComplianceChecker()
@@ -155,6 +156,9 @@ async def query_database(args, extra):
     # Limit to first 50 facilities for performance
     merged = merged.head(50)
 
+    # Group pollutant releases by facility once (O(1) per-facility lookups below)
+    releases_by_facility = GroupedIndex(pollutant_releases_df, 'Parent_Facility_INSPIRE_ID')
+
     # Process each facility with COMPLIANCE CHECKING
     results = []
     print(f"🔍 Checking {len(merged)} facilities against EU emission standards...")
@@ -163,9 +167,7 @@ async def query_database(args, extra):
         facility_id = row.get('Facility_INSPIRE_ID')
 
         # Get pollutant data for this facility
-        facility_pollutants = pollutant_releases_df[
-            pollutant_releases_df['Parent_Facility_INSPIRE_ID'] == facility_id
-        ]
+        facility_pollutants = releases_by_facility.rows(facility_id)
 
         # Prepare facility data
         facility_data = {
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Table-Driven BAT-AEL Rules for the Compliance Checker
+One declarative table of emission limits, compiled to NumPy threshold arrays
+
+Every limit is one row keyed on pollutant x activity class x effective date.
+Adding a BREF means adding rows (and a name pattern in ACTIVITY_CLASSES),
+never a new code path: CompiledRules turns the table into
+(activity class x pollutant) arrays so a whole release table is checked with
+one integer-indexed gather.
+
+Limits are daily averages in mg/Nm³ from the BAT conclusions of each BREF
+(upper end of the BAT-AEL range where a range is given).
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+# Activity classes: (code, description, mainActivityName pattern), first match wins.
+# Facilities matching none are checked against the large combustion plant rules.
+ACTIVITY_CLASSES: List[Tuple[str, str, str]] = [
+    ('WI', 'Waste incineration', r'incineration|waste'),
+    ('PP', 'Pulp and paper', r'pulp|paper|board'),
+    ('CLM', 'Cement, lime and magnesium oxide', r'cement|lime|magnesium oxide'),
+    ('GLS', 'Glass and mineral fibres', r'glass|mineral fibre'),
+    ('IS', 'Iron and steel', r'pig iron|steel|sinter|coke'),
+    ('LCP', 'Large combustion plants', r''),
+]
+DEFAULT_CLASS = 'LCP'
+
+RULE_COLUMNS = ['pollutant', 'activity_class', 'limit_value', 'unit', 'effective_date', 'standard_name']
+
+# pollutant, class, limit, unit, effective date, standard
+BAT_AEL_RULES = [
+    # Waste incineration (IED BAT conclusions, as used since the first checker release)
+    ("NOx", "WI", 200, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Waste Incineration"),
+    ("SO2", "WI", 50, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Waste Incineration"),
+    ("HCl", "WI", 10, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Waste Incineration"),
+    ("HF", "WI", 1, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Waste Incineration"),
+    ("CO", "WI", 50, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Waste Incineration"),
+    ("Total_Dust", "WI", 10, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Waste Incineration"),
+    ("TOC", "WI", 10, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Waste Incineration"),
+    ("Cd_Tl", "WI", 0.05, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Waste Incineration"),  # Cd + Tl combined
+    ("Hg", "WI", 0.05, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Waste Incineration"),
+    ("Heavy_Metals", "WI", 0.5, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Waste Incineration"),  # Sb+As+Pb+Cr+Co+Cu+Mn+Ni+V
+
+    # Large combustion plants >50 MW (solid biomass)
+    ("NOx", "LCP", 100, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Large Combustion Plant"),
+    ("SO2", "LCP", 150, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Large Combustion Plant"),
+    ("Total_Dust", "LCP", 10, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Large Combustion Plant"),
+    ("CO", "LCP", 100, "mg/Nm³", date(2016, 8, 2), "BAT-AEL Large Combustion Plant"),
+
+    # Pulp and paper (2014/687/EU, recovery boiler / lime kiln)
+    ("NOx", "PP", 200, "mg/Nm³", date(2018, 9, 30), "BAT-AEL Pulp and Paper"),
+    ("SO2", "PP", 50, "mg/Nm³", date(2018, 9, 30), "BAT-AEL Pulp and Paper"),
+    ("Total_Dust", "PP", 40, "mg/Nm³", date(2018, 9, 30), "BAT-AEL Pulp and Paper"),
+
+    # Cement, lime and magnesium oxide (2013/163/EU, kiln firing)
+    ("NOx", "CLM", 450, "mg/Nm³", date(2017, 4, 9), "BAT-AEL Cement, Lime and Magnesium Oxide"),
+    ("SO2", "CLM", 400, "mg/Nm³", date(2017, 4, 9), "BAT-AEL Cement, Lime and Magnesium Oxide"),
+    ("Total_Dust", "CLM", 20, "mg/Nm³", date(2017, 4, 9), "BAT-AEL Cement, Lime and Magnesium Oxide"),
+    ("HCl", "CLM", 10, "mg/Nm³", date(2017, 4, 9), "BAT-AEL Cement, Lime and Magnesium Oxide"),
+    ("HF", "CLM", 1, "mg/Nm³", date(2017, 4, 9), "BAT-AEL Cement, Lime and Magnesium Oxide"),
+    ("Hg", "CLM", 0.05, "mg/Nm³", date(2017, 4, 9), "BAT-AEL Cement, Lime and Magnesium Oxide"),
+
+    # Glass (2012/134/EU, melting furnaces)
+    ("NOx", "GLS", 800, "mg/Nm³", date(2016, 3, 8), "BAT-AEL Glass Manufacturing"),
+    ("SO2", "GLS", 500, "mg/Nm³", date(2016, 3, 8), "BAT-AEL Glass Manufacturing"),
+    ("Total_Dust", "GLS", 20, "mg/Nm³", date(2016, 3, 8), "BAT-AEL Glass Manufacturing"),
+    ("HCl", "GLS", 20, "mg/Nm³", date(2016, 3, 8), "BAT-AEL Glass Manufacturing"),
+    ("HF", "GLS", 5, "mg/Nm³", date(2016, 3, 8), "BAT-AEL Glass Manufacturing"),
+
+    # Iron and steel (2012/135/EU, sinter plants)
+    ("NOx", "IS", 500, "mg/Nm³", date(2016, 3, 8), "BAT-AEL Iron and Steel"),
+    ("SO2", "IS", 500, "mg/Nm³", date(2016, 3, 8), "BAT-AEL Iron and Steel"),
+    ("Total_Dust", "IS", 20, "mg/Nm³", date(2016, 3, 8), "BAT-AEL Iron and Steel"),
+    ("Hg", "IS", 0.05, "mg/Nm³", date(2016, 3, 8), "BAT-AEL Iron and Steel"),
+]
+
+
+def rules_frame() -> pd.DataFrame:
+    """The rules table as a DataFrame (one row per limit)"""
+    return pd.DataFrame(BAT_AEL_RULES, columns=RULE_COLUMNS)
+
+
+def classify_activities(activity_names: pd.Series) -> np.ndarray:
+    """
+    Activity class code for every mainActivityName in one vectorised pass
+
+    Returns:
+        Object array of class codes (DEFAULT_CLASS where no pattern matches)
+    """
+    names = activity_names.fillna('').astype(str).str.lower()
+    patterns = [(code, pattern) for code, _, pattern in ACTIVITY_CLASSES if pattern]
+    conditions = [names.str.contains(pattern, regex=True).to_numpy() for _, pattern in patterns]
+    return np.select(conditions, [code for code, _ in patterns], default=DEFAULT_CLASS).astype(object)
+
+
+def classify_activity(activity_name: Optional[str]) -> str:
+    """Activity class code for a single mainActivityName"""
+    name = activity_name.lower() if isinstance(activity_name, str) else ''
+    for code, _, pattern in ACTIVITY_CLASSES:
+        if pattern and re.search(pattern, name):
+            return code
+    return DEFAULT_CLASS
+
+
+@dataclass(frozen=True)
+class CompiledRules:
+    """
+    Rules in force on a given date as (activity class x pollutant) arrays
+
+    For each (class, pollutant) the rule in force is the latest one whose
+    effective date has passed, or the earliest upcoming one if none has
+    (so deadlines still count down). Cells without a rule are NaN.
+    """
+    as_of: date
+    classes: Tuple[str, ...]
+    pollutants: Tuple[str, ...]
+    limit_value: np.ndarray  # float64 [class, pollutant]
+    effective_ordinal: np.ndarray  # int64 [class, pollutant], date.toordinal(); -1 = no rule
+    unit: np.ndarray  # object [class, pollutant]
+    standard_name: np.ndarray  # object [class, pollutant]
+
+    def class_codes(self, activity_classes) -> np.ndarray:
+        """Integer row index for activity class codes"""
+        lookup = {c: i for i, c in enumerate(self.classes)}
+        default = lookup[DEFAULT_CLASS]
+        return np.array([lookup.get(c, default) for c in activity_classes], dtype=np.intp)
+
+    def pollutant_codes(self, pollutants) -> np.ndarray:
+        """Integer column index for standard pollutant names (-1 = no rule for any class)"""
+        codes = pd.Index(self.pollutants).get_indexer(pd.Index(pollutants, dtype=object))
+        return codes.astype(np.intp)
+
+    def lookup(self, class_codes: np.ndarray, pollutant_codes: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Gather every rule attribute for paired (class, pollutant) codes in one broadcast
+
+        Returns:
+            Dict of arrays aligned with the inputs; 'applicable' is False where
+            no rule exists for the pair
+        """
+        has_pollutant = pollutant_codes >= 0
+        cols = np.where(has_pollutant, pollutant_codes, 0)
+        applicable = has_pollutant & (self.effective_ordinal[class_codes, cols] >= 0)
+        return {
+            'applicable': applicable,
+            'limit_value': np.where(applicable, self.limit_value[class_codes, cols], np.nan),
+            'effective_ordinal': np.where(applicable, self.effective_ordinal[class_codes, cols], -1),
+            'unit': np.where(applicable, self.unit[class_codes, cols], None),
+            'standard_name': np.where(applicable, self.standard_name[class_codes, cols], None),
+        }
+
+    def standards_for(self, activity_class: str) -> Dict[str, Tuple[float, str, date, str]]:
+        """(limit, unit, effective date, standard name) per pollutant for one class"""
+        row = self.classes.index(activity_class)
+        out = {}
+        for col, pollutant in enumerate(self.pollutants):
+            if self.effective_ordinal[row, col] < 0:
+                continue
+            out[pollutant] = (
+                float(self.limit_value[row, col]),
+                self.unit[row, col],
+                date.fromordinal(int(self.effective_ordinal[row, col])),
+                self.standard_name[row, col],
+            )
+        return out
+
+
+def compile_rules(rules: Optional[pd.DataFrame] = None, as_of: Optional[date] = None) -> CompiledRules:
+    """
+    Compile a rules table into threshold arrays
+
+    Args:
+        rules: Rules in RULE_COLUMNS layout (default: BAT_AEL_RULES)
+        as_of: Date used to pick the rule in force (default: today)
+    """
+    rules = rules_frame() if rules is None else rules.copy()
+    as_of = as_of or date.today()
+
+    classes = tuple(code for code, _, _ in ACTIVITY_CLASSES)
+    pollutants = tuple(pd.unique(rules['pollutant']))
+    rules['effective_ordinal'] = [d.toordinal() for d in rules['effective_date']]
+    rules['in_force'] = rules['effective_ordinal'] <= as_of.toordinal()
+
+    # In force: latest passed date first; otherwise earliest upcoming date
+    rules['sort_key'] = np.where(rules['in_force'], -rules['effective_ordinal'], rules['effective_ordinal'])
+    chosen = (
+        rules.sort_values(['in_force', 'sort_key'], ascending=[False, True], kind='stable')
+        .drop_duplicates(['activity_class', 'pollutant'])
+    )
+
+    shape = (len(classes), len(pollutants))
+    limit_value = np.full(shape, np.nan)
+    effective_ordinal = np.full(shape, -1, dtype=np.int64)
+    unit = np.full(shape, None, dtype=object)
+    standard_name = np.full(shape, None, dtype=object)
+
+    rows = pd.Index(classes).get_indexer(chosen['activity_class'])
+    cols = pd.Index(pollutants).get_indexer(chosen['pollutant'])
+    if (rows < 0).any():
+        unknown = sorted(set(chosen['activity_class'][rows < 0]))
+        raise ValueError(f"Rules reference unknown activity class(es): {unknown}")
+
+    limit_value[rows, cols] = chosen['limit_value'].to_numpy(dtype='float64')
+    effective_ordinal[rows, cols] = chosen['effective_ordinal'].to_numpy()
+    unit[rows, cols] = chosen['unit'].to_numpy()
+    standard_name[rows, cols] = chosen['standard_name'].to_numpy()
+
+    return CompiledRules(as_of, classes, pollutants, limit_value,
+                         effective_ordinal, unit, standard_name)
+
+
+@lru_cache(maxsize=None)
+def default_rules(as_of: date) -> CompiledRules:
+    """Compiled BAT_AEL_RULES (cached per as-of date)"""
+    return compile_rules(as_of=as_of)
+
+
+def class_limits(activity_class: str) -> Dict[str, float]:
+    """Limit per pollutant for one class, in the layout of the original hard-coded dicts"""
+    return {pollutant: limit for pollutant, klass, limit, *_ in BAT_AEL_RULES if klass == activity_class}
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Persistent Compliance Result Cache
+Skips re-checking facilities whose emission rows and standards have not changed
+
+Detected violations are stored in SQLite keyed by
+(facility key, reporting year, input hash, standards version):
+- input hash: the facility's checker inputs (activity, energy input, fuel,
+  flue-gas volume) plus an order-independent hash of its release rows
+- standards version: EmissionComplianceChecker.standards_version(), i.e. the
+  rules in force, pollutant mapping and estimator constants
+
+Only the date-independent detection step is cached; deadlines, urgency,
+scores and reason text are recomputed on every run, so cached results never
+go stale as deadlines approach.
+
+Usage:
+    cache = ComplianceCache("compliance_cache.db")
+    results = checker.check_many(facilities, releases, cache=cache, year=2023)
+    print(cache.format_stats())
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from quantity_units import normalise_quantities, CANONICAL_T
+
+FACILITY_INPUT_COLUMNS = ['mainActivityName', 'energyInputTJ', 'fuelInput', 'flueGasNm3']
+RELEASE_INPUT_COLUMNS = ['pollutantName', CANONICAL_T]
+ALL_YEARS = -1  # reporting_year stored when the caller passes year=None
+
+_ENTRY_KEY = ['facility_key', 'input_hash']
+_CACHED_FIELDS = ['pollutant', 'actual_value', 'estimated_concentration', 'limit_value',
+                  'excess_percentage', 'standard_violated', 'effective_ordinal']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS compliance_entries (
+    facility_key TEXT NOT NULL,
+    reporting_year INTEGER NOT NULL,
+    input_hash TEXT NOT NULL,
+    rules_version TEXT NOT NULL,
+    n_emission_rows INTEGER NOT NULL,
+    PRIMARY KEY (facility_key, reporting_year, input_hash, rules_version)
+);
+CREATE TABLE IF NOT EXISTS compliance_violations (
+    facility_key TEXT NOT NULL,
+    reporting_year INTEGER NOT NULL,
+    input_hash TEXT NOT NULL,
+    rules_version TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    pollutant TEXT,
+    actual_value REAL,
+    estimated_concentration REAL,
+    limit_value REAL,
+    excess_percentage REAL,
+    standard_violated TEXT,
+    effective_ordinal INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_compliance_violations_year
+    ON compliance_violations (reporting_year, rules_version);
+"""
+
+
+def _hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """uint64 hash per row (column names included, index ignored)"""
+    if df.shape[1] == 0:
+        return np.zeros(len(df), dtype=np.uint64)
+    row_hash = pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+    names_hash = pd.util.hash_array(np.array(['|'.join(map(str, df.columns))], dtype=object))[0]
+    return row_hash ^ names_hash
+
+
+def input_hashes(
+    facilities: pd.DataFrame,
+    releases: pd.DataFrame,
+    facility_key: str = 'Facility_INSPIRE_ID'
+) -> np.ndarray:
+    """
+    Hash of everything the checker reads for each facility row
+
+    Release rows are combined with a wrapping uint64 sum, so the hash does not
+    depend on row order but does change when any row is added, removed or edited.
+
+    Returns:
+        Array of 16-character hex strings aligned with facilities
+    """
+    facility_hash = _hash_rows(facilities[[c for c in FACILITY_INPUT_COLUMNS if c in facilities.columns]])
+
+    releases = normalise_quantities(releases)
+    release_hash = _hash_rows(releases[[c for c in RELEASE_INPUT_COLUMNS if c in releases.columns]])
+    codes = pd.Index(pd.unique(facilities[facility_key])).get_indexer(releases[facility_key])
+    valid = codes >= 0
+    n_keys = len(pd.unique(facilities[facility_key]))
+    sums = np.zeros(n_keys, dtype=np.uint64)
+    counts = np.zeros(n_keys, dtype=np.uint64)
+    np.add.at(sums, codes[valid], release_hash[valid])
+    np.add.at(counts, codes[valid], np.uint64(1))
+
+    row_codes = pd.Index(pd.unique(facilities[facility_key])).get_indexer(facilities[facility_key])
+    with np.errstate(over='ignore'):
+        combined = facility_hash ^ (sums[row_codes] * np.uint64(0x9E3779B97F4A7C15)) ^ counts[row_codes]
+    return np.array([f"{h:016x}" for h in combined.tolist()], dtype=object)
+
+
+class ComplianceCache:
+    """
+    SQLite-backed cache of detected violations with hit/miss statistics
+
+    One cache file per analysis directory; not safe for concurrent writers.
+    """
+
+    def __init__(self, path: Union[str, Path] = "compliance_cache.db"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ── Lookup / store ───────────────────────────────────────
+
+    def detect_violations(
+        self,
+        checker,
+        facilities: pd.DataFrame,
+        releases: pd.DataFrame,
+        facility_key: str = 'Facility_INSPIRE_ID',
+        year: Optional[int] = None
+    ) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Cached equivalent of checker.detect_violations()
+
+        Facility rows whose (key, year, input hash, standards version) is in
+        the cache are served from it; all others are detected in one batch
+        call and stored.
+        """
+        n = len(facilities)
+        year = ALL_YEARS if year is None else int(year)
+        version = checker.standards_version()
+        self._drop_other_versions(year, version)
+
+        lookup = pd.DataFrame({
+            'facility_key': facilities[facility_key].astype(str).to_numpy(),
+            'input_hash': input_hashes(facilities, releases, facility_key),
+            'row': np.arange(n),
+        })
+        entries = pd.read_sql_query(
+            'SELECT facility_key, input_hash, n_emission_rows FROM compliance_entries '
+            'WHERE reporting_year = ? AND rules_version = ?',
+            self.conn, params=(year, version)
+        )
+        lookup = lookup.merge(entries, on=_ENTRY_KEY, how='left', validate='many_to_one').sort_values('row')
+        hit = lookup['n_emission_rows'].notna().to_numpy()
+        self.hits += int(hit.sum())
+        self.misses += int((~hit).sum())
+
+        release_row_counts = np.zeros(n, dtype=np.int64)
+        release_row_counts[hit] = lookup['n_emission_rows'].to_numpy()[hit]
+        parts = [self._cached_violations(lookup[hit], year, version)]
+
+        miss_rows = np.flatnonzero(~hit)
+        if len(miss_rows):
+            missed = facilities.iloc[miss_rows]
+            missed_releases = releases[releases[facility_key].isin(pd.unique(missed[facility_key]))]
+            detected, counts = checker.detect_violations(missed, missed_releases, facility_key)
+            detected['row'] = miss_rows[detected['row'].to_numpy()]
+            release_row_counts[miss_rows] = counts
+            self._store(lookup.iloc[miss_rows], detected, release_row_counts, year, version)
+            parts.append(detected)
+
+        violations = pd.concat(parts, ignore_index=True)
+        violations = violations.sort_values('row', kind='stable').reset_index(drop=True)
+        return violations[['row'] + _CACHED_FIELDS], release_row_counts
+
+    def _cached_violations(self, hits: pd.DataFrame, year: int, version: str) -> pd.DataFrame:
+        stored = pd.read_sql_query(
+            'SELECT * FROM compliance_violations WHERE reporting_year = ? AND rules_version = ?',
+            self.conn, params=(year, version)
+        )
+        found = hits[_ENTRY_KEY + ['row']].merge(stored, on=_ENTRY_KEY, how='inner')
+        found = found.sort_values(['row', 'seq'], kind='stable')
+        return found[['row'] + _CACHED_FIELDS]
+
+    def _store(
+        self,
+        missed: pd.DataFrame,
+        detected: pd.DataFrame,
+        release_row_counts: np.ndarray,
+        year: int,
+        version: str
+    ) -> None:
+        # Rows sharing (key, inputs) produce identical results: store each once
+        missed = missed.drop_duplicates(_ENTRY_KEY)
+        detected = detected[detected['row'].isin(missed['row'])].merge(missed[_ENTRY_KEY + ['row']], on='row')
+        detected['seq'] = detected.groupby('row').cumcount()
+
+        entries = [
+            (key, year, input_hash, version, int(release_row_counts[row]))
+            for key, input_hash, row in missed[_ENTRY_KEY + ['row']].itertuples(index=False, name=None)
+        ]
+        violations = [
+            (key, year, input_hash, version, int(seq), *fields)
+            for key, input_hash, seq, *fields in detected[_ENTRY_KEY + ['seq'] + _CACHED_FIELDS]
+            .astype(object).itertuples(index=False, name=None)
+        ]
+        with self.conn:
+            self.conn.executemany(
+                'DELETE FROM compliance_violations WHERE facility_key = ? AND reporting_year = ? '
+                'AND input_hash = ? AND rules_version = ?',
+                [e[:4] for e in entries]
+            )
+            self.conn.executemany('INSERT OR REPLACE INTO compliance_entries VALUES (?, ?, ?, ?, ?)', entries)
+            self.conn.executemany(
+                f'INSERT INTO compliance_violations VALUES ({", ".join(["?"] * 12)})', violations
+            )
+
+    def _drop_other_versions(self, year: int, version: str) -> None:
+        """Entries for superseded standards can never hit again"""
+        with self.conn:
+            for table in ('compliance_entries', 'compliance_violations'):
+                self.conn.execute(
+                    f'DELETE FROM {table} WHERE reporting_year = ? AND rules_version != ?', (year, version)
+                )
+
+    # ── Metrics ──────────────────────────────────────────────
+
+    def stats(self) -> Dict[str, float]:
+        """Hits, misses and hit rate for this session, plus stored entry count"""
+        total = self.hits + self.misses
+        entries = self.conn.execute('SELECT COUNT(*) FROM compliance_entries').fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': entries,
+        }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (f"Compliance cache: {s['hits']:,} hits, {s['misses']:,} misses "
+                f"({s['hit_rate']:.1%} hit rate), {s['entries']:,} entries in {self.path}")
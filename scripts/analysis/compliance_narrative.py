@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Compliance Narrative Renderer
+Turns structured violation records into sales-facing reason text on demand
+
+EmissionComplianceChecker only produces compact records (category codes,
+floats, enum values); nothing in this module runs while facilities are
+checked or scored. Text is rendered for the rows that are actually
+exported or shown, via EmissionComplianceChecker.render_reasons().
+
+A violation record is any object with the attributes pollutant,
+actual_value, estimated_concentration, limit_value, excess_percentage,
+standard_violated and days_to_deadline: a ComplianceViolation or a row of
+the violations frame from itertuples().
+"""
+
+from typing import Mapping, Sequence
+import pandas as pd
+
+
+COMPLIANT_REASON = "COMPLIANT - All emissions within EU BAT-AEL limits. Potential for proactive efficiency upgrades."
+
+# ComplianceStatus value -> headline label
+STATUS_LABELS = {
+    "CRITICAL_VIOLATION": "CRITICAL VIOLATION",
+    "IMMINENT_VIOLATION": "IMMINENT VIOLATION",
+    "AT_RISK": "AT RISK",
+}
+
+# Facility size bonus (points) -> label
+SIZE_LABELS = {
+    20: "LARGE FACILITY",
+    10: "MEDIUM FACILITY",
+    0: "SMALL FACILITY",
+}
+
+
+def penalty_risk(pollutant: str, excess_pct: float, country: str = 'EU') -> str:
+    """Financial penalty risk for one violation"""
+    if pollutant == "CO2":
+        # CO₂ penalties: EUR 95 per g/km per vehicle
+        return f"EUR 95/g/km excess emissions penalty. For fleet of 10,000 vehicles at {excess_pct:.0f}% excess = potential EUR {(95 * excess_pct * 10000 / 100):,.0f} annual penalty"
+    # Industrial emissions penalties vary by country
+    if excess_pct > 50:
+        return f"SEVERE: Potential facility shutdown orders, operating permit suspension, fines up to EUR 500,000+ in {country}"
+    elif excess_pct > 20:
+        return f"HIGH: Enforcement action likely, fines EUR 50,000-250,000 in {country}, mandatory improvement plan"
+    else:
+        return f"MODERATE: Warning notices, compliance improvement plan required within 90 days"
+
+
+def solution_opportunity(pollutant: str, activity_name: str = '') -> str:
+    """GMAB solution for one violated pollutant"""
+    facility_type = activity_name.lower() if isinstance(activity_name, str) else ''
+
+    if pollutant == "NOx":
+        return "GMAB SCR (Selective Catalytic Reduction) system + Advanced combustion optimization = 70-90% NOx reduction. Proven in 50+ WtE installations. Typical ROI: 2-3 years."
+    elif pollutant == "SO2":
+        return "GMAB Flue Gas Desulfurization (FGD) system + Dry sorbent injection = 95%+ SO₂ removal. Modular retrofit design for minimal downtime."
+    elif pollutant == "CO2":
+        if 'waste' in facility_type or 'incineration' in facility_type:
+            return "GMAB Waste Heat Recovery + ORC (Organic Rankine Cycle) turbine = 15-25% efficiency improvement, reducing CO₂ intensity by up to 30%"
+        else:
+            return "GMAB Energy Efficiency Optimization Package: Waste heat recovery, process optimization, fuel switching consultation"
+    elif pollutant == "Dust" or pollutant == "PM" or pollutant == "Total_Dust":
+        return "GMAB Advanced Bag Filter System + Electrostatic Precipitator (ESP) = 99.9% particulate removal, meeting strictest EU standards"
+    else:
+        return f"GMAB comprehensive emission control solution for {pollutant} - technical assessment available within 48 hours"
+
+
+def violation_line(v) -> str:
+    """One bullet line per violation record"""
+    if v.estimated_concentration is not None and pd.notna(v.estimated_concentration):
+        return (
+            f"   • {v.pollutant}: {v.actual_value:.1f} tonnes/year ≈ {v.estimated_concentration:.1f} mg/Nm³ "
+            f"({v.excess_percentage:+.1f}% vs {v.standard_violated} {v.limit_value:g} mg/Nm³)"
+        )
+    return (
+        f"   • {v.pollutant}: {v.actual_value:.1f} tonnes/year "
+        f"({v.excess_percentage:+.1f}% vs {v.standard_violated})"
+    )
+
+
+def render_violation_reason(
+    violations: Sequence,
+    facility: Mapping,
+    status: str,
+    base_score: int,
+    multi_violation_bonus: int,
+    size_bonus: int
+) -> str:
+    """
+    Detailed reason text for a violating facility
+
+    Args:
+        violations: Violation records in detection order (see module docstring)
+        facility: Facility fields (countryCode, mainActivityName, energyInputTJ)
+        status: ComplianceStatus value of the facility
+        base_score, multi_violation_bonus, size_bonus: Score components from
+            emission_compliance_checker.score_components()
+    """
+    most_urgent = max(violations, key=lambda v: v.excess_percentage)
+    urgency_label = STATUS_LABELS[status]
+    size_label = SIZE_LABELS[size_bonus]
+    total_score = min(base_score + multi_violation_bonus + size_bonus, 100)
+    energy_input = facility.get('energyInputTJ', 0)
+    days_to_deadline = int(most_urgent.days_to_deadline)
+
+    risk = penalty_risk(most_urgent.pollutant, most_urgent.excess_percentage, facility.get('countryCode', 'EU'))
+    solution = solution_opportunity(most_urgent.pollutant, facility.get('mainActivityName', ''))
+
+    return f"""{urgency_label} - {len(violations)} emission violation(s) detected | {size_label}
+
+COMPLIANCE VIOLATIONS:
+{chr(10).join(violation_line(v) for v in violations)}
+
+REGULATORY URGENCY: {days_to_deadline} days until {most_urgent.standard_violated} enforcement deadline
+
+FINANCIAL RISK: {risk}
+
+GMAB SOLUTION OPPORTUNITY: {solution}
+
+WHY THIS SCORE ({total_score}/100):
+   • Base Violation Severity: {base_score} points ({urgency_label})
+   • Multiple Violations Bonus: +{multi_violation_bonus} points ({len(violations)} violations)
+   • Facility Size Factor: +{size_bonus} points ({size_label}, {energy_input:.0f} TJ/year energy input)
+
+SALES STRATEGY:
+   • Lead with regulatory compliance urgency (deadline in {days_to_deadline} days)
+   • Emphasize penalty avoidance (potential fines/enforcement action)
+   • Position GMAB's proven emission control solutions (50+ WtE installations)
+   • Offer immediate technical assessment and fast-track implementation
+   • Highlight co-benefits: energy efficiency gains + emission compliance"""
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Shared Data Locations
+Paths that a writer (scripts/download) and its readers (scripts/analysis) must agree on
+
+Kept free of third-party imports so the download scripts can use it without pandas.
+"""
+
+from pathlib import Path
+
+SCRIPTS_ROOT = Path(__file__).resolve().parent.parent
+
+# Converted EEA database written by import_v16, including
+# the peer_percentiles table (peer_benchmarks)
+CONVERTED_DB_PATH = SCRIPTS_ROOT / "data" / "processed" / "converted_database.db"
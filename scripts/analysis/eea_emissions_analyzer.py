@@ -23,6 +23,8 @@ import requests
 import os
 from datetime import datetime
 from pathlib import Path
+from export_engine import export_frame
+from facility_index import GroupedIndex
 
 # Configuration
 DATA_DIR = Path("downloaded_data")
@@ -42,6 +44,7 @@ class EEAEmissionsAnalyzer:
         self.facilities_df = None
         self.releases_df = None
         self.transfers_df = None
+        self._releases_index = None  # (releases_df, GroupedIndex) built on first per-facility lookup
         
     def download_instructions(self):
         """
@@ -349,6 +352,14 @@ class EEAEmissionsAnalyzer:
         return hotspots[['FacilityName', 'CountryCode', 'City', 'MainIAActivity', 
                         'TotalQuantity', 'MediumCode', 'Lat', 'Long']]
     
+    def _facility_releases(self):
+        """
+        Releases grouped by FacilityReportID, rebuilt only when releases_df changes.
+        """
+        if self._releases_index is None or self._releases_index[0] is not self.releases_df:
+            self._releases_index = (self.releases_df, GroupedIndex(self.releases_df, 'FacilityReportID'))
+        return self._releases_index[1]
+        
     def track_trends(self, facility_id, start_year=2018, end_year=2023):
         """
         Track emission trends for a specific facility over time.
@@ -369,11 +380,11 @@ class EEAEmissionsAnalyzer:
         if self.releases_df is None:
             raise ValueError("Data not loaded. Call load_data() first.")
             
-        # Filter for the specific facility and year range
-        facility_data = self.releases_df[
-            (self.releases_df['FacilityReportID'] == facility_id) &
-            (self.releases_df['ReportingYear'] >= start_year) &
-            (self.releases_df['ReportingYear'] <= end_year)
+        # Facility rows from the grouped index, then the year range on that slice only
+        facility_data = self._facility_releases().rows(facility_id)
+        facility_data = facility_data[
+            (facility_data['ReportingYear'] >= start_year) &
+            (facility_data['ReportingYear'] <= end_year)
         ].copy()
         
         if len(facility_data) == 0:
@@ -399,6 +410,9 @@ class EEAEmissionsAnalyzer:
         """
         Export analysis results to file.
         
+        Rows are streamed in chunks (write-only workbook for Excel), so large
+        results stay within a small memory budget.
+        
         Parameters:
         -----------
         dataframe : pd.DataFrame
@@ -406,20 +420,17 @@ class EEAEmissionsAnalyzer:
         filename : str
             Output filename (without extension)
         format : str
-            Output format: 'csv' or 'excel'
+            Output format: 'csv', 'excel', 'parquet' or 'arrow'
         """
         output_dir = self.data_dir / "analysis_results"
         output_dir.mkdir(exist_ok=True)
         
-        if format == 'csv':
-            filepath = output_dir / f"{filename}.csv"
-            dataframe.to_csv(filepath, index=False)
-        elif format == 'excel':
-            filepath = output_dir / f"{filename}.xlsx"
-            dataframe.to_excel(filepath, index=False)
-        else:
+        extensions = {'csv': '.csv', 'excel': '.xlsx', 'parquet': '.parquet', 'arrow': '.arrow'}
+        if format not in extensions:
             raise ValueError(f"Unsupported format: {format}")
         
+        filepath = export_frame(dataframe, output_dir / f"{filename}{extensions[format]}")
+        
         print(f"\nResults exported to: {filepath}")
         return filepath
     
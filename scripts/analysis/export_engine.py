@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Constant-Memory Export Engine for Analysis Results
+Partitions a result once and streams every partition to xlsx, Parquet, Arrow IPC and CSV
+
+pandas.ExcelWriter keeps every sheet of the workbook in memory, and the lead
+finders used to re-filter the full result once per priority tier and once per
+country sheet. This engine computes row positions for every sheet in a single
+pass and writes them in fixed-size chunks:
+- xlsx through openpyxl's write-only workbook (rows streamed to temp files),
+  optionally with a per-column style template (width, number format, header
+  font) that is built once per workbook rather than once per cell
+- Parquet / Arrow IPC through pyarrow writers (optional dependency)
+- CSV by appending chunks to one file per sheet
+"""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CHUNK_ROWS = 20_000
+EXCEL_SHEET_NAME_LIMIT = 31
+SUPPORTED_FORMATS = ('xlsx', 'parquet', 'arrow', 'csv')
+
+
+def partition_rows(labels: Union[pd.Series, np.ndarray, Sequence]) -> Dict[Hashable, np.ndarray]:
+    """
+    Group row positions by label with one factorize + stable sort
+
+    Returns:
+        Dict label -> sorted array of row positions (missing labels are dropped)
+    """
+    codes, uniques = pd.factorize(np.asarray(labels, dtype=object))
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    start = int((codes < 0).sum())  # NA sentinel (-1) sorts first
+    bounds = start + np.concatenate([[0], np.cumsum(counts)])
+    return {uniques[i]: order[bounds[i]:bounds[i + 1]] for i in range(len(uniques))}
+
+
+def tier_labels(values: Union[pd.Series, np.ndarray], tiers: List[Tuple[str, float, float]]) -> np.ndarray:
+    """
+    Label every row with its score tier in one np.select pass
+
+    Args:
+        values: Numeric scores
+        tiers: (label, lower_inclusive, upper_exclusive) triples, first match wins
+
+    Returns:
+        Object array of tier labels (None where no tier matches)
+    """
+    values = np.asarray(values, dtype='float64')
+    conditions = [(values >= low) & (values < high) for _, low, high in tiers]
+    return np.select(conditions, [label for label, _, _ in tiers], default=None)
+
+
+@dataclass(frozen=True)
+class ColumnStyle:
+    """xlsx formatting for one column; None leaves the Excel default"""
+    width: Optional[float] = None
+    number_format: Optional[str] = None
+
+
+def excel_sheet_name(name: str) -> str:
+    """Strip characters Excel rejects and truncate to the 31-character limit"""
+    return re.sub(r'[\[\]:*?/\\]', '', str(name))[:EXCEL_SHEET_NAME_LIMIT]
+
+
+def _file_stem(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', str(name).strip()).strip('_') or 'sheet'
+
+
+class PartitionedExport:
+    """
+    One result frame, many (possibly overlapping) sheets, streamed in chunks
+
+    Sheets hold row positions into the shared frame rather than copies, so
+    adding a sheet costs one integer array regardless of its width.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        column_styles: Optional[Dict[str, ColumnStyle]] = None,
+        bold_header: bool = False
+    ):
+        self.df = df.reset_index(drop=True)
+        self.chunk_rows = chunk_rows
+        self.sheets: Dict[str, Optional[np.ndarray]] = {}
+        self.column_styles = {c: s for c, s in (column_styles or {}).items() if c in self.df.columns}
+        self.bold_header = bold_header
+
+    def add_sheet(self, name: str, rows: Optional[np.ndarray] = None, skip_empty: bool = True) -> None:
+        """Add a sheet of the given row positions (None = every row)"""
+        if rows is not None and skip_empty and len(rows) == 0:
+            return
+        self.sheets[name] = rows
+
+    def add_partitions(
+        self,
+        labels: Union[pd.Series, np.ndarray],
+        sheet_names: Dict[Hashable, str],
+        skip_empty: bool = True
+    ) -> Dict[Hashable, int]:
+        """
+        Add one sheet per label from a single partition pass
+
+        Args:
+            labels: One label per row (e.g. output of tier_labels())
+            sheet_names: label -> sheet name; the dict order is the sheet order
+                and labels not listed are not exported
+
+        Returns:
+            label -> row count for every listed label
+        """
+        parts = partition_rows(labels)
+        counts = {}
+        for label, name in sheet_names.items():
+            rows = parts.get(label, np.empty(0, dtype=np.intp))
+            counts[label] = len(rows)
+            self.add_sheet(name, rows, skip_empty=skip_empty)
+        return counts
+
+    def row_counts(self) -> Dict[str, int]:
+        return {name: len(self.df) if rows is None else len(rows) for name, rows in self.sheets.items()}
+
+    def _chunks(self, rows: Optional[np.ndarray]) -> Iterable[pd.DataFrame]:
+        n = len(self.df) if rows is None else len(rows)
+        for start in range(0, n, self.chunk_rows):
+            if rows is None:
+                yield self.df.iloc[start:start + self.chunk_rows]
+            else:
+                yield self.df.take(rows[start:start + self.chunk_rows])
+
+    # ── Writers ──────────────────────────────────────────────
+
+    def write(self, path_stem: Union[str, Path], formats: Sequence[str] = ('xlsx',)) -> Dict[str, Path]:
+        """
+        Write every sheet in each requested format
+
+        xlsx produces one workbook (path_stem.xlsx); the columnar formats and
+        CSV produce one file per sheet in path_stem_<format>/.
+
+        Returns:
+            format -> written workbook or directory
+        """
+        path_stem = Path(path_stem)
+        unknown = set(formats) - set(SUPPORTED_FORMATS)
+        if unknown:
+            raise ValueError(f"Unsupported format(s): {sorted(unknown)}. Use {SUPPORTED_FORMATS}")
+
+        written = {}
+        for fmt in formats:
+            if fmt == 'xlsx':
+                written[fmt] = self.write_xlsx(path_stem.with_suffix('.xlsx'))
+            else:
+                out_dir = path_stem.parent / f"{path_stem.name}_{fmt}"
+                out_dir.mkdir(parents=True, exist_ok=True)
+                for name, rows in self.sheets.items():
+                    target = out_dir / f"{_file_stem(name)}.{fmt}"
+                    if fmt == 'csv':
+                        self._write_csv(target, rows)
+                    else:
+                        self._write_arrow(target, rows, fmt)
+                written[fmt] = out_dir
+        return written
+
+    def write_xlsx(self, path: Union[str, Path]) -> Path:
+        """Stream every sheet into a write-only (constant-memory) openpyxl workbook"""
+        from openpyxl import Workbook
+
+        path = Path(path)
+        workbook = Workbook(write_only=True)
+        self.append_to_workbook(workbook)
+        workbook.save(path)
+        return path
+
+    def append_to_workbook(self, workbook) -> None:
+        """
+        Stream this export's sheets into an open write-only workbook
+
+        Lets reports that combine differently-shaped frames (one
+        PartitionedExport per frame) share a single output workbook.
+        """
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, NamedStyle
+        from openpyxl.utils import get_column_letter
+
+        # Style template: one named style per number format, registered once per workbook
+        formatted = {}
+        for column, style in self.column_styles.items():
+            if style.number_format:
+                style_name = f"export {style.number_format}"
+                if style_name not in workbook.named_styles:
+                    workbook.add_named_style(NamedStyle(name=style_name, number_format=style.number_format))
+                formatted[self.df.columns.get_loc(column)] = style_name
+        widths = {get_column_letter(self.df.columns.get_loc(c) + 1): s.width
+                  for c, s in self.column_styles.items() if s.width}
+        header_font = Font(bold=True) if self.bold_header else None
+
+        for name, rows in self.sheets.items():
+            sheet = workbook.create_sheet(title=excel_sheet_name(name))
+            for letter, width in widths.items():  # must precede the first row in write-only mode
+                sheet.column_dimensions[letter].width = width
+            if header_font:
+                sheet.freeze_panes = 'A2'
+                header = []
+                for column in self.df.columns:
+                    cell = WriteOnlyCell(sheet, value=str(column))
+                    cell.font = header_font
+                    header.append(cell)
+            else:
+                header = [str(c) for c in self.df.columns]
+            sheet.append(header)
+
+            for chunk in self._chunks(rows):
+                cleaned = chunk.astype(object).where(chunk.notna(), None)
+                for record in cleaned.itertuples(index=False, name=None):
+                    if formatted:
+                        record = list(record)
+                        for position, style_name in formatted.items():
+                            cell = WriteOnlyCell(sheet, value=record[position])
+                            cell.style = style_name
+                            record[position] = cell
+                    sheet.append(record)
+
+    def _write_csv(self, path: Path, rows: Optional[np.ndarray]) -> None:
+        header = True
+        for chunk in self._chunks(rows):
+            chunk.to_csv(path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+        if header:  # empty sheet: header only
+            self.df.iloc[:0].to_csv(path, index=False)
+
+    def _arrow_schema(self):
+        import pyarrow as pa
+
+        sample = pa.Schema.from_pandas(self.df.head(self.chunk_rows), preserve_index=False)
+        # Columns that are all-null in the sample would otherwise be typed "null"
+        fields = [pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in sample]
+        return pa.schema(fields)
+
+    def _write_arrow(self, path: Path, rows: Optional[np.ndarray], fmt: str) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc as ipc
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(f"pyarrow is required for {fmt} export: pip install pyarrow")
+
+        schema = self._arrow_schema()
+        if fmt == 'parquet':
+            writer = pq.ParquetWriter(str(path), schema)
+        else:
+            writer = ipc.new_file(str(path), schema)
+        with writer:
+            for chunk in self._chunks(rows):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def export_frame(df: pd.DataFrame, path: Union[str, Path], sheet_name: str = 'Sheet1') -> Path:
+    """Export a single frame, choosing the writer from the file suffix"""
+    path = Path(path)
+    fmt = {'.xlsx': 'xlsx', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.csv': 'csv'}.get(
+        path.suffix.lower()
+    )
+    if fmt is None:
+        raise ValueError(f"Unsupported export suffix: {path.suffix}")
+
+    export = PartitionedExport(df)
+    export.add_sheet(sheet_name, skip_empty=False)
+    if fmt == 'xlsx':
+        return export.write_xlsx(path)
+    if fmt == 'csv':
+        export._write_csv(path, None)
+    else:
+        export._write_arrow(path, None, fmt)
+    return path
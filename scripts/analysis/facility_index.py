@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Grouped Facility Index for Emission Tables
+Sort a table by facility once, then fetch any facility's rows in O(1)
+
+Per-facility consumers (scorers, trend trackers, agent tools) used to run
+df[df['Facility_INSPIRE_ID'] == facility_id] for every facility, rescanning
+the whole table each time (O(N·M)). GroupedIndex stores the table sorted by
+key with one contiguous [start, stop) slice per key, so every lookup is a
+dict hit plus a zero-copy iloc slice.
+"""
+
+from typing import Dict, Hashable, Iterator, List, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+
+class GroupedIndex:
+    """
+    Emission rows grouped by facility key, stored as contiguous slices
+
+    Args:
+        df: Any table with the key column(s)
+        key: Column name, or a list of columns for composite keys
+            (lookups then take a tuple, e.g. (name, city))
+
+    Rows with a missing key are dropped. Within each group the original row
+    order is preserved.
+    """
+
+    def __init__(self, df: pd.DataFrame, key: Union[str, Sequence[str]] = 'Facility_INSPIRE_ID'):
+        self.key = key
+        if isinstance(key, str):
+            codes, uniques = pd.factorize(df[key])
+        else:
+            columns = df[list(key)]
+            codes, uniques = pd.factorize(pd.MultiIndex.from_frame(columns))
+            codes = np.where(columns.isna().any(axis=1).to_numpy(), -1, codes)
+
+        valid = codes >= 0
+        order = np.argsort(codes, kind='stable')[int((~valid).sum()):]  # NA sentinel (-1) sorts first
+        self.frame = df.take(order).reset_index(drop=True)
+        self.source_positions = order
+
+        counts = np.bincount(codes[valid], minlength=len(uniques))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._slices: Dict[Hashable, Tuple[int, int]] = {
+            k: (int(self.offsets[i]), int(self.offsets[i + 1]))
+            for i, k in enumerate(uniques) if counts[i] > 0
+        }
+        self.keys: List[Hashable] = list(self._slices)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key_value: Hashable) -> bool:
+        return key_value in self._slices
+
+    def bounds(self, key_value: Hashable) -> Tuple[int, int]:
+        """[start, stop) of a key's rows in self.frame ((0, 0) if absent)"""
+        return self._slices.get(key_value, (0, 0))
+
+    def count(self, key_value: Hashable) -> int:
+        start, stop = self.bounds(key_value)
+        return stop - start
+
+    def rows(self, key_value: Hashable) -> pd.DataFrame:
+        """All rows for one key (empty frame with the same columns if absent)"""
+        start, stop = self.bounds(key_value)
+        return self.frame.iloc[start:stop]
+
+    def groups(self) -> Iterator[Tuple[Hashable, pd.DataFrame]]:
+        """Iterate (key, rows) in first-appearance order"""
+        for key_value, (start, stop) in self._slices.items():
+            yield key_value, self.frame.iloc[start:stop]
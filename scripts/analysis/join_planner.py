@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Facility-Grain Join Planner
+Pre-aggregates installation-part tables before joining them to facilities
+
+The lead finder used to chain facilities -> 3_ProductionInstallation ->
+4d_EnergyInput -> 4e_EmissionsToAir row by row, matching
+Installation_INSPIRE_ID against Installation_Part_INSPIRE_ID. Every
+facility was repeated once per installation, part and fuel, and each
+duplicate was scored separately. This planner rolls every part-level table
+up to its own grain first:
+
+    4d_EnergyInput     (part x fuel) -> part -> facility
+    4e_EmissionsToAir  (part x pollutant) -> part -> facility
+
+and then joins one row per facility with one_to_one merges, so a
+cardinality violation raises instead of silently fanning out.
+
+Usage:
+    joined = join_facility_tables(facilities, installations, install_parts,
+                                  energy, emissions, year=2023,
+                                  activity_class_by_facility=classes)
+"""
+
+from typing import Optional
+import pandas as pd
+from peer_benchmarks import FACILITY_KEY, map_parts_to_facilities
+from quantity_units import normalise_quantities, CANONICAL_T
+from stack_concentration import facility_flue_gas
+
+PART_KEY = 'Installation_Part_INSPIRE_ID'
+
+
+def assert_unique(df: pd.DataFrame, key, grain: str) -> pd.DataFrame:
+    """Raise ValueError if df has more than one row per key"""
+    duplicated = df.duplicated(key, keep=False)
+    if duplicated.any():
+        sample = df.loc[duplicated, key].drop_duplicates().head(3).to_numpy().tolist()
+        raise ValueError(f"Expected one row per {grain}, found {int(duplicated.sum())} duplicated rows (e.g. {sample})")
+    return df
+
+
+def _rollup(
+    table: pd.DataFrame,
+    value: str,
+    installations: pd.DataFrame,
+    install_parts: Optional[pd.DataFrame],
+    out: str
+) -> pd.DataFrame:
+    """Sum one value column to part grain, then to facility grain"""
+    parts = table.groupby(PART_KEY, as_index=False)[value].sum(min_count=1)
+    rows = map_parts_to_facilities(parts, installations, install_parts)
+    grouped = rows.groupby(FACILITY_KEY)
+    facility = pd.DataFrame({
+        out: grouped[value].sum(min_count=1),
+        f'n_{out}_parts': grouped[PART_KEY].nunique(),
+    }).reset_index()
+    return assert_unique(facility, FACILITY_KEY, 'facility')
+
+
+def facility_energy(
+    energy: pd.DataFrame,
+    installations: pd.DataFrame,
+    install_parts: Optional[pd.DataFrame] = None,
+    activity_class_by_facility: Optional[pd.Series] = None
+) -> pd.DataFrame:
+    """
+    Energy input, dominant fuel and flue-gas volume per facility for one year of 4d_EnergyInput
+
+    Returns:
+        DataFrame with one row per facility: Facility_INSPIRE_ID, energyInputTJ,
+        fuelInput (fuel with the largest energy input), flueGasNm3, n_energy_parts
+    """
+    energy = energy.assign(energyInputTJ=pd.to_numeric(energy['energyInputTJ'], errors='coerce'))
+    out = _rollup(energy, 'energyInputTJ', installations, install_parts, 'energyInputTJ')
+    out = out.rename(columns={'n_energyInputTJ_parts': 'n_energy_parts'})
+
+    if 'fuelInput' in energy.columns:
+        by_fuel = map_parts_to_facilities(energy[[PART_KEY, 'fuelInput', 'energyInputTJ']], installations, install_parts)
+        by_fuel = by_fuel.dropna(subset=['fuelInput']).groupby([FACILITY_KEY, 'fuelInput'], as_index=False)['energyInputTJ'].sum()
+        dominant = (
+            by_fuel.sort_values([FACILITY_KEY, 'energyInputTJ'], ascending=[True, False], kind='stable')
+            .drop_duplicates(FACILITY_KEY)[[FACILITY_KEY, 'fuelInput']]
+        )
+        out = out.merge(dominant, on=FACILITY_KEY, how='left', validate='one_to_one')
+
+    if activity_class_by_facility is not None:
+        flue_gas = facility_flue_gas(energy, installations, activity_class_by_facility, install_parts)
+        flue_gas = assert_unique(flue_gas, FACILITY_KEY, 'facility (pass one reporting year)')
+        out = out.merge(flue_gas[[FACILITY_KEY, 'flueGasNm3']], on=FACILITY_KEY, how='left', validate='one_to_one')
+    return out
+
+
+def facility_air_emissions(
+    emissions: pd.DataFrame,
+    installations: pd.DataFrame,
+    install_parts: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    """
+    Total air emissions (tonnes) per facility for one year of 4e_EmissionsToAir
+
+    Returns:
+        DataFrame with one row per facility: Facility_INSPIRE_ID,
+        totalPollutantQuantityTNE, n_emission_parts
+    """
+    emissions = normalise_quantities(emissions)
+    out = _rollup(emissions, CANONICAL_T, installations, install_parts, 'totalPollutantQuantityTNE')
+    return out.rename(columns={'n_totalPollutantQuantityTNE_parts': 'n_emission_parts'})
+
+
+def join_facility_tables(
+    facilities: pd.DataFrame,
+    installations: pd.DataFrame,
+    install_parts: Optional[pd.DataFrame],
+    energy: pd.DataFrame,
+    emissions: pd.DataFrame,
+    year: int,
+    activity_class_by_facility: Optional[pd.Series] = None
+) -> pd.DataFrame:
+    """
+    One row per facility with its installation count and the year's energy and emissions
+
+    Args:
+        facilities: 2_ProductionFacility rows to keep (first row per facility key)
+        installations: 3_ProductionInstallation
+        install_parts: Optional 4_ProductionInstallationPart (part -> installation link)
+        energy: 4d_EnergyInput (all years; filtered to year)
+        emissions: 4e_EmissionsToAir (all years; filtered to year)
+        year: Reporting year
+        activity_class_by_facility: Facility_INSPIRE_ID -> bat_rules class code,
+            enables the flueGasNm3 column
+
+    Returns:
+        facilities (deduplicated) + n_installations, energyInputTJ, fuelInput,
+        flueGasNm3, n_energy_parts, totalPollutantQuantityTNE, n_emission_parts
+    """
+    joined = facilities.drop_duplicates(FACILITY_KEY).reset_index(drop=True)
+
+    n_installations = (
+        installations.drop_duplicates('Installation_INSPIRE_ID')
+        .groupby('Parent_Facility_INSPIRE_ID').size()
+        .rename('n_installations')
+    )
+    joined['n_installations'] = joined[FACILITY_KEY].map(n_installations).fillna(0).astype('int64')
+
+    joined = joined.merge(
+        facility_energy(energy[energy['reportingYear'] == year], installations, install_parts,
+                        activity_class_by_facility),
+        on=FACILITY_KEY, how='left', validate='one_to_one'
+    )
+    joined = joined.merge(
+        facility_air_emissions(emissions[emissions['reportingYear'] == year], installations, install_parts),
+        on=FACILITY_KEY, how='left', validate='one_to_one'
+    )
+    return assert_unique(joined, FACILITY_KEY, 'facility')
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Compiled Mill Status Rules
+Matches facility / company / city columns against a rule table in one pass per field
+
+Rules live in mill_status_rules.csv, one row per rule in priority order:
+a regex per field (empty = any value), the status and a note. All
+non-empty fields of a rule must match; the first matching rule wins.
+Alternatives across fields are written as consecutive rules with the same
+status.
+
+Each field's patterns are compiled once into a combined alternation that
+screens out values matching no rule at all. Only the remaining distinct
+values are tested per pattern, and the [value, pattern] hits are gathered
+back to rows by factorized codes, so the cost scales with the number of
+distinct names rather than rows x rules. Values are ASCII-folded first
+(Bäckhammar -> Backhammar, Södra -> Sodra).
+
+Usage:
+    matcher = StatusMatcher(load_status_rules())
+    df[['Current Status', 'Notes 2024-2025']] = matcher.match(df)[['status', 'note']].to_numpy()
+"""
+
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Union
+import numpy as np
+import pandas as pd
+
+RULES_PATH = Path(__file__).with_name('mill_status_rules.csv')
+
+# Rule table column -> mill list column
+FIELDS = {'facility': 'Facility', 'company': 'Parent Company', 'city': 'City'}
+DEFAULT_STATUS = 'OPEN'
+DEFAULT_NOTE = 'Active as of EEA 2021 data. No closure reported in web research.'
+
+
+def fold(text: str) -> str:
+    """Strip diacritics: 'Bäckhammar' -> 'Backhammar'"""
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+def load_status_rules(path: Union[str, Path] = RULES_PATH) -> pd.DataFrame:
+    """Read and validate the rule table (ValueError on a malformed rule)"""
+    rules = pd.read_csv(path, dtype=str, keep_default_na=False)
+    missing = [c for c in list(FIELDS) + ['status', 'note'] if c not in rules.columns]
+    if missing:
+        raise ValueError(f"Status rules {path} missing columns: {missing}")
+    for i, rule in rules.iterrows():
+        if not any(rule[field] for field in FIELDS):
+            raise ValueError(f"Status rule {i + 2} in {path} has no pattern")
+        for field in FIELDS:
+            try:
+                re.compile(rule[field])
+            except re.error as e:
+                raise ValueError(f"Status rule {i + 2} in {path}: bad {field} pattern {rule[field]!r}: {e}")
+    return rules
+
+
+class StatusMatcher:
+    """Rule table compiled to one combined regex plus per-pattern regexes per field"""
+
+    def __init__(self, rules: pd.DataFrame):
+        self.rules = rules.reset_index(drop=True)
+        self.patterns: Dict[str, List[re.Pattern]] = {}
+        self.combined: Dict[str, re.Pattern] = {}
+        self.rule_pattern: Dict[str, np.ndarray] = {}  # field -> pattern index per rule (-1 = any)
+
+        for field in FIELDS:
+            distinct = list(dict.fromkeys(p for p in self.rules[field] if p))
+            self.patterns[field] = [re.compile(p) for p in distinct]
+            self.combined[field] = re.compile('|'.join(f'(?:{p})' for p in distinct) or r'(?!)')
+            lookup = {p: i for i, p in enumerate(distinct)}
+            self.rule_pattern[field] = np.array([lookup.get(p, -1) for p in self.rules[field]], dtype='int64')
+
+    def _field_hits(self, values: pd.Series, field: str) -> np.ndarray:
+        """[row, pattern] matches, each distinct value searched once"""
+        codes, uniques = pd.factorize(values.fillna('').astype(str))
+        folded = [fold(value) for value in uniques]
+        hits = np.zeros((len(uniques), len(self.patterns[field])), dtype=bool)
+        combined = self.combined[field]
+        for u, value in enumerate(folded):
+            if combined.search(value):
+                hits[u] = [pattern.search(value) is not None for pattern in self.patterns[field]]
+        return hits[codes]
+
+    def match(self, mills: pd.DataFrame) -> pd.DataFrame:
+        """
+        Status of every mill
+
+        Args:
+            mills: Frame with the FIELDS columns (missing columns match as empty)
+
+        Returns:
+            Frame aligned with mills: rule (row in the rule table, -1 = default), status, note
+        """
+        ok = np.ones((len(mills), len(self.rules)), dtype=bool)
+        for field, column in FIELDS.items():
+            values = mills[column] if column in mills.columns else pd.Series('', index=mills.index)
+            hits = self._field_hits(values, field)
+            index = self.rule_pattern[field]
+            ok[:, index >= 0] &= hits[:, index[index >= 0]]
+
+        matched = ok.any(axis=1)
+        rule = np.where(matched, ok.argmax(axis=1), -1)
+        status = np.where(matched, self.rules['status'].to_numpy(dtype=object)[rule], DEFAULT_STATUS)
+        note = np.where(matched, self.rules['note'].to_numpy(dtype=object)[rule], DEFAULT_NOTE)
+        return pd.DataFrame({'rule': rule, 'status': status, 'note': note}, index=mills.index)
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Parallel Compliance Sweep Partitioned by Country
+Runs EmissionComplianceChecker.check_many() on a process pool over shared memory
+
+The facility and release tables are sorted once by (countryCode, facility)
+and written as Arrow IPC streams into two multiprocessing.shared_memory
+blocks. Workers attach to the blocks once at start-up (zero-copy Arrow
+views), and each task only carries a partition label and four row offsets,
+so no DataFrame is ever pickled to a worker. Results are merged back into
+the original facility order, independent of completion order.
+
+Large countries are split into several partitions at facility boundaries
+and partitions are submitted largest first, so one big country cannot
+leave the other cores idle at the end of the sweep.
+
+Usage:
+    python parallel_compliance.py                  # every year, all cores
+    python parallel_compliance.py --workers 8 --year 2021
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing import get_start_method, resource_tracker, shared_memory
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from emission_compliance_checker import EmissionComplianceChecker
+from quantity_units import normalise_quantities, CANONICAL_KG, CANONICAL_T
+
+FACILITY_COLUMNS = ['countryCode', 'nameOfFeature', 'mainActivityName',
+                    'energyInputTJ', 'fuelInput', 'flueGasNm3']
+RELEASE_COLUMNS = ['pollutantName', CANONICAL_KG, CANONICAL_T]
+POSITION_COLUMN = '_position'
+PARTITIONS_PER_WORKER = 4
+
+
+@dataclass(frozen=True)
+class Partition:
+    """One unit of work: facility rows [f_start, f_stop) and their release rows [r_start, r_stop)"""
+    label: str
+    country: str
+    f_start: int
+    f_stop: int
+    r_start: int
+    r_stop: int
+
+    @property
+    def size(self) -> int:
+        return (self.f_stop - self.f_start) + (self.r_stop - self.r_start)
+
+
+# ── Shared memory transport ──────────────────────────────────
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("pyarrow is required for the parallel compliance sweep: pip install pyarrow")
+
+
+def _to_shared_memory(df: pd.DataFrame) -> Tuple[shared_memory.SharedMemory, int]:
+    """Write a frame as an Arrow IPC stream straight into a new shared memory block"""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sizer = pa.MockOutputStream()
+    with ipc.new_stream(sizer, table.schema) as writer:
+        writer.write_table(table)
+    size = sizer.size()
+
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    target = pa.py_buffer(shm.buf)
+    with ipc.new_stream(pa.FixedSizeBufferWriter(target), table.schema) as writer:
+        writer.write_table(table)
+    del target, writer  # release the exported buffer so the block can be closed later
+    return shm, size
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to a block created by the parent without taking ownership of it"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if get_start_method() != 'fork':
+        # Spawned workers have their own resource tracker, which would unlink
+        # the block when the worker exits (bpo-39959)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _read_shared_table(shm: shared_memory.SharedMemory, size: int):
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    return ipc.open_stream(pa.py_buffer(shm.buf[:size])).read_all()
+
+
+# ── Worker side ──────────────────────────────────────────────
+
+_worker = {}
+
+
+def _init_worker(facility_block: Tuple[str, int], release_block: Tuple[str, int],
+                 facility_key: str, with_reasons: bool) -> None:
+    """Attach to both blocks once per worker process and build one checker"""
+    blocks = [_attach(facility_block[0]), _attach(release_block[0])]
+    _worker.update(
+        blocks=blocks,
+        facilities=_read_shared_table(blocks[0], facility_block[1]),
+        releases=_read_shared_table(blocks[1], release_block[1]),
+        checker=EmissionComplianceChecker(),
+        facility_key=facility_key,
+        with_reasons=with_reasons,
+    )
+
+
+def _release_worker() -> None:
+    """Drop the Arrow views before closing the blocks they point into"""
+    blocks = _worker.get('blocks', [])
+    _worker.clear()
+    for block in blocks:
+        block.close()
+
+
+def _check_partition(partition: Partition) -> Tuple[Partition, pd.DataFrame, float, int]:
+    """Run the batch checker on one partition (zero-copy Arrow slices -> pandas)"""
+    started = time.perf_counter()
+    facilities = _worker['facilities'].slice(partition.f_start, partition.f_stop - partition.f_start).to_pandas()
+    releases = _worker['releases'].slice(partition.r_start, partition.r_stop - partition.r_start).to_pandas()
+
+    result = _worker['checker'].check_many(
+        facilities,
+        releases,
+        facility_key=_worker['facility_key'],
+        with_reasons=_worker['with_reasons']
+    )
+    result[POSITION_COLUMN] = facilities[POSITION_COLUMN].to_numpy(copy=True)
+    return partition, result, time.perf_counter() - started, os.getpid()
+
+
+# ── Parent side ──────────────────────────────────────────────
+
+def plan_partitions(
+    facility_sort_key: np.ndarray,
+    release_sort_key: np.ndarray,
+    countries: np.ndarray,
+    max_rows: int
+) -> List[Partition]:
+    """
+    Cut sorted tables into per-country partitions of at most max_rows facilities
+
+    Both sort keys are (country code, facility code) packed into int64, so the
+    release rows for any facility range are found with two binary searches.
+    """
+    partitions = []
+    boundaries = np.flatnonzero(np.r_[True, countries[1:] != countries[:-1], True])
+    for start, stop in zip(boundaries[:-1], boundaries[1:]):
+        country = countries[start]
+        n_chunks = -(-(stop - start) // max_rows)
+        for i, f_start in enumerate(range(start, stop, max_rows)):
+            f_stop = min(f_start + max_rows, stop)
+            r_start = int(np.searchsorted(release_sort_key, facility_sort_key[f_start], 'left'))
+            r_stop = int(np.searchsorted(release_sort_key, facility_sort_key[f_stop - 1], 'right'))
+            label = str(country) if n_chunks == 1 else f"{country}#{i + 1}"
+            partitions.append(Partition(label, str(country), int(f_start), int(f_stop), r_start, r_stop))
+    return partitions
+
+
+def run_parallel_compliance(
+    facilities: pd.DataFrame,
+    releases: pd.DataFrame,
+    facility_key: str = 'Facility_INSPIRE_ID',
+    max_workers: Optional[int] = None,
+    with_reasons: bool = False,
+    verbose: bool = True
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    check_many() over the whole table, partitioned by countryCode across processes
+
+    Args:
+        facilities: Facility rows (facility_key, countryCode and the columns
+            check_many() reads)
+        releases: Release rows for those facilities
+        facility_key: Join column (e.g. a facility@year key for multi-year sweeps)
+        max_workers: Process count (default: all cores); 1 runs in-process
+        with_reasons: Also render reason text for violators
+        verbose: Print the per-partition timing report
+
+    Returns:
+        Tuple of (results aligned with facilities.index, per-partition timings)
+    """
+    _require_pyarrow()
+    max_workers = max_workers or os.cpu_count() or 1
+
+    # Only the columns the checker reads travel through shared memory
+    fac = facilities[[facility_key] + [c for c in FACILITY_COLUMNS if c in facilities.columns]].copy()
+    fac[POSITION_COLUMN] = np.arange(len(fac))
+    fac['countryCode'] = fac['countryCode'].fillna('??').astype(str) if 'countryCode' in fac else '??'
+    rel = normalise_quantities(releases)
+    rel = rel[[facility_key] + [c for c in RELEASE_COLUMNS if c in rel.columns]]
+
+    # Sort both tables by (country, facility); releases take their facility's country
+    facility_codes, uniques = pd.factorize(fac[facility_key])
+    country_codes, country_names = pd.factorize(fac['countryCode'], sort=True)
+    fac_sort = country_codes.astype(np.int64) * (len(uniques) + 1) + facility_codes
+    country_of_key = pd.Series(country_codes, index=fac[facility_key]).groupby(level=0).first()
+
+    rel_facility = pd.Index(uniques).get_indexer(rel[facility_key])
+    rel = rel[rel_facility >= 0]
+    rel_facility = rel_facility[rel_facility >= 0]
+    rel_country = country_of_key.reindex(uniques[rel_facility]).to_numpy(dtype=np.int64)
+    rel_sort = rel_country * (len(uniques) + 1) + rel_facility
+
+    fac_order = np.argsort(fac_sort, kind='stable')
+    rel_order = np.argsort(rel_sort, kind='stable')
+    fac = fac.take(fac_order).reset_index(drop=True)
+    rel = rel.take(rel_order).reset_index(drop=True)
+
+    max_rows = max(1, -(-len(fac) // (max_workers * PARTITIONS_PER_WORKER)))
+    partitions = plan_partitions(fac_sort[fac_order], rel_sort[rel_order], fac['countryCode'].to_numpy(), max_rows)
+    partitions.sort(key=lambda p: p.size, reverse=True)  # largest first
+
+    started = time.perf_counter()
+    outputs = []
+    blocks = []
+    try:
+        fac_block, fac_size = _to_shared_memory(fac)
+        blocks.append(fac_block)
+        rel_block, rel_size = _to_shared_memory(rel)
+        blocks.append(rel_block)
+        init_args = ((fac_block.name, fac_size), (rel_block.name, rel_size), facility_key, with_reasons)
+
+        if max_workers == 1:
+            _init_worker(*init_args)
+            try:
+                outputs = [_check_partition(p) for p in partitions]
+            finally:
+                _release_worker()
+        else:
+            with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=init_args) as pool:
+                futures = [pool.submit(_check_partition, p) for p in partitions]
+                outputs = [f.result() for f in as_completed(futures)]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    wall = time.perf_counter() - started
+
+    # Deterministic merge: original facility order, whatever the completion order
+    if outputs:
+        merged = pd.concat([result for _, result, _, _ in outputs], ignore_index=True)
+        merged = merged.sort_values(POSITION_COLUMN, kind='stable').set_index(POSITION_COLUMN)
+        merged = merged.reindex(np.arange(len(facilities)))
+    else:
+        merged = EmissionComplianceChecker().check_many(facilities.iloc[:0], releases.iloc[:0])
+    merged.index = facilities.index
+
+    timings = pd.DataFrame([
+        {
+            'partition': p.label,
+            'country': p.country,
+            'facilities': p.f_stop - p.f_start,
+            'release_rows': p.r_stop - p.r_start,
+            'seconds': seconds,
+            'worker_pid': pid,
+        }
+        for p, _, seconds, pid in outputs
+    ], columns=['partition', 'country', 'facilities', 'release_rows', 'seconds', 'worker_pid'])
+    timings = timings.sort_values('partition', kind='stable').reset_index(drop=True)
+    timings.attrs['wall_seconds'] = wall
+
+    if verbose:
+        print_timing_report(timings, max_workers)
+    return merged, timings
+
+
+def print_timing_report(timings: pd.DataFrame, workers: int) -> None:
+    """Per-partition timings plus the achieved parallel speedup"""
+    wall = timings.attrs.get('wall_seconds', np.nan)
+    busy = timings['seconds'].sum()
+    print(f"\nCompliance sweep: {len(timings)} partitions on {workers} worker(s)")
+    print(timings.sort_values('seconds', ascending=False).head(15).to_string(index=False))
+    print(f"\n   Wall time:   {wall:.2f}s")
+    print(f"   Worker time: {busy:.2f}s")
+    if wall > 0:
+        speedup = busy / wall
+        print(f"   Speedup:     {speedup:.1f}x ({speedup / workers:.0%} of {workers} workers)")
+
+
+def main():
+    import argparse
+
+    from bat_rules import classify_activities
+    from export_engine import export_frame
+    from stack_concentration import facility_flue_gas
+
+    parser = argparse.ArgumentParser(description="Europe-wide compliance sweep on a process pool")
+    parser.add_argument("--data-dir", default="converted_csv", help="Directory with the converted CSV tables")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--year", type=int, default=None, help="Single reporting year (default: every year)")
+    parser.add_argument("--output", default="compliance_sweep.parquet", help="Output file (.parquet/.csv/.xlsx)")
+    args = parser.parse_args()
+
+    facilities = pd.read_csv(f"{args.data_dir}/2_ProductionFacility.csv", low_memory=False)
+    energy = pd.read_csv(f"{args.data_dir}/4d_EnergyInput.csv", low_memory=False)
+    releases = pd.read_csv(f"{args.data_dir}/2f_PollutantRelease.csv", low_memory=False)
+    installations = pd.read_csv(f"{args.data_dir}/3_ProductionInstallation.csv", low_memory=False)
+    install_parts = pd.read_csv(f"{args.data_dir}/4_ProductionInstallationPart.csv", low_memory=False)
+
+    if args.year is not None:
+        energy = energy[energy['reportingYear'] == args.year]
+        releases = releases[releases['reportingYear'] == args.year]
+
+    facilities = facilities.drop_duplicates('Facility_INSPIRE_ID')
+    activity_class = pd.Series(
+        classify_activities(facilities['mainActivityName']),
+        index=facilities['Facility_INSPIRE_ID']
+    )
+
+    # One row per facility and year with energy input; releases joined on the same key
+    facility_years = facility_flue_gas(energy, installations, activity_class, install_parts).merge(
+        facilities, on='Facility_INSPIRE_ID', how='inner'
+    )
+    facility_years['facility_year'] = (
+        facility_years['Facility_INSPIRE_ID'].astype(str) + '@' + facility_years['reportingYear'].astype(str)
+    )
+    releases = releases.assign(
+        facility_year=releases['Facility_INSPIRE_ID'].astype(str) + '@' + releases['reportingYear'].astype(str)
+    )
+
+    print(f"Checking {len(facility_years):,} facility-years against {len(releases):,} release rows...")
+    results, _ = run_parallel_compliance(
+        facility_years, releases, facility_key='facility_year', max_workers=args.workers
+    )
+    results = pd.concat(
+        [facility_years[['Facility_INSPIRE_ID', 'reportingYear', 'countryCode', 'nameOfFeature']], results],
+        axis=1
+    )
+    print(f"\nSaved: {export_frame(results, args.output, 'Compliance')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Sector Peer Benchmarks for Industrial Facilities
+Precomputed per-(year, pollutant, activity code) percentile ranks and intensity ratios
+
+The lead scorers used to compare every facility against hard-coded absolute
+thresholds (e.g. NOx > 500,000 kg). This module ranks every facility against
+its sector peers in one vectorised group-rank pass, so scorers can ask
+"is this plant in the top decile of its sector?" with an O(1) lookup.
+
+import_v16 persists the table into the converted SQLite database
+(peer_percentiles); scorers load it with load_peer_table() and only
+rebuild it from the release tables when it is missing. Row-wise scorers
+use lookup() / lookup_any(), vectorised scorers percentiles().
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from quantity_units import normalise_quantities, CANONICAL_KG
+
+
+PEER_TABLE_NAME = "peer_percentiles"
+
+FACILITY_KEY = 'Facility_INSPIRE_ID'
+KEY_COLUMNS = [FACILITY_KEY, 'reportingYear', 'pollutantName', 'medium']
+PEER_GROUP = ['reportingYear', 'pollutantName', 'medium', 'mainActivityCode']
+
+
+class PeerSignal(NamedTuple):
+    """Peer-relative position of one facility for one pollutant and year"""
+    quantity_kg: float
+    percentile: float  # 0-1 rank of quantity within the peer group (1.0 = largest)
+    intensity_kg_per_tj: float  # NaN when no energy input is reported
+    intensity_percentile: float  # 0-1 rank of intensity within the peer group
+    peer_count: int
+
+
+def map_parts_to_facilities(
+    energy: pd.DataFrame,
+    installations: pd.DataFrame,
+    install_parts: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    """
+    Attach Facility_INSPIRE_ID to installation-part level rows (e.g. 4d_EnergyInput)
+
+    Parts are mapped to their parent installation (via
+    4_ProductionInstallationPart when it carries the link, otherwise the part
+    ID is taken as the installation ID, as the lead finder does) and
+    installations to their parent facility. Rows that cannot be mapped are dropped.
+    """
+    rows = energy.copy()
+    if 'energyInputTJ' in rows.columns:
+        rows['energyInputTJ'] = pd.to_numeric(rows['energyInputTJ'], errors='coerce')
+
+    if install_parts is not None and 'Parent_Installation_INSPIRE_ID' in install_parts.columns:
+        part_to_installation = (
+            install_parts.drop_duplicates('Installation_Part_INSPIRE_ID')
+            .set_index('Installation_Part_INSPIRE_ID')['Parent_Installation_INSPIRE_ID']
+        )
+        rows['Installation_INSPIRE_ID'] = rows['Installation_Part_INSPIRE_ID'].map(part_to_installation)
+    else:
+        rows['Installation_INSPIRE_ID'] = rows['Installation_Part_INSPIRE_ID']
+
+    installation_to_facility = (
+        installations.drop_duplicates('Installation_INSPIRE_ID')
+        .set_index('Installation_INSPIRE_ID')['Parent_Facility_INSPIRE_ID']
+    )
+    rows[FACILITY_KEY] = rows['Installation_INSPIRE_ID'].map(installation_to_facility)
+    return rows.dropna(subset=[FACILITY_KEY])
+
+
+def facility_energy_input(
+    energy: pd.DataFrame,
+    installations: pd.DataFrame,
+    install_parts: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    """
+    Roll 4d_EnergyInput up to facility level (see map_parts_to_facilities())
+
+    Returns:
+        DataFrame with columns Facility_INSPIRE_ID, reportingYear, energyInputTJ
+    """
+    rows = map_parts_to_facilities(
+        energy[['Installation_Part_INSPIRE_ID', 'reportingYear', 'energyInputTJ']],
+        installations,
+        install_parts
+    )
+    return rows.groupby([FACILITY_KEY, 'reportingYear'], as_index=False)['energyInputTJ'].sum(min_count=1)
+
+
+def build_peer_table(
+    releases: pd.DataFrame,
+    facilities: pd.DataFrame,
+    energy_by_facility: Optional[pd.DataFrame] = None
+) -> "PeerTable":
+    """
+    Rank every facility against its sector peers in one vectorised pass
+
+    Args:
+        releases: 2f_PollutantRelease rows (Facility_INSPIRE_ID, reportingYear,
+            pollutantName, medium, totalPollutantQuantityKg)
+        facilities: 2_ProductionFacility rows (Facility_INSPIRE_ID, mainActivityCode)
+        energy_by_facility: Optional output of facility_energy_input() used for
+            emission intensity (kg per TJ of energy input)
+
+    Returns:
+        PeerTable ready for O(1) lookups
+    """
+    table = releases[KEY_COLUMNS].copy()
+    table['quantity_kg'] = normalise_quantities(releases)[CANONICAL_KG]
+    table = table.groupby(KEY_COLUMNS, as_index=False, dropna=False)['quantity_kg'].sum(min_count=1)
+
+    # Peer group = activity code (fall back to the activity name on older extracts)
+    activity_col = 'mainActivityCode' if 'mainActivityCode' in facilities.columns else 'mainActivityName'
+    activity = facilities.drop_duplicates(FACILITY_KEY).set_index(FACILITY_KEY)[activity_col]
+    table['mainActivityCode'] = table[FACILITY_KEY].map(activity)
+
+    if energy_by_facility is not None:
+        table = table.merge(
+            energy_by_facility[[FACILITY_KEY, 'reportingYear', 'energyInputTJ']],
+            on=[FACILITY_KEY, 'reportingYear'],
+            how='left',
+            validate='many_to_one'
+        )
+    else:
+        table['energyInputTJ'] = np.nan
+
+    energy_tj = table['energyInputTJ'].where(table['energyInputTJ'] > 0)
+    table['intensity_kg_per_tj'] = table['quantity_kg'] / energy_tj
+
+    peers = table.groupby(PEER_GROUP, dropna=False)
+    table['percentile'] = peers['quantity_kg'].rank(pct=True, method='average')
+    table['intensity_percentile'] = peers['intensity_kg_per_tj'].rank(pct=True, method='average')
+    table['peer_count'] = peers['quantity_kg'].transform('size').astype('int64')
+
+    return PeerTable(table)
+
+
+class PeerTable:
+    """
+    Precomputed peer percentile table with O(1) per-facility lookups
+
+    Positions are indexed once in plain dicts, so scorers running inside
+    row-wise loops never rescan or re-rank the underlying frame.
+    """
+
+    SIGNAL_COLUMNS = ['quantity_kg', 'percentile', 'intensity_kg_per_tj',
+                      'intensity_percentile', 'peer_count']
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame.reset_index(drop=True)
+        self._values = self.frame[self.SIGNAL_COLUMNS].to_numpy(dtype='float64')
+        keys = zip(*(self.frame[c].tolist() for c in KEY_COLUMNS))
+        self._positions: Dict[Tuple, int] = {key: pos for pos, key in enumerate(keys)}
+        self._by_facility_year: Dict[Tuple, np.ndarray] = (
+            self.frame.groupby([FACILITY_KEY, 'reportingYear']).indices
+        )
+        self._pollutants = self.frame['pollutantName'].to_numpy(dtype=object)
+        self._media = self.frame['medium'].to_numpy(dtype=object)
+        self._key_index = pd.MultiIndex.from_frame(self.frame[KEY_COLUMNS])  # batch lookups (percentiles)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def _signal(self, pos: int) -> PeerSignal:
+        q, pct, intensity, ipct, count = self._values[pos].tolist()
+        return PeerSignal(q, pct, intensity, ipct, int(count))
+
+    def lookup(
+        self,
+        facility_id: str,
+        year: int,
+        pollutant: str,
+        medium: str = 'AIR'
+    ) -> Optional[PeerSignal]:
+        """Peer signal for one facility, year, pollutant and medium (None if not reported)"""
+        pos = self._positions.get((facility_id, year, pollutant, medium))
+        return None if pos is None else self._signal(pos)
+
+    def lookup_any(
+        self,
+        facility_id: str,
+        year: int,
+        pollutants: List[str],
+        medium: str = 'AIR'
+    ) -> Optional[PeerSignal]:
+        """First available signal among pollutant name aliases (e.g. v8 vs v16 names)"""
+        for pollutant in pollutants:
+            signal = self.lookup(facility_id, year, pollutant, medium)
+            if signal is not None:
+                return signal
+        return None
+
+    def facility_signals(self, facility_id: str, year: int) -> Dict[Tuple[str, str], PeerSignal]:
+        """All peer signals for a facility and year, keyed by (pollutant, medium)"""
+        positions = self._by_facility_year.get((facility_id, year), [])
+        return {(self._pollutants[p], self._media[p]): self._signal(p) for p in positions}
+
+    def percentiles(
+        self,
+        facility_ids: Sequence[str],
+        year: int,
+        pollutants: List[str],
+        medium: str = 'AIR'
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Peer percentile and peer count for many facilities at once (vectorised scorers)
+
+        Args:
+            facility_ids: Facility IDs, one per scored row
+            pollutants: Pollutant name aliases, first reported one wins (see lookup_any)
+
+        Returns:
+            (percentile, peer_count) arrays aligned with facility_ids; NaN / 0 where not reported
+        """
+        facility_ids = np.asarray(facility_ids, dtype=object)
+        n = len(facility_ids)
+        positions = np.full(n, -1, dtype='int64')
+        for pollutant in pollutants:  # one get_indexer pass per alias; earlier aliases win
+            missing = positions < 0
+            if not missing.any():
+                break
+            keys = pd.MultiIndex.from_arrays([
+                facility_ids[missing],
+                np.full(int(missing.sum()), year),
+                np.full(int(missing.sum()), pollutant, dtype=object),
+                np.full(int(missing.sum()), medium, dtype=object),
+            ])
+            positions[missing] = self._key_index.get_indexer(keys)
+        found = positions >= 0
+        percentile = np.full(len(positions), np.nan)
+        peer_count = np.zeros(len(positions), dtype='int64')
+        percentile[found] = self._values[positions[found], 1]
+        peer_count[found] = self._values[positions[found], 4].astype('int64')
+        return percentile, peer_count
+
+    def to_sql(self, conn, table_name: str = PEER_TABLE_NAME) -> None:
+        """Persist the table (replacing any previous build) into the SQLite store"""
+        self.frame.to_sql(table_name, conn, if_exists='replace', index=False)
+
+    @classmethod
+    def from_sql(cls, conn, table_name: str = PEER_TABLE_NAME) -> "PeerTable":
+        """Load a table previously written by to_sql()"""
+        return cls(pd.read_sql_query(f'SELECT * FROM "{table_name}"', conn))
+
+
+def load_peer_table(db_path: Union[str, Path], table_name: str = PEER_TABLE_NAME) -> Optional["PeerTable"]:
+    """The peer table persisted by import_v16, or None when the database or table is missing"""
+    db_path = Path(db_path)
+    if not db_path.exists():
+        return None
+    conn = sqlite3.connect(f"file:{db_path.as_posix()}?mode=ro", uri=True)
+    try:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+        ).fetchone()
+        return PeerTable.from_sql(conn, table_name) if exists else None
+    finally:
+        conn.close()
+
+
+def rebuild_peer_table_in_db(conn) -> "PeerTable":
+    """Rebuild the peer table from the tables in the converted SQLite database"""
+    releases = pd.read_sql_query(
+        'SELECT Facility_INSPIRE_ID, reportingYear, pollutantName, medium, totalPollutantQuantityKg '
+        'FROM "2f_PollutantRelease"', conn
+    )
+    facilities = pd.read_sql_query('SELECT * FROM "2_ProductionFacility"', conn)
+    energy = pd.read_sql_query('SELECT * FROM "4d_EnergyInput"', conn)
+    installations = pd.read_sql_query('SELECT * FROM "3_ProductionInstallation"', conn)
+    install_parts = pd.read_sql_query('SELECT * FROM "4_ProductionInstallationPart"', conn)
+
+    peers = build_peer_table(
+        releases,
+        facilities,
+        facility_energy_input(energy, installations, install_parts)
+    )
+    peers.to_sql(conn)
+    return peers
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Content-Hashed Parquet Checkpoints for Staged Analysis Pipelines
+Reruns resume from the first stage whose inputs changed
+
+A stage is a function taking DataFrames (plus plain parameters) and
+returning a dict of named DataFrames. Its checkpoint key hashes:
+- the stage name and the code it runs: the source file defining the stage
+  and every loaded module from the same directory, so an edit to a helper
+  the stage calls (or a constant it reads) invalidates the checkpoint
+- the content hash of every input frame (frames written or loaded by an
+  earlier stage carry the hash from its manifest, so nothing is re-hashed
+  on resume)
+- its parameters and an optional extra fingerprint (input file digests,
+  standards version, as-of date)
+
+Outputs are written as one Parquet file per frame under
+<checkpoint_dir>/<stage>-<key>/ next to a manifest of their content
+hashes; superseded checkpoints of the same stage are removed.
+
+Usage:
+    pipeline = StagedPipeline("checkpoints")
+    joined = pipeline.run("join", join_stage, inputs={"facilities": df}, params={"year": 2023})
+    pipeline.print_timings()
+"""
+
+import hashlib
+import inspect
+import json
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+import pandas as pd
+
+MANIFEST = 'manifest.json'
+KEY_LENGTH = 16
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("pyarrow is required for Parquet checkpoints: pip install pyarrow")
+
+
+def file_digest(path: Union[str, Path], chunk_bytes: int = 1 << 20) -> str:
+    """Content hash of a file (read in chunks, no parsing)"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:KEY_LENGTH]
+
+
+_file_digests: Dict[tuple, str] = {}  # (path, mtime_ns, size) -> digest
+
+
+def _cached_file_digest(path: Path) -> str:
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _file_digests:
+        _file_digests[key] = file_digest(path)
+    return _file_digests[key]
+
+
+def code_digest(func: Callable) -> str:
+    """
+    Digest of the code a stage depends on: the file defining func plus every
+    loaded module whose source lives in the same directory (its helpers)
+    """
+    source = Path(inspect.getsourcefile(func)).resolve()
+    files = {source}
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if path and path.endswith('.py') and Path(path).resolve().parent == source.parent:
+            files.add(Path(path).resolve())
+    digest = hashlib.sha1()
+    for path in sorted(files):
+        if path.exists():
+            digest.update(f"{path.name}:{_cached_file_digest(path)}".encode())
+    return digest.hexdigest()[:KEY_LENGTH]
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame: column names, dtypes, index and values"""
+    digest = hashlib.sha1()
+    digest.update(json.dumps([list(map(str, df.columns)), list(map(str, df.dtypes))]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:KEY_LENGTH]
+
+
+class StagedPipeline:
+    """
+    Runs named stages in order, reusing Parquet checkpoints whose key matches
+
+    With enabled=False every stage runs and nothing is written (no pyarrow
+    needed); timings are recorded either way.
+    """
+
+    def __init__(
+        self,
+        checkpoint_dir: Union[str, Path] = 'checkpoints',
+        enabled: bool = True,
+        verbose: bool = True
+    ):
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.enabled = enabled
+        self.verbose = verbose
+        self.timings = []
+        self._hashes: Dict[int, tuple] = {}  # id(frame) -> (frame, content hash)
+        if enabled:
+            _require_pyarrow()
+
+    # ── Keys ─────────────────────────────────────────────────
+
+    def hash_of(self, df: pd.DataFrame) -> str:
+        """Content hash of a frame, computed once per frame object"""
+        entry = self._hashes.get(id(df))
+        if entry is None or entry[0] is not df:
+            entry = (df, frame_hash(df))
+            self._hashes[id(df)] = entry
+        return entry[1]
+
+    def stage_key(
+        self,
+        name: str,
+        func: Callable,
+        inputs: Dict[str, pd.DataFrame],
+        params: Dict,
+        fingerprint: Optional[Dict] = None
+    ) -> str:
+        digest = hashlib.sha1()
+        digest.update(json.dumps([
+            name,
+            func.__qualname__,
+            code_digest(func),
+            {key: self.hash_of(df) for key, df in sorted(inputs.items())},
+            params,
+            fingerprint or {},
+        ], sort_keys=True, default=str).encode())
+        return digest.hexdigest()[:KEY_LENGTH]
+
+    # ── Execution ────────────────────────────────────────────
+
+    def run(
+        self,
+        name: str,
+        func: Callable[..., Dict[str, pd.DataFrame]],
+        inputs: Optional[Dict[str, pd.DataFrame]] = None,
+        params: Optional[Dict] = None,
+        fingerprint: Optional[Dict] = None,
+        checkpoint: bool = True
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Run one stage as func(**inputs, **params), or load its checkpoint
+
+        Args:
+            name: Stage name (also the checkpoint directory prefix)
+            func: Stage function returning a dict of named DataFrames
+            inputs: DataFrames passed to func; their content is part of the key
+            params: Plain JSON-serialisable arguments passed to func
+            fingerprint: Extra key material not passed to func
+            checkpoint: False for side-effect stages (e.g. export) that always run
+
+        Returns:
+            The stage outputs
+        """
+        inputs = inputs or {}
+        params = params or {}
+        start = time.perf_counter()
+
+        path = None
+        if self.enabled and checkpoint:
+            key = self.stage_key(name, func, inputs, params, fingerprint)
+            path = self.checkpoint_dir / f"{name}-{key}"
+
+        if path is not None and (path / MANIFEST).exists():
+            outputs = self._load(path)
+            status = 'checkpoint'
+        else:
+            outputs = func(**inputs, **params)
+            status = 'ran'
+            if path is not None:
+                self._store(name, path, outputs)
+
+        seconds = time.perf_counter() - start
+        rows = sum(len(df) for df in outputs.values() if isinstance(df, pd.DataFrame))
+        self.timings.append({'stage': name, 'status': status, 'seconds': seconds, 'rows': rows})
+        if self.verbose:
+            print(f"   [{name}] {status} in {seconds:.2f}s ({rows:,} rows)")
+        return outputs
+
+    def _load(self, path: Path) -> Dict[str, pd.DataFrame]:
+        manifest = json.loads((path / MANIFEST).read_text())
+        outputs = {}
+        for output, content_hash in manifest.items():
+            df = pd.read_parquet(path / f"{output}.parquet")
+            self._hashes[id(df)] = (df, content_hash)
+            outputs[output] = df
+        return outputs
+
+    def _store(self, name: str, path: Path, outputs: Dict[str, pd.DataFrame]) -> None:
+        # Written to a temporary directory first: a crash never leaves a partial checkpoint
+        tmp = path.with_name(path.name + '.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        manifest = {}
+        for output, df in outputs.items():
+            df.to_parquet(tmp / f"{output}.parquet")
+            manifest[output] = self.hash_of(df)
+        (tmp / MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+        for old in self.checkpoint_dir.glob(f"{name}-*"):
+            if old != tmp:
+                shutil.rmtree(old, ignore_errors=True)
+        tmp.rename(path)
+
+    # ── Metrics ──────────────────────────────────────────────
+
+    def timing_report(self) -> pd.DataFrame:
+        return pd.DataFrame(self.timings, columns=['stage', 'status', 'seconds', 'rows'])
+
+    def print_timings(self) -> None:
+        """Per-stage timings and how many stages were served from checkpoints"""
+        report = self.timing_report()
+        print(f"\nPipeline stages ({self.checkpoint_dir if self.enabled else 'checkpoints disabled'}):")
+        print(report.to_string(index=False, formatters={'seconds': '{:.2f}s'.format, 'rows': '{:,}'.format}))
+        resumed = int((report['status'] == 'checkpoint').sum())
+        print(f"   Total: {report['seconds'].sum():.2f}s, {resumed} of {len(report)} stages from checkpoints")
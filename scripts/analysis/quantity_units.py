@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Quantity Unit Normalisation for EEA Emission Tables
+Converts every quantity column to canonical units in one vectorised pass
+
+Quantities arrive in different units depending on the table:
+- 2f_PollutantRelease: totalPollutantQuantityKg (kg/year)
+- 4e_EmissionsToAir:   totalPollutantQuantityTNE (tonnes/year)
+- "(as Teq)" dioxin/furan codes (remapped by import_v16.CODE_MAP) are kg of
+  toxic equivalent, not kg of substance
+
+normalise_quantities() adds canonical columns once at load time so that
+downstream code (compliance checker, scorers, reports) never converts
+units row by row.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+
+# Source quantity columns and their factor to kilograms, in order of preference
+QUANTITY_COLUMNS = {
+    'totalPollutantQuantityKg': 1.0,
+    'totalPollutantQuantityTNE': 1000.0,
+    'TotalQuantity': 1.0,  # legacy PUBLISH_POLLUTANTRELEASE extracts (kg)
+}
+
+# Canonical columns added by normalise_quantities()
+CANONICAL_KG = 'quantity_kg'
+CANONICAL_T = 'quantity_t'
+BASIS_COLUMN = 'quantity_basis'
+UNIT_COLUMN = 'quantity_unit'
+
+
+@dataclass(frozen=True)
+class PollutantUnit:
+    """Unit metadata for one pollutant code"""
+    code: str  # Legacy (v8) pollutant code, i.e. after import_v16.CODE_MAP
+    basis: str  # "mass" or the reporting basis, e.g. "as Teq", "as Hg"
+    canonical_unit: str  # Unit of quantity_kg for this pollutant
+    report_unit: str  # Unit used when quoting the value in reports
+    report_factor: float  # Multiply quantity_kg by this to get report_unit
+
+
+# Pollutants whose quantities are not plain kg of substance, or that are
+# conventionally quoted in units other than tonnes. Everything else is "mass".
+POLLUTANT_UNITS: Dict[str, PollutantUnit] = {
+    "PCDD+PCDF(DIOXINS+FURANS)": PollutantUnit("PCDD+PCDF(DIOXINS+FURANS)", "as Teq", "kg TEQ/year", "g TEQ/year", 1000.0),
+    "HGANDCOMPOUNDS": PollutantUnit("HGANDCOMPOUNDS", "as Hg", "kg/year", "kg/year", 1.0),
+    "CDANDCOMPOUNDS": PollutantUnit("CDANDCOMPOUNDS", "as Cd", "kg/year", "kg/year", 1.0),
+    "ASANDCOMPOUNDS": PollutantUnit("ASANDCOMPOUNDS", "as As", "kg/year", "kg/year", 1.0),
+    "NIANDCOMPOUNDS": PollutantUnit("NIANDCOMPOUNDS", "as Ni", "kg/year", "kg/year", 1.0),
+    "PBANDCOMPOUNDS": PollutantUnit("PBANDCOMPOUNDS", "as Pb", "kg/year", "kg/year", 1.0),
+    "ZNANDCOMPOUNDS": PollutantUnit("ZNANDCOMPOUNDS", "as Zn", "kg/year", "kg/year", 1.0),
+    "CRANDCOMPOUNDS": PollutantUnit("CRANDCOMPOUNDS", "as Cr", "kg/year", "kg/year", 1.0),
+    "CUANDCOMPOUNDS": PollutantUnit("CUANDCOMPOUNDS", "as Cu", "kg/year", "kg/year", 1.0),
+    "CLANDCOMPOUNDS": PollutantUnit("CLANDCOMPOUNDS", "as total Cl", "kg/year", "t/year", 0.001),
+    "HCL": PollutantUnit("HCL", "as HCl", "kg/year", "t/year", 0.001),
+    "HF": PollutantUnit("HF", "as HF", "kg/year", "t/year", 0.001),
+    "FLUORIDES": PollutantUnit("FLUORIDES", "as total F", "kg/year", "t/year", 0.001),
+}
+
+MASS_UNIT = PollutantUnit("*", "mass", "kg/year", "t/year", 0.001)
+
+
+def get_pollutant_unit(code: str) -> PollutantUnit:
+    """Unit metadata for a pollutant code (plain mass if not listed)"""
+    return POLLUTANT_UNITS.get(code, MASS_UNIT)
+
+
+def unit_metadata_frame() -> pd.DataFrame:
+    """Unit metadata as a table (one row per non-mass pollutant code)"""
+    return pd.DataFrame([u.__dict__ for u in POLLUTANT_UNITS.values()])
+
+
+def normalise_quantities(
+    df: pd.DataFrame,
+    code_column: Optional[str] = None,
+    name_column: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Add canonical quantity columns in one vectorised pass
+
+    Adds:
+        quantity_kg    - float64 kg/year (kg TEQ/year for "as Teq" pollutants)
+        quantity_t     - quantity_kg / 1000
+        quantity_basis - "mass" or the reporting basis ("as Teq", "as Hg", ...)
+        quantity_unit  - canonical unit of quantity_kg
+
+    The basis is taken from the pollutant code when available, otherwise from
+    the "(as X)" suffix of the pollutant name. Frames that already carry
+    quantity_kg are returned unchanged, so calling this twice is harmless.
+
+    Args:
+        df: Any EEA emission table with one of QUANTITY_COLUMNS
+        code_column: Pollutant code column (default: pollutantCode if present)
+        name_column: Pollutant name column (default: pollutantName if present)
+
+    Returns:
+        Copy of df with the canonical columns added
+    """
+    if CANONICAL_KG in df.columns:
+        return df
+
+    out = df.copy()
+    source = next((c for c in QUANTITY_COLUMNS if c in out.columns), None)
+    if source is None:
+        out[CANONICAL_KG] = np.nan
+    else:
+        out[CANONICAL_KG] = pd.to_numeric(out[source], errors='coerce') * QUANTITY_COLUMNS[source]
+    out[CANONICAL_T] = out[CANONICAL_KG] / 1000.0
+
+    if code_column is None and 'pollutantCode' in out.columns:
+        code_column = 'pollutantCode'
+    if name_column is None and 'pollutantName' in out.columns:
+        name_column = 'pollutantName'
+
+    basis = pd.Series("mass", index=out.index, dtype=object)
+    if name_column is not None:
+        from_name = out[name_column].astype(str).str.extract(r'\((as [^)]+)\)\s*$', expand=False)
+        basis = from_name.where(from_name.notna(), basis)
+    if code_column is not None:
+        code_basis = {code: u.basis for code, u in POLLUTANT_UNITS.items()}
+        from_code = out[code_column].map(code_basis)
+        basis = from_code.where(from_code.notna(), basis)
+
+    units = {u.basis: u.canonical_unit for u in POLLUTANT_UNITS.values()}
+    out[BASIS_COLUMN] = basis.astype('category')
+    out[UNIT_COLUMN] = basis.map(units).fillna(MASS_UNIT.canonical_unit).astype('category')
+    return out
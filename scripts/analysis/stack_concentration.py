@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Batch Stack-Concentration Estimator
+Converts annual pollutant loads into approximate mg/Nm³ for every facility in one pass
+
+BAT-AEL limits are concentrations (mg/Nm³, dry, at a reference O2 level),
+while E-PRTR reports annual loads. The annual flue-gas volume is derived
+from the reported energy input:
+
+    V_ref [Nm³/yr] = E [GJ/yr] x Fd [Nm³/GJ] x 20.9 / (20.9 - O2_ref)
+
+where Fd is the dry stoichiometric flue-gas volume of the fuel at 0% O2
+(US EPA Method 19 F-factors converted to Nm³/GJ) and O2_ref is the
+reference oxygen level of the applicable BREF. The annual mean
+concentration is then load / V_ref. Operating hours only set the flow
+rate (Nm³/h); they cancel out of the annual mean concentration.
+
+These are screening estimates (no excess-air, bypass or abatement data),
+good enough to rank facilities by how far their loads sit above the limit.
+"""
+
+from typing import Optional, Union
+import numpy as np
+import pandas as pd
+from bat_rules import DEFAULT_CLASS
+from peer_benchmarks import FACILITY_KEY, map_parts_to_facilities
+
+
+AMBIENT_O2_PCT = 20.9
+DEFAULT_OPERATING_HOURS = 8000  # h/year, continuous operation with planned outages
+MG_PER_TONNE = 1e9
+
+# Dry flue-gas volume at 0% O2 per GJ of fuel input (EPA Fd factors, dscf/MMBtu x 0.02501)
+FD_FACTORS = {
+    'Coal': 244.6,
+    'Lignite': 246.6,
+    'Peat': 246.6,
+    'OtherSolidFuels': 244.6,
+    'Biomass': 231.1,
+    'LiquidFuels': 229.8,
+    'NaturalGas': 217.8,
+    'OtherGases': 217.8,
+    'Waste': 239.3,
+}
+
+FUEL_STATE = {
+    'Coal': 'solid', 'Lignite': 'solid', 'Peat': 'solid', 'OtherSolidFuels': 'solid',
+    'Biomass': 'solid', 'Waste': 'solid',
+    'LiquidFuels': 'liquid', 'NaturalGas': 'gas', 'OtherGases': 'gas',
+}
+
+# Fuel assumed when a facility's fuel mix is not known
+DEFAULT_FUEL = {
+    'WI': 'Waste',
+    'LCP': 'Coal',
+    'PP': 'Biomass',
+    'CLM': 'Coal',
+    'GLS': 'NaturalGas',
+    'IS': 'Coal',
+}
+
+# Reference O2 (%) per activity class; None = depends on fuel state (LCP rules)
+REFERENCE_O2 = {
+    'WI': 11.0,
+    'LCP': None,
+    'PP': 6.0,
+    'CLM': 10.0,
+    'GLS': 8.0,
+    'IS': None,
+}
+REFERENCE_O2_BY_FUEL_STATE = {'solid': 6.0, 'liquid': 3.0, 'gas': 3.0}
+
+ArrayLike = Union[pd.Series, np.ndarray, list]
+
+
+def reference_o2(activity_class: ArrayLike, fuel: ArrayLike) -> np.ndarray:
+    """Reference O2 (%) for every (activity class, fuel) pair"""
+    classes = pd.Series(np.asarray(activity_class, dtype=object))
+    by_class = pd.to_numeric(classes.map(REFERENCE_O2), errors='coerce')
+    by_fuel = pd.Series(np.asarray(fuel, dtype=object)).map(FUEL_STATE).map(REFERENCE_O2_BY_FUEL_STATE)
+    return by_class.fillna(by_fuel).fillna(REFERENCE_O2_BY_FUEL_STATE['solid']).to_numpy(dtype='float64')
+
+
+def flue_gas_volume(
+    energy_tj: ArrayLike,
+    fuel: Optional[ArrayLike] = None,
+    activity_class: Optional[ArrayLike] = None
+) -> np.ndarray:
+    """
+    Annual dry flue-gas volume at the reference O2 (Nm³/year), vectorised
+
+    Args:
+        energy_tj: Energy input per row (TJ/year)
+        fuel: 4d_EnergyInput fuelInput code per row (None/unknown = class default fuel)
+        activity_class: bat_rules activity class per row (default: LCP)
+
+    Returns:
+        float64 array (NaN where the energy input is missing or not positive)
+    """
+    energy = pd.to_numeric(pd.Series(np.asarray(energy_tj, dtype=object)), errors='coerce').to_numpy(dtype='float64')
+    n = len(energy)
+    classes = pd.Series(
+        np.full(n, DEFAULT_CLASS, dtype=object) if activity_class is None else np.asarray(activity_class, dtype=object)
+    )
+    fuels = pd.Series(np.full(n, None, dtype=object) if fuel is None else np.asarray(fuel, dtype=object))
+    fuels = fuels.where(fuels.isin(list(FD_FACTORS)), classes.map(DEFAULT_FUEL).fillna(DEFAULT_FUEL[DEFAULT_CLASS]))
+
+    fd = fuels.map(FD_FACTORS).to_numpy(dtype='float64')
+    o2_factor = AMBIENT_O2_PCT / (AMBIENT_O2_PCT - reference_o2(classes, fuels))
+    volume = energy * 1000 * fd * o2_factor
+    return np.where(energy > 0, volume, np.nan)
+
+
+def concentration_mg_nm3(load_t: ArrayLike, flue_gas_nm3: ArrayLike) -> np.ndarray:
+    """Annual mean concentration (mg/Nm³) from annual load (t/year) and flue-gas volume (Nm³/year)"""
+    load = np.asarray(load_t, dtype='float64')
+    volume = np.asarray(flue_gas_nm3, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(volume > 0, load * MG_PER_TONNE / volume, np.nan)
+
+
+def facility_flue_gas(
+    energy: pd.DataFrame,
+    installations: pd.DataFrame,
+    activity_class_by_facility: pd.Series,
+    install_parts: Optional[pd.DataFrame] = None,
+    operating_hours: float = DEFAULT_OPERATING_HOURS
+) -> pd.DataFrame:
+    """
+    Annual flue-gas volume per facility and year from 4d_EnergyInput
+
+    Every energy row (part x fuel) gets its own Fd factor and reference O2,
+    then rows are summed per facility, so mixed-fuel plants are handled.
+
+    Args:
+        energy: 4d_EnergyInput (Installation_Part_INSPIRE_ID, reportingYear,
+            energyInputTJ, optionally fuelInput)
+        installations: 3_ProductionInstallation
+        activity_class_by_facility: Facility_INSPIRE_ID -> bat_rules class code
+        install_parts: Optional 4_ProductionInstallationPart
+        operating_hours: Hours per year used for the flow rate
+
+    Returns:
+        DataFrame with Facility_INSPIRE_ID, reportingYear, energyInputTJ,
+        flueGasNm3 (Nm³/year at reference O2), flueGasNm3PerHour
+    """
+    columns = ['Installation_Part_INSPIRE_ID', 'reportingYear', 'energyInputTJ']
+    if 'fuelInput' in energy.columns:
+        columns.append('fuelInput')
+    rows = map_parts_to_facilities(energy[columns], installations, install_parts)
+
+    activity_class = rows[FACILITY_KEY].map(activity_class_by_facility).fillna(DEFAULT_CLASS)
+    rows['flueGasNm3'] = flue_gas_volume(rows['energyInputTJ'], rows.get('fuelInput'), activity_class)
+
+    out = rows.groupby([FACILITY_KEY, 'reportingYear'], as_index=False)[['energyInputTJ', 'flueGasNm3']].sum(min_count=1)
+    out['flueGasNm3PerHour'] = out['flueGasNm3'] / operating_hours
+    return out
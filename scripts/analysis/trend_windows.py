@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Rolling-Window Emission Trend Engine
+Changes over any window lengths and "rising in k of the last n years" from one dense cube
+
+Release rows are scattered once into a dense [entity, series, year] cube
+with a contiguous year axis (unreported years are 0), so a window of w
+years is always w steps along the last axis. Every window length is then
+evaluated for every anchor year from a single strided view
+(numpy sliding_window_view over the left-padded year axis); adding a
+window or moving the anchor costs no further groupby or unstack.
+
+Percent changes are NaN where the base year has no (or zero) load,
+matching the old pct_change_19_21 columns.
+
+Usage:
+    cube = build_cube(entity_codes, series_codes, years, kg, n_entities, n_series)
+    changes = window_changes(cube, windows=[1, 2, 4])          # [entity, series, year, window]
+    latest = window_changes(cube, windows=[2, 4], anchor=2024)  # [entity, series, window]
+    persistent = rising_k_of_n(cube, k=3, n=4, anchor=2024)     # [entity, series] bool
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+@dataclass
+class TrendCube:
+    """Dense loads with a contiguous year axis"""
+    values: np.ndarray  # float64 [entity, series, year]
+    years: np.ndarray  # int64, values.shape[-1] consecutive years
+
+    def year_index(self, year: int) -> int:
+        index = int(year) - int(self.years[0])
+        if not 0 <= index < len(self.years):
+            raise ValueError(f"Year {year} outside cube span {self.years[0]}-{self.years[-1]}")
+        return index
+
+    def at(self, year: int) -> np.ndarray:
+        """[entity, series] loads of one year"""
+        return self.values[..., self.year_index(year)]
+
+
+def build_cube(
+    entity_codes: np.ndarray,
+    series_codes: np.ndarray,
+    years: np.ndarray,
+    values: np.ndarray,
+    n_entities: int,
+    n_series: int,
+    first_year: Optional[int] = None,
+    last_year: Optional[int] = None
+) -> TrendCube:
+    """
+    Sum row values into a dense [entity, series, year] cube
+
+    Args:
+        entity_codes, series_codes: Integer codes per row (rows with a negative code are skipped)
+        years: Reporting year per row
+        values: Load per row (NaN counts as 0)
+        n_entities, n_series: Cube size
+        first_year, last_year: Year span (default: span of the rows); rows outside are skipped
+    """
+    entity_codes = np.asarray(entity_codes, dtype='int64')
+    series_codes = np.asarray(series_codes, dtype='int64')
+    years = np.asarray(years, dtype='int64')
+    values = np.nan_to_num(np.asarray(values, dtype='float64'))
+
+    if first_year is None:
+        first_year = int(years.min()) if len(years) else 0
+    if last_year is None:
+        last_year = int(years.max()) if len(years) else first_year
+    span = last_year - first_year + 1
+
+    year_codes = years - first_year
+    keep = (entity_codes >= 0) & (series_codes >= 0) & (year_codes >= 0) & (year_codes < span)
+    cube = np.zeros((n_entities, n_series, span))
+    np.add.at(cube, (entity_codes[keep], series_codes[keep], year_codes[keep]), values[keep])
+    return TrendCube(cube, np.arange(first_year, last_year + 1, dtype='int64'))
+
+
+def window_changes(cube: TrendCube, windows: Sequence[int], anchor: Optional[int] = None) -> np.ndarray:
+    """
+    Percent change over each window length, for every anchor year at once
+
+    The year axis is left-padded with NaN by the longest window and viewed as
+    overlapping (max window + 1)-year slices; slice t ends at year t, so the
+    base of window w is element max_w - w of every slice.
+
+    Args:
+        cube: TrendCube
+        windows: Window lengths in years (e.g. [1, 2, 4])
+        anchor: Only this end year (default: every year)
+
+    Returns:
+        [entity, series, year, window] (or [entity, series, window] with anchor)
+        percent changes; NaN where the window starts before the cube or the
+        base load is 0
+    """
+    windows = np.asarray(windows, dtype='int64')
+    longest = int(windows.max())
+    values = cube.values
+    padded = np.concatenate([np.full(values.shape[:-1] + (longest,), np.nan), values], axis=-1)
+    view = sliding_window_view(padded, longest + 1, axis=-1)  # [entity, series, year, longest + 1]
+    if anchor is not None:
+        view = view[..., cube.year_index(anchor), :]
+
+    last = view[..., longest:]
+    base = view[..., longest - windows]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(base > 0, (last - base) / base * 100, np.nan)
+
+
+def rising_k_of_n(cube: TrendCube, k: int, n: int, anchor: Optional[int] = None) -> np.ndarray:
+    """
+    True where the load rose year-on-year in at least k of the n years up to the anchor
+
+    A year counts as rising when the load exceeds a non-zero load of the year
+    before. Counts come from one strided sum over the padded rise indicator.
+
+    Returns:
+        [entity, series, year] bool (or [entity, series] with anchor)
+    """
+    values = cube.values
+    previous, current = values[..., :-1], values[..., 1:]
+    rises = (previous > 0) & (current > previous)
+    padded = np.concatenate([np.zeros(values.shape[:-1] + (n,), dtype=bool), rises], axis=-1)
+    counts = sliding_window_view(padded, n, axis=-1).sum(axis=-1, dtype='int64')  # [entity, series, year]
+    flags = counts >= k
+    if anchor is not None:
+        return flags[..., cube.year_index(anchor)]
+    return flags
@@ -2,132 +2,192 @@
 GMAB Waste-to-Energy Lead Finder
 Direct data analysis without SDK dependency
 NOW WITH EU EMISSION COMPLIANCE CHECKING (based on restrictions.md)
+
+Runs as a staged pipeline (load, WtE filter, join, compliance, score,
+export). Every stage but the export is checkpointed as content-hashed
+Parquet (see pipeline_checkpoints), so a rerun resumes from the first
+stage whose inputs changed and a failed export loses no work.
+
+Usage:
+    python waste_to_energy_lead_finder.py
+    python waste_to_energy_lead_finder.py --data-dir converted_csv --no-checkpoints
 """
+from datetime import date, datetime
+from pathlib import Path
 import pandas as pd
 import numpy as np
-from datetime import datetime
-from emission_compliance_checker import EmissionComplianceChecker, ComplianceStatus
-
-print("=" * 80)
-print("   GMAB Waste-to-Energy Plant Optimization Lead Finder")
-print("   'TOGETHER WE SUCCEED, TOGETHER WE GO GREEN'")
-print("=" * 80)
-
-# Load data
-print("\nLoading data files...")
-facilities = pd.read_csv('converted_csv/2_ProductionFacility.csv', low_memory=False)
-energy = pd.read_csv('converted_csv/4d_EnergyInput.csv', low_memory=False)
-emissions = pd.read_csv('converted_csv/4e_EmissionsToAir.csv', low_memory=False)
-pollutant_releases = pd.read_csv('converted_csv/2f_PollutantRelease.csv', low_memory=False)
-installations = pd.read_csv('converted_csv/3_ProductionInstallation.csv', low_memory=False)
-install_parts = pd.read_csv('converted_csv/4_ProductionInstallationPart.csv', low_memory=False)
-
-print(f"Loaded {len(facilities):,} facilities")
-print(f"Loaded {len(energy):,} energy records")
-print(f"Loaded {len(emissions):,} emission records")
-print(f"Loaded {len(pollutant_releases):,} pollutant release records")
-
-# Initialize EU Compliance Checker
-print("\nInitializing EU Emission Compliance Checker (based on restrictions.md)...")
-compliance_checker = EmissionComplianceChecker()
-print("Compliance checker ready - checking against Euro 7, BAT-AEL, and IED standards")
-
-# Filter for waste incineration facilities
-print("\n Identifying waste-to-energy facilities...")
-waste_activities = [
-    'Installations for the incineration of non-hazardous waste',
-    'Installations for the disposal of non-hazardous waste',
-    'Installations for the recovery or disposal of hazardous waste'
+from emission_compliance_checker import EmissionComplianceChecker
+from compliance_cache import ComplianceCache
+from data_paths import CONVERTED_DB_PATH
+from peer_benchmarks import build_peer_table, facility_energy_input, load_peer_table
+from pipeline_checkpoints import StagedPipeline, file_digest
+from quantity_units import normalise_quantities
+from bat_rules import classify_activities
+from join_planner import join_facility_tables
+from export_engine import PartitionedExport, partition_rows, tier_labels
+
+# Lead tiers for the priority sheets: (label, min score inclusive, max score exclusive)
+LEAD_TIERS = [
+    ('critical', 80, np.inf),
+    ('high_value', 60, 80),
+    ('qualified', 40, 60),
 ]
 
-wte_facilities = facilities[
-    facilities['mainActivityName'].str.contains('incineration', case=False, na=False)
+# Extra formats alongside the workbook, e.g. ('xlsx', 'parquet', 'csv')
+EXPORT_FORMATS = ('xlsx',)
+
+# Run state lives under <repo>/data (ignored by git), wherever the script is run from
+STATE_DIR = Path(__file__).resolve().parent.parent.parent / 'data'
+
+# Detected violations are reused across runs until the data or standards change
+COMPLIANCE_CACHE_PATH = STATE_DIR / 'cache' / 'compliance_cache.db'
+
+# Stage outputs are reused across runs until their inputs change
+CHECKPOINT_DIR = STATE_DIR / 'checkpoints' / 'waste_to_energy'
+
+# Converted database holding the peer_percentiles table written by import_v16
+PEER_DB_PATH = CONVERTED_DB_PATH
+
+DATA_FILES = {
+    'facilities': '2_ProductionFacility.csv',
+    'energy': '4d_EnergyInput.csv',
+    'emissions': '4e_EmissionsToAir.csv',
+    'pollutant_releases': '2f_PollutantRelease.csv',
+    'installations': '3_ProductionInstallation.csv',
+    'install_parts': '4_ProductionInstallationPart.csv',
+}
+
+NOX_NAMES = ['Nitrogen oxides (NOx/NO2)', 'Nitrogen oxides']
+
+OUTPUT_COLUMNS = [
+    'nameOfFeature', 'countryCode', 'city', 'mainActivityName',
+    'energyInputTJ', 'totalPollutantQuantityTNE', 'lead_score', 'score_reasons',
+    'parentCompanyName', 'streetName', 'postalCode'
 ]
 
-print(f" Found {len(wte_facilities)} waste incineration facilities")
-print(f"\nCountries with WtE facilities:")
-print(wte_facilities['countryCode'].value_counts().head(10))
-
-# Get latest year data
-latest_year = energy['reportingYear'].max()
-print(f"\n Latest reporting year: {latest_year}")
-
-# Merge data
-print("\n Merging facility, energy, and emissions data...")
-# Match facilities to installations
-merged = wte_facilities.merge(
-    installations,
-    left_on='Facility_INSPIRE_ID',
-    right_on='Parent_Facility_INSPIRE_ID',
-    how='left'
-)
-
-# Add energy data
-merged = merged.merge(
-    energy[energy['reportingYear'] == latest_year],
-    left_on='Installation_INSPIRE_ID',
-    right_on='Installation_Part_INSPIRE_ID',
-    how='left'
-)
-
-# Add emissions data
-merged = merged.merge(
-    emissions[emissions['reportingYear'] == latest_year].groupby('Installation_Part_INSPIRE_ID').agg({
-        'totalPollutantQuantityTNE': 'sum'
-    }).reset_index(),
-    on='Installation_Part_INSPIRE_ID',
-    how='left'
-)
-
-print(f" Merged dataset: {len(merged)} records")
-
-# Calculate lead scores with EU COMPLIANCE CHECKING
-print("\n Calculating lead scores with EU emission compliance analysis...")
-
-def score_facility_with_compliance(row):
+COLUMN_RENAME = {
+    'nameOfFeature': 'Facility Name',
+    'countryCode': 'Country',
+    'city': 'City',
+    'mainActivityName': 'Activity Type',
+    'energyInputTJ': 'Energy Input (TJ/year)',
+    'totalPollutantQuantityTNE': 'Emissions (tonnes/year)',
+    'lead_score': 'Lead Score',
+    'score_reasons': 'Scoring Reasons',
+    'parentCompanyName': 'Parent Company',
+    'streetName': 'Street',
+    'postalCode': 'Postal Code'
+}
+
+
+# ── Stages ───────────────────────────────────────────────────
+
+def load_stage(data_dir):
+    """Read the six source tables; canonical units (kg, tonnes, TEQ basis) once at load time"""
+    print("\nLoading data files...")
+    tables = {
+        name: pd.read_csv(Path(data_dir) / filename, low_memory=False)
+        for name, filename in DATA_FILES.items()
+    }
+    tables['emissions'] = normalise_quantities(tables['emissions'])
+    tables['pollutant_releases'] = normalise_quantities(tables['pollutant_releases'])
+
+    print(f"Loaded {len(tables['facilities']):,} facilities")
+    print(f"Loaded {len(tables['energy']):,} energy records")
+    print(f"Loaded {len(tables['emissions']):,} emission records")
+    print(f"Loaded {len(tables['pollutant_releases']):,} pollutant release records")
+    return tables
+
+
+def wte_filter_stage(facilities):
+    """Waste incineration facilities"""
+    print("\n Identifying waste-to-energy facilities...")
+    wte_facilities = facilities[
+        facilities['mainActivityName'].str.contains('incineration', case=False, na=False)
+    ]
+
+    print(f" Found {len(wte_facilities)} waste incineration facilities")
+    print(f"\nCountries with WtE facilities:")
+    print(wte_facilities['countryCode'].value_counts().head(10))
+    return {'wte_facilities': wte_facilities}
+
+
+def join_stage(wte_facilities, facilities, installations, install_parts, energy, emissions, latest_year):
+    """One row per WtE facility with its latest-year energy, emissions and flue-gas volume"""
+    print("\n Merging facility, energy, and emissions data...")
+    # Energy and emissions are rolled up part -> facility before joining (see join_planner),
+    # so every facility is scored exactly once
+    activity_class_by_facility = pd.Series(
+        classify_activities(facilities['mainActivityName']),
+        index=facilities['Facility_INSPIRE_ID']
+    )
+    activity_class_by_facility = activity_class_by_facility[~activity_class_by_facility.index.duplicated()]
+    merged = join_facility_tables(
+        wte_facilities,
+        installations,
+        install_parts,
+        energy,
+        emissions,
+        latest_year,
+        activity_class_by_facility
+    )
+
+    print(f" Merged dataset: {len(merged)} facilities")
+    return {'merged': merged}
+
+
+def compliance_stage(merged, pollutant_releases, latest_year, cache_path):
+    """Check every facility row against EU standards in one batch pass"""
+    print("\n Calculating lead scores with EU emission compliance analysis...")
+    print("   Analyzing facilities against EU emission standards...")
+    compliance_checker = EmissionComplianceChecker()
+    with ComplianceCache(cache_path) as compliance_cache:
+        compliance, violations = compliance_checker.check_many(
+            merged,
+            pollutant_releases[pollutant_releases['reportingYear'] == latest_year],
+            cache=compliance_cache,
+            year=latest_year,
+            return_violations=True
+        )
+        print(f"   {compliance_cache.format_stats()}")
+    print(f"   {int((compliance['n_violations'] > 0).sum())} facility records with compliance violations")
+    return {'compliance': compliance, 'violations': violations}
+
+
+# ── Scoring ──────────────────────────────────────────────────
+
+# Secondary scoring factor -> reason template (rendered for exported leads only)
+FACTOR_TEXT = {
+    'compliance': " EU COMPLIANCE: {:.0f} points",
+    'large_facility': "Large facility: {:,.0f} TJ/year energy input",
+    'medium_facility': "Medium facility: {:,.0f} TJ/year energy input",
+    'high_throughput': "High waste throughput: {:,.0f} tonnes emissions/year",
+    'medium_throughput': "Medium waste throughput: {:,.0f} tonnes emissions/year",
+    'nox_top_decile': "Top-decile NOx emitter among {} sector peers",
+    'nox_top_quartile': "Top-quartile NOx emitter among {} sector peers",
+    'priority_market': "Priority market: {}",
+    'wte': "Waste-to-energy facility (WtE)",
+}
+
+
+def score_facility_with_compliance(row, peer_table, latest_year):
     """
     Score a facility based on GMAB criteria + EU COMPLIANCE VIOLATIONS
     Integrates restrictions.md emission standards for regulatory-driven sales
+
+    Returns (final_score, factors): factors are compact (FACTOR_TEXT key, value)
+    pairs, turned into text by describe_lead() only for exported leads
     """
     base_score = 0
-    reasons = []
-
-    # Prepare facility data for compliance check
-    facility_data = {
-        'nameOfFeature': row.get('nameOfFeature', 'Unknown'),
-        'countryCode': row.get('countryCode', 'EU'),
-        'mainActivityName': row.get('mainActivityName', ''),
-        'energyInputTJ': row.get('energyInputTJ', 0)
-    }
+    factors = []
 
-    # Get emissions data for this facility
+    # EU COMPLIANCE (highest priority scoring factor), precomputed by check_many()
     facility_id = row.get('Facility_INSPIRE_ID')
-    if pd.notna(facility_id):
-        facility_emissions = pollutant_releases[
-            pollutant_releases['Facility_INSPIRE_ID'] == facility_id
-        ]
-    else:
-        facility_emissions = pd.DataFrame()
-
-    # CHECK EU COMPLIANCE (highest priority scoring factor)
-    compliance_score = 0
-    compliance_reason = ""
-
-    if not facility_emissions.empty and len(facility_emissions) > 0:
-        try:
-            status, violations, compliance_score, detailed_reason = compliance_checker.check_facility_compliance(
-                facility_data,
-                facility_emissions
-            )
-            compliance_reason = detailed_reason
-
-            # Compliance violations are the PRIMARY scoring factor
-            if compliance_score > 0:
-                reasons.append(f" EU COMPLIANCE: {compliance_score} points")
-        except Exception as e:
-            # If compliance check fails, continue with basic scoring
-            compliance_score = 0
-            compliance_reason = f"Compliance check unavailable: {str(e)}"
+    compliance_score = row['compliance_score']
+
+    # Compliance violations are the PRIMARY scoring factor
+    if compliance_score > 0:
+        factors.append(('compliance', compliance_score))
 
     # SECONDARY SCORING FACTORS (only if no major compliance issues)
 
@@ -135,30 +195,41 @@ def score_facility_with_compliance(row):
     energy_tj = row.get('energyInputTJ', 0)
     if pd.notna(energy_tj) and energy_tj > 1000:
         base_score += 20
-        reasons.append(f"Large facility: {energy_tj:,.0f} TJ/year energy input")
+        factors.append(('large_facility', energy_tj))
     elif pd.notna(energy_tj) and energy_tj > 500:
         base_score += 15
-        reasons.append(f"Medium facility: {energy_tj:,.0f} TJ/year energy input")
+        factors.append(('medium_facility', energy_tj))
 
     # Total emissions (indicates facility size/waste throughput)
     emissions_tne = row.get('totalPollutantQuantityTNE', 0)
     if pd.notna(emissions_tne) and emissions_tne > 1000:
         base_score += 15
-        reasons.append(f"High waste throughput: {emissions_tne:,.0f} tonnes emissions/year")
+        factors.append(('high_throughput', emissions_tne))
     elif pd.notna(emissions_tne) and emissions_tne > 100:
         base_score += 10
-        reasons.append(f"Medium waste throughput: {emissions_tne:,.0f} tonnes emissions/year")
+        factors.append(('medium_throughput', emissions_tne))
+
+    # Peer-relative NOx position within the same activity code
+    if pd.notna(facility_id):
+        nox_peer = peer_table.lookup_any(facility_id, latest_year, NOX_NAMES)
+        if nox_peer is not None and nox_peer.peer_count >= 5:
+            if nox_peer.percentile >= 0.9:
+                base_score += 10
+                factors.append(('nox_top_decile', nox_peer.peer_count))
+            elif nox_peer.percentile >= 0.75:
+                base_score += 5
+                factors.append(('nox_top_quartile', nox_peer.peer_count))
 
     # Country priority (GMAB market focus)
     priority_countries = ['DE', 'NL', 'IT', 'SE', 'PL', 'FR', 'ES', 'DK']
     if row.get('countryCode') in priority_countries:
         base_score += 10
-        reasons.append(f"Priority market: {row.get('countryCode')}")
+        factors.append(('priority_market', row.get('countryCode')))
 
     # Facility type confirmation
     if 'incineration' in str(row.get('mainActivityName', '')).lower():
         base_score += 5
-        reasons.append("Waste-to-energy facility (WtE)")
+        factors.append(('wte', None))
 
     # FINAL SCORE: Compliance score takes precedence
     # If there's a compliance violation, it dominates the score
@@ -166,122 +237,232 @@ def score_facility_with_compliance(row):
     if compliance_score >= 50:
         # Major compliance issue - this becomes the lead score
         final_score = min(compliance_score, 100)
-        final_reason = compliance_reason
     else:
         # No major compliance issues - combine scores
         final_score = min(base_score + compliance_score, 100)
-        if compliance_reason:
-            final_reason = f"{compliance_reason}\n\nADDITIONAL FACTORS:\n" + '\n'.join(f"    {r}" for r in reasons)
-        else:
-            final_reason = "OPPORTUNITY FACTORS:\n" + '\n'.join(f"    {r}" for r in reasons)
 
-    return final_score, final_reason
+    return final_score, tuple(factors)
 
-# Apply scoring
-print("   Analyzing facilities against EU emission standards...")
-print("   This may take a moment...")
-merged[['lead_score', 'score_reasons']] = merged.apply(
-    lambda row: pd.Series(score_facility_with_compliance(row)), axis=1
-)
 
-# Filter qualified leads (score > 30)
-qualified_leads = merged[merged['lead_score'] > 30].copy()
-qualified_leads = qualified_leads.sort_values('lead_score', ascending=False)
+def describe_lead(compliance_score, compliance_reason, factors):
+    """Scoring reasons text for one exported lead"""
+    if compliance_score >= 50:
+        return compliance_reason
+    reasons = '\n'.join(f"    {FACTOR_TEXT[key].format(value)}" for key, value in factors)
+    if compliance_reason:
+        return f"{compliance_reason}\n\nADDITIONAL FACTORS:\n" + reasons
+    return "OPPORTUNITY FACTORS:\n" + reasons
+
+
+def score_stage(merged, compliance, violations, facilities, energy, installations, install_parts,
+                pollutant_releases, latest_year, peer_db=None):
+    """Lead score for every facility row; reasons rendered for qualified leads (score > 30) only"""
+    # Sector peer percentiles: the table import_v16 persisted, else one vectorised group-rank pass
+    peer_table = load_peer_table(peer_db) if peer_db else None
+    if peer_table is not None:
+        print(f"\nLoaded sector peer table from {peer_db}")
+    else:
+        print("\nRanking facilities against sector peers...")
+        peer_table = build_peer_table(
+            pollutant_releases,
+            facilities,
+            facility_energy_input(energy, installations, install_parts)
+        )
+    print(f"Peer table ready: {len(peer_table):,} facility/pollutant/year rows")
+
+    merged = merged.copy()
+    merged['compliance_score'] = compliance['compliance_score']
+
+    # Apply scoring
+    scored = [score_facility_with_compliance(row, peer_table, latest_year) for _, row in merged.iterrows()]
+    merged['lead_score'] = [score for score, _ in scored]
+    merged['lead_factors'] = [factors for _, factors in scored]
+
+    # Filter qualified leads (score > 30)
+    qualified_rows = np.flatnonzero(merged['lead_score'].to_numpy() > 30)
+    qualified_leads = merged.iloc[qualified_rows].copy()
+
+    # Reason text is rendered only for the leads that are exported
+    compliance_checker = EmissionComplianceChecker()
+    qualified_leads['score_reasons'] = [
+        describe_lead(score, reason, factors)
+        for score, reason, factors in zip(
+            qualified_leads['compliance_score'],
+            compliance_checker.render_reasons(merged, violations, compliance, rows=qualified_rows),
+            qualified_leads['lead_factors']
+        )
+    ]
+    qualified_leads = qualified_leads.sort_values('lead_score', ascending=False)
+
+    print(f" Found {len(qualified_leads)} qualified leads (score > 30)")
+
+    # Filter for columns that actually exist
+    existing_cols = [col for col in OUTPUT_COLUMNS if col in qualified_leads.columns]
+    return {'leads': qualified_leads[existing_cols]}
+
+
+def export_stage(leads, output_stem, formats=EXPORT_FORMATS):
+    """Write the compliance-focused workbook: priority tiers, all leads, top-5 countries"""
+    print("\n Preparing export...")
+    export_df = leads.rename(columns=COLUMN_RENAME)
+
+    # Tiers and top-5 country sheets are partitioned once, then streamed in chunks
+    export = PartitionedExport(export_df)
+
+    tier_counts = export.add_partitions(
+        tier_labels(export_df['Lead Score'], LEAD_TIERS),
+        {
+            'critical': ' CRITICAL VIOLATIONS',   # PRIORITY 1: score >= 80
+            'high_value': ' HIGH VALUE (60-79)',  # PRIORITY 2: score 60-79
+            'qualified': ' QUALIFIED (40-59)',    # PRIORITY 3: score 40-59
+        }
+    )
 
-print(f" Found {len(qualified_leads)} qualified leads (score > 30)")
+    # All qualified leads
+    export.add_sheet('ALL LEADS')
 
-# Create output
-print("\n Preparing export...")
-output_columns = [
-    'nameOfFeature', 'countryCode', 'city', 'mainActivityName',
-    'energyInputTJ', 'totalPollutantQuantityTNE', 'lead_score', 'score_reasons',
-    'parentCompanyName', 'streetName', 'postalCode'
-]
+    # By country (top 5)
+    country_rows = partition_rows(export_df['Country'])
+    top_countries = sorted(country_rows, key=lambda c: len(country_rows[c]), reverse=True)[:5]
+    for country in top_countries:
+        export.add_sheet(f'{country} ({len(country_rows[country])})', country_rows[country])
+
+    written = export.write(output_stem, formats=formats)
+    for fmt, output_file in written.items():
+        print(f"\n Exported {fmt} to: {output_file}")
+    return {
+        'export_df': export_df,
+        'tier_counts': pd.DataFrame({'tier': list(tier_counts), 'leads': list(tier_counts.values())}),
+    }
 
-# Filter for columns that actually exist
-existing_cols = [col for col in output_columns if col in qualified_leads.columns]
-export_df = qualified_leads[existing_cols].copy()
 
-# Create rename mapping for existing columns
-column_rename = {
-    'nameOfFeature': 'Facility Name',
-    'countryCode': 'Country',
-    'city': 'City',
-    'mainActivityName': 'Activity Type',
-    'energyInputTJ': 'Energy Input (TJ/year)',
-    'totalPollutantQuantityTNE': 'Emissions (tonnes/year)',
-    'lead_score': 'Lead Score',
-    'score_reasons': 'Scoring Reasons',
-    'parentCompanyName': 'Parent Company',
-    'streetName': 'Street',
-    'postalCode': 'Postal Code'
-}
+def print_lead_summary(export_df, tier_counts):
+    tier_counts = dict(zip(tier_counts['tier'], tier_counts['leads']))
+    print(f"\n LEAD SUMMARY (EU COMPLIANCE-BASED SCORING):")
+    print(f"   Total qualified leads: {len(export_df)}")
 
-# Rename only columns that exist
-export_df.rename(columns={k: v for k, v in column_rename.items() if k in existing_cols}, inplace=True)
+    if 'Lead Score' in export_df.columns:
+        critical_count = tier_counts['critical']
+        high_value_count = tier_counts['high_value']
+        qualified_count = tier_counts['qualified']
 
-# Export to Excel with COMPLIANCE-FOCUSED SHEETS
-output_file = f'GMAB_WasteToEnergy_Leads_EU_Compliance_{datetime.now().strftime("%Y%m%d")}.xlsx'
-with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-    # PRIORITY 1: CRITICAL COMPLIANCE VIOLATIONS (score >= 80)
-    critical_leads = export_df[export_df['Lead Score'] >= 80]
-    if len(critical_leads) > 0:
-        critical_leads.to_excel(writer, sheet_name=' CRITICAL VIOLATIONS', index=False)
+        print(f"\n    CRITICAL VIOLATIONS (80-100): {critical_count} facilities")
+        print(f"       Immediate enforcement risk, compliance deadlines <90 days")
+        print(f"       SALES ACTION: Same-day contact, technical assessment within 48hrs")
 
-    # PRIORITY 2: HIGH-VALUE OPPORTUNITIES (score 60-79)
-    high_value_leads = export_df[(export_df['Lead Score'] >= 60) & (export_df['Lead Score'] < 80)]
-    if len(high_value_leads) > 0:
-        high_value_leads.to_excel(writer, sheet_name=' HIGH VALUE (60-79)', index=False)
+        print(f"\n    HIGH VALUE (60-79): {high_value_count} facilities")
+        print(f"       Significant compliance risk or large facility opportunity")
+        print(f"       SALES ACTION: Contact within 3 days, proposal within 2 weeks")
 
-    # PRIORITY 3: QUALIFIED LEADS (score 40-59)
-    qualified = export_df[(export_df['Lead Score'] >= 40) & (export_df['Lead Score'] < 60)]
-    if len(qualified) > 0:
-        qualified.to_excel(writer, sheet_name=' QUALIFIED (40-59)', index=False)
+        print(f"\n    QUALIFIED (40-59): {qualified_count} facilities")
+        print(f"       Good opportunity, proactive efficiency improvements")
+        print(f"       SALES ACTION: Nurture campaign, contact within 30 days")
 
-    # All qualified leads
-    export_df.to_excel(writer, sheet_name='ALL LEADS', index=False)
+    if 'Country' in export_df.columns:
+        print(f"\n    Geographic Coverage: {export_df['Country'].nunique()} countries")
+        print(f"   Top 3 markets: {', '.join(export_df['Country'].value_counts().head(3).index.tolist())}")
 
-    # By country (top 5)
-    for country in export_df['Country'].value_counts().head(5).index:
-        country_leads = export_df[export_df['Country'] == country]
-        sheet_name = f'{country} ({len(country_leads)})'[:31]  # Excel limit
-        country_leads.to_excel(writer, sheet_name=sheet_name, index=False)
-
-print(f"\n Exported to: {output_file}")
-print(f"\n LEAD SUMMARY (EU COMPLIANCE-BASED SCORING):")
-print(f"   Total qualified leads: {len(export_df)}")
-
-if 'Lead Score' in export_df.columns:
-    critical_count = len(export_df[export_df['Lead Score'] >= 80])
-    high_value_count = len(export_df[(export_df['Lead Score'] >= 60) & (export_df['Lead Score'] < 80)])
-    qualified_count = len(export_df[(export_df['Lead Score'] >= 40) & (export_df['Lead Score'] < 60)])
-
-    print(f"\n    CRITICAL VIOLATIONS (80-100): {critical_count} facilities")
-    print(f"       Immediate enforcement risk, compliance deadlines <90 days")
-    print(f"       SALES ACTION: Same-day contact, technical assessment within 48hrs")
-
-    print(f"\n    HIGH VALUE (60-79): {high_value_count} facilities")
-    print(f"       Significant compliance risk or large facility opportunity")
-    print(f"       SALES ACTION: Contact within 3 days, proposal within 2 weeks")
-
-    print(f"\n    QUALIFIED (40-59): {qualified_count} facilities")
-    print(f"       Good opportunity, proactive efficiency improvements")
-    print(f"       SALES ACTION: Nurture campaign, contact within 30 days")
-
-if 'Country' in export_df.columns:
-    print(f"\n    Geographic Coverage: {export_df['Country'].nunique()} countries")
-    print(f"   Top 3 markets: {', '.join(export_df['Country'].value_counts().head(3).index.tolist())}")
-
-print(f"\n TOP 10 LEADS (Compliance-Priority Ranking):")
-display_cols = [col for col in ['Facility Name', 'Country', 'City', 'Lead Score'] if col in export_df.columns]
-if display_cols:
-    top_10 = export_df[display_cols].head(10)
-    print(top_10.to_string(index=False))
-else:
-    print(export_df.head(10).to_string(index=False))
-
-print("\n" + "=" * 80)
-print(" EU COMPLIANCE-BASED LEAD GENERATION COMPLETE!")
-print(" Based on restrictions.md: Euro 7, BAT-AEL, and IED emission standards")
-print(" Leads prioritized by regulatory urgency and financial penalty risk")
-print("=" * 80)
\ No newline at end of file
+    print(f"\n TOP 10 LEADS (Compliance-Priority Ranking):")
+    display_cols = [col for col in ['Facility Name', 'Country', 'City', 'Lead Score'] if col in export_df.columns]
+    if display_cols:
+        top_10 = export_df[display_cols].head(10)
+        print(top_10.to_string(index=False))
+    else:
+        print(export_df.head(10).to_string(index=False))
+
+
+# ── Pipeline ─────────────────────────────────────────────────
+
+def run_pipeline(
+    data_dir='converted_csv',
+    checkpoint_dir=CHECKPOINT_DIR,
+    use_checkpoints=True,
+    cache_path=COMPLIANCE_CACHE_PATH,
+    output_stem=None,
+    formats=EXPORT_FORMATS,
+    peer_db=PEER_DB_PATH
+):
+    """
+    Run all stages, resuming from checkpoints where inputs are unchanged
+
+    Returns:
+        (export frame, tier counts frame, StagedPipeline with per-stage timings)
+    """
+    pipeline = StagedPipeline(checkpoint_dir, enabled=use_checkpoints)
+    today = date.today()
+
+    files = {name: file_digest(Path(data_dir) / filename) for name, filename in DATA_FILES.items()} \
+        if use_checkpoints else {}
+    tables = pipeline.run('load', load_stage, params={'data_dir': str(data_dir)}, fingerprint={'files': files})
+
+    wte = pipeline.run('wte_filter', wte_filter_stage, inputs={'facilities': tables['facilities']})
+
+    # Get latest year data
+    latest_year = int(tables['energy']['reportingYear'].max())
+    print(f"\n Latest reporting year: {latest_year}")
+
+    joined = pipeline.run('join', join_stage, inputs={
+        'wte_facilities': wte['wte_facilities'],
+        **{name: tables[name] for name in ('facilities', 'installations', 'install_parts', 'energy', 'emissions')},
+    }, params={'latest_year': latest_year})
+
+    # Urgency depends on today's date, detection on the standards in force
+    checked = pipeline.run('compliance', compliance_stage, inputs={
+        'merged': joined['merged'],
+        'pollutant_releases': tables['pollutant_releases'],
+    }, params={'latest_year': latest_year, 'cache_path': str(cache_path)}, fingerprint={
+        'as_of': today.isoformat(),
+        'standards': EmissionComplianceChecker().standards_version(),
+    })
+
+    scored = pipeline.run('score', score_stage, inputs={
+        'merged': joined['merged'],
+        'compliance': checked['compliance'],
+        'violations': checked['violations'],
+        **{name: tables[name] for name in ('facilities', 'energy', 'installations', 'install_parts',
+                                           'pollutant_releases')},
+    }, params={'latest_year': latest_year, 'peer_db': str(peer_db) if peer_db else None}, fingerprint={
+        'as_of': today.isoformat(),
+        'peer_db_mtime': Path(peer_db).stat().st_mtime_ns if peer_db and Path(peer_db).exists() else None,
+    })
+
+    output_stem = output_stem or f'GMAB_WasteToEnergy_Leads_EU_Compliance_{datetime.now().strftime("%Y%m%d")}'
+    exported = pipeline.run('export', export_stage, inputs={'leads': scored['leads']},
+                            params={'output_stem': output_stem, 'formats': formats}, checkpoint=False)
+    return exported['export_df'], exported['tier_counts'], pipeline
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="GMAB waste-to-energy lead finder with EU compliance scoring")
+    parser.add_argument("--data-dir", default="converted_csv", help="Directory with the converted CSV tables")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR, help="Directory for stage checkpoints")
+    parser.add_argument("--no-checkpoints", action="store_true", help="Run every stage, write no checkpoints")
+    parser.add_argument("--peer-db", default=PEER_DB_PATH,
+                        help="Database with the persisted peer_percentiles table (rebuilt from the CSVs if absent)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("   GMAB Waste-to-Energy Plant Optimization Lead Finder")
+    print("   'TOGETHER WE SUCCEED, TOGETHER WE GO GREEN'")
+    print("=" * 80)
+
+    export_df, tier_counts, pipeline = run_pipeline(
+        data_dir=args.data_dir,
+        checkpoint_dir=args.checkpoint_dir,
+        use_checkpoints=not args.no_checkpoints,
+        peer_db=args.peer_db
+    )
+    print_lead_summary(export_df, tier_counts)
+    pipeline.print_timings()
+
+    print("\n" + "=" * 80)
+    print(" EU COMPLIANCE-BASED LEAD GENERATION COMPLETE!")
+    print(" Based on restrictions.md: Euro 7, BAT-AEL, and IED emission standards")
+    print(" Leads prioritized by regulatory urgency and financial penalty risk")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,15 @@ Handles the new column names and pollutant code format introduced in v16.
 import sqlite3
 import csv
 import io
+import sys
 import zipfile
 from pathlib import Path
 
 ROOT = Path(__file__).parent.parent
-DB_PATH = ROOT / "data" / "processed" / "converted_database.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "analysis"))
+from data_paths import CONVERTED_DB_PATH  # noqa: E402  (shared with the peer table readers)
+
+DB_PATH = CONVERTED_DB_PATH
 ZIP_PATH = ROOT / "data" / "raw" / "v_latest_downloaded" / "v16_csv_files.zip"
 
 # Map v16 parsed codes back to v8 codes for consistency
@@ -140,6 +144,15 @@ def main():
     conn = sqlite3.connect(str(DB_PATH))
     years = [r[0] for r in conn.execute('SELECT DISTINCT reportingYear FROM "2f_PollutantRelease" ORDER BY reportingYear').fetchall()]
     print(f"DB now covers years: {years}")
+
+    # Peer percentiles depend on every year's releases, so rebuild after each import
+    print("\nRebuilding sector peer percentile table ...")
+    try:
+        from peer_benchmarks import rebuild_peer_table_in_db, PEER_TABLE_NAME
+        peers = rebuild_peer_table_in_db(conn)
+        print(f"  {len(peers):,} facility/pollutant/year rows written to \"{PEER_TABLE_NAME}\"")
+    except ImportError:
+        print("  pandas not available - skipping peer percentile table")
     conn.close()
 
 
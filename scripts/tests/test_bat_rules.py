@@ -0,0 +1,59 @@
+"""
+Test cases for the table-driven BAT-AEL rules
+"""
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+
+from bat_rules import classify_activities, classify_activity, compile_rules, rules_frame
+
+
+def test_activity_classification():
+    """Vectorised and scalar classification agree, unmatched names fall back to LCP"""
+    print("\n=== Testing activity classification ===")
+    names = pd.Series([
+        'Installations for the incineration of non-hazardous waste',
+        'Production of paper and cardboard',
+        'Production of cement clinker in rotary kilns',
+        'Manufacture of glass including glass fibre',
+        'Production of pig iron or steel',
+        'Combustion of fuels in installations with a total rated thermal input of 50 MW or more',
+        None,
+    ])
+    expected = ['WI', 'PP', 'CLM', 'GLS', 'IS', 'LCP', 'LCP']
+    assert list(classify_activities(names)) == expected
+    assert [classify_activity(n) for n in names] == expected
+    print("✓ Classes:", expected)
+
+
+def test_rule_in_force_selection():
+    """The latest passed rule wins; before any has passed, the earliest upcoming one"""
+    print("\n=== Testing effective-date selection ===")
+    rules = rules_frame()
+    tightened = rules[(rules['pollutant'] == 'NOx') & (rules['activity_class'] == 'WI')].copy()
+    tightened['limit_value'] = 120
+    tightened['effective_date'] = date(2023, 12, 3)
+    rules = pd.concat([rules, tightened], ignore_index=True)
+
+    for as_of, expected in [(date(2020, 1, 1), 200), (date(2024, 1, 1), 120), (date(2010, 1, 1), 200)]:
+        compiled = compile_rules(rules, as_of=as_of)
+        found = compiled.lookup(compiled.class_codes(['WI']), compiled.pollutant_codes(['NOx']))
+        assert found['applicable'][0]
+        assert found['limit_value'][0] == expected, (as_of, found['limit_value'][0])
+
+    # Pairs without a rule are not applicable
+    compiled = compile_rules(rules, as_of=date(2024, 1, 1))
+    found = compiled.lookup(compiled.class_codes(['LCP', 'WI']), compiled.pollutant_codes(['Hg', 'Ammonia']))
+    assert not found['applicable'].any()
+    assert np.isnan(found['limit_value']).all()
+    print("✓ Effective-date selection correct")
+
+
+if __name__ == "__main__":
+    test_activity_classification()
+    test_rule_in_force_selection()
@@ -0,0 +1,185 @@
+"""
+Test cases for the batch compliance API
+check_many() must reproduce check_facility_compliance() facility by facility
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+
+from emission_compliance_checker import EmissionComplianceChecker, ComplianceStatus
+
+
+def make_tables(n_facilities=60, seed=7):
+    """Synthetic facility and release tables covering WtE, LCP and missing data"""
+    rng = np.random.default_rng(seed)
+    activities = [
+        'Installations for the incineration of non-hazardous waste',
+        'Combustion installations with a rated thermal input of 50 MW or more',
+        'Production of paper and cardboard',
+    ]
+    facilities = pd.DataFrame({
+        'Facility_INSPIRE_ID': [f'F{i}' for i in range(n_facilities)],
+        'nameOfFeature': [f'Plant {i}' for i in range(n_facilities)],
+        'countryCode': rng.choice(['DE', 'NL', 'SE'], n_facilities),
+        'mainActivityName': rng.choice(activities, n_facilities),
+        'energyInputTJ': rng.choice([np.nan, 300.0, 2500.0, 8000.0], n_facilities),
+        'fuelInput': rng.choice([None, 'Coal', 'NaturalGas', 'Biomass'], n_facilities),
+    })
+    # Duplicate one facility key: each facility row is checked independently
+    facilities = pd.concat([facilities, facilities.iloc[[0]]], ignore_index=True)
+
+    pollutants = ['Nitrogen oxides (NOx/NO2)', 'Nitrogen oxides', 'Sulphur dioxide',
+                  'Carbon monoxide', 'Mercury', 'Ammonia']
+    n_rows = n_facilities * 4
+    releases = pd.DataFrame({
+        # Last five facilities have no release rows at all
+        'Facility_INSPIRE_ID': [f'F{i}' for i in rng.integers(0, n_facilities - 5, n_rows)],
+        'pollutantName': rng.choice(pollutants, n_rows),
+        'totalPollutantQuantityKg': rng.choice([np.nan, 5e3, 5e4, 3e5, 2e6], n_rows),
+    })
+    return facilities, releases
+
+
+def test_check_many_matches_scalar():
+    """Status, score, violation count and reason match the per-facility path"""
+    print("\n=== Testing check_many() against check_facility_compliance() ===")
+    checker = EmissionComplianceChecker()
+    facilities, releases = make_tables()
+
+    batch = checker.check_many(facilities, releases, with_reasons=True)
+    assert list(batch.index) == list(facilities.index)
+
+    for idx, facility in facilities.iterrows():
+        rows = releases[releases['Facility_INSPIRE_ID'] == facility['Facility_INSPIRE_ID']]
+        result = batch.loc[idx]
+        assert result['n_emission_rows'] == len(rows)  # facilities without releases included
+
+        status, violations, score, reason = checker.check_facility_compliance(facility.to_dict(), rows)
+        assert result['compliance_status'] == status.value, facility['Facility_INSPIRE_ID']
+        assert result['compliance_score'] == score
+        assert result['n_violations'] == len(violations)
+        assert result['compliance_reason'] == reason
+
+    print(f"{len(facilities)} facilities, {int((batch['n_violations'] > 0).sum())} with violations")
+    print("✓ Batch results identical to scalar checks")
+
+
+def test_null_facility_keys_never_match():
+    """A facility without an ID must not pick up orphan releases without an ID"""
+    checker = EmissionComplianceChecker()
+    facilities, releases = make_tables(n_facilities=10, seed=5)
+    facilities.loc[3, 'Facility_INSPIRE_ID'] = None
+    facilities.loc[3, 'energyInputTJ'] = 300.0
+    orphans = pd.DataFrame({
+        'Facility_INSPIRE_ID': [None, np.nan],
+        'pollutantName': 'Nitrogen oxides (NOx/NO2)',
+        'totalPollutantQuantityKg': 2e6,
+    })
+    batch = checker.check_many(facilities, pd.concat([releases, orphans], ignore_index=True))
+    assert batch.loc[3, 'compliance_status'] == ComplianceStatus.COMPLIANT.value
+    assert batch.loc[3, 'n_emission_rows'] == 0 and batch.loc[3, 'n_violations'] == 0
+
+
+def test_check_many_without_energy_column():
+    """Without energy input no flue-gas volume can be estimated, so nothing is flagged"""
+    print("\n=== Testing check_many() without energy data ===")
+    checker = EmissionComplianceChecker()
+    facilities, releases = make_tables(n_facilities=20, seed=3)
+    facilities = facilities.drop(columns='energyInputTJ')
+
+    batch = checker.check_many(facilities, releases)
+    for idx, facility in facilities.iterrows():
+        rows = releases[releases['Facility_INSPIRE_ID'] == facility['Facility_INSPIRE_ID']]
+        if rows.empty:
+            continue
+        status, violations, score, _ = checker.check_facility_compliance(facility.to_dict(), rows)
+        assert batch.loc[idx, 'compliance_score'] == score == 10
+        assert batch.loc[idx, 'n_violations'] == len(violations) == 0
+
+    print("✓ No violations without energy data, as in the scalar path")
+
+
+def test_eea_pollutant_names_reach_their_rules():
+    """EEA release names (as in 2f_PollutantRelease) are checked against the SO2 and dust limits"""
+    from bat_rules import rules_frame
+
+    checker = EmissionComplianceChecker()
+    mapped = set(checker._pollutant_mapping().values())
+    rules = rules_frame()
+    for name in ('SO2', 'Total_Dust'):
+        assert set(rules.loc[rules['pollutant'] == name, 'activity_class']) >= {'WI', 'LCP'}
+    assert set(rules.loc[rules['activity_class'] == 'LCP', 'pollutant']) <= mapped  # no rule unreachable by name
+
+    facilities = pd.DataFrame({
+        'Facility_INSPIRE_ID': ['W', 'L'],
+        'nameOfFeature': ['Incinerator', 'Boiler'],
+        'countryCode': ['SE', 'DE'],
+        'mainActivityName': ['Installations for the incineration of non-hazardous waste',
+                             'Combustion installations with a rated thermal input of 50 MW or more'],
+        'energyInputTJ': [2500.0, 2500.0],
+    })
+    releases = pd.DataFrame({
+        'Facility_INSPIRE_ID': ['W', 'W', 'L', 'L'],
+        'pollutantName': ['Sulphur oxides', 'Particulate matter', 'Sulphur oxides (SOx/SO2)', 'Particulate matter'],
+        'totalPollutantQuantityKg': 5e6,
+    })
+    result, violations = checker.check_many(facilities, releases, return_violations=True)
+    assert sorted(zip(violations['row'], violations['pollutant'].astype(str))) == [
+        (0, 'SO2'), (0, 'Total_Dust'), (1, 'SO2'), (1, 'Total_Dust')]
+    for idx, facility in facilities.iterrows():
+        rows = releases[releases['Facility_INSPIRE_ID'] == facility['Facility_INSPIRE_ID']]
+        _, scalar, score, _ = checker.check_facility_compliance(facility.to_dict(), rows)
+        assert sorted(v.pollutant for v in scalar) == ['SO2', 'Total_Dust']
+        assert result.loc[idx, 'compliance_score'] == score
+
+
+def test_render_reasons_on_demand():
+    """Compact records by default; text rendered for a subset matches the full render"""
+    print("\n=== Testing structured records + render_reasons() ===")
+    checker = EmissionComplianceChecker()
+    facilities, releases = make_tables(n_facilities=40, seed=5)
+
+    result, violations = checker.check_many(facilities, releases, return_violations=True)
+    assert 'compliance_reason' not in result.columns
+    for column in ('compliance_status', 'worst_pollutant', 'urgency'):
+        assert isinstance(result[column].dtype, pd.CategoricalDtype), column
+    for column in ('pollutant', 'standard_violated', 'urgency'):
+        assert isinstance(violations[column].dtype, pd.CategoricalDtype), column
+    assert len(violations) == result['n_violations'].sum()
+
+    full = checker.check_many(facilities, releases, with_reasons=True)['compliance_reason']
+    subset = np.flatnonzero(result['n_violations'].to_numpy() > 0)[::2]
+    rendered = checker.render_reasons(facilities, violations, result, rows=subset)
+    assert list(rendered.index) == list(facilities.index[subset])
+    assert rendered.tolist() == full.iloc[subset].tolist()
+    print(f"✓ {len(subset)} of {len(facilities)} reasons rendered on demand")
+
+
+def test_parallel_sweep_matches_batch():
+    """Country-partitioned process pool returns the same frame as one check_many() call"""
+    import pytest
+    pytest.importorskip("pyarrow")
+    from parallel_compliance import run_parallel_compliance
+
+    print("\n=== Testing parallel sweep against check_many() ===")
+    facilities, releases = make_tables(n_facilities=80, seed=11)
+    facilities = facilities.sample(frac=1, random_state=0)  # unsorted input, arbitrary index
+    expected = EmissionComplianceChecker().check_many(facilities, releases, with_reasons=True)
+
+    results, timings = run_parallel_compliance(
+        facilities, releases, max_workers=2, with_reasons=True, verbose=False
+    )
+    pd.testing.assert_frame_equal(results, expected, check_dtype=False)
+    assert timings['facilities'].sum() == len(facilities)
+    print(f"✓ {len(timings)} partitions merged back in input order")
+
+
+if __name__ == "__main__":
+    test_check_many_matches_scalar()
+    test_check_many_without_energy_column()
+    test_render_reasons_on_demand()
+    test_parallel_sweep_matches_batch()
@@ -0,0 +1,51 @@
+"""
+Test cases for the persistent compliance cache
+"""
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from compliance_cache import ComplianceCache
+from emission_compliance_checker import EmissionComplianceChecker
+from test_compliance_batch import make_tables
+
+
+def test_cache_round_trip_and_invalidation():
+    """Warm runs match uncached results; only edited facilities are recomputed"""
+    print("\n=== Testing compliance cache ===")
+    checker = EmissionComplianceChecker()
+    facilities, releases = make_tables(n_facilities=50, seed=5)
+    expected = checker.check_many(facilities, releases, with_reasons=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with ComplianceCache(os.path.join(tmp, 'state', 'cache.db')) as cache:
+            cold = checker.check_many(facilities, releases, with_reasons=True, cache=cache, year=2023)
+            assert cache.hits == 0 and cache.misses == len(facilities)
+            pd.testing.assert_frame_equal(cold, expected)
+
+        with ComplianceCache(os.path.join(tmp, 'state', 'cache.db')) as cache:
+            warm = checker.check_many(facilities, releases, with_reasons=True, cache=cache, year=2023)
+            assert cache.misses == 0 and cache.stats()['hit_rate'] == 1.0
+            pd.testing.assert_frame_equal(warm, expected)
+
+            # Edit one release row: only that facility (and its duplicate row) is re-detected
+            edited = releases.copy()
+            edited.loc[edited.index[0], 'totalPollutantQuantityKg'] = 9e6
+            target = edited.loc[edited.index[0], 'Facility_INSPIRE_ID']
+            n_rows = int((facilities['Facility_INSPIRE_ID'] == target).sum())
+            before = cache.misses
+            result = checker.check_many(facilities, edited, with_reasons=True, cache=cache, year=2023)
+            assert cache.misses - before == n_rows
+            pd.testing.assert_frame_equal(result, checker.check_many(facilities, edited, with_reasons=True))
+            print(cache.format_stats())
+
+    print("✓ Cache hits are identical to fresh checks")
+
+
+if __name__ == "__main__":
+    test_cache_round_trip_and_invalidation()
@@ -0,0 +1,113 @@
+"""
+Test cases for the in-process dataset registry behind the agent tool handles
+Handles resolve to the stored table; replies carry only a compact, JSON-safe summary
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'agents'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from dataset_registry import DatasetRegistry
+from eea_store import EEAStore
+from lead_filters import LeadFilter
+from lead_scoring import score_leads_batch
+from test_eea_store import make_db
+
+
+def test_register_resolve_and_describe():
+    print("\n=== Testing handles and summaries ===")
+    registry = DatasetRegistry()
+    leads = pd.DataFrame({
+        'facility': [f'Plant {i}' for i in range(1000)],
+        'plant_age': pd.array([20, None] * 500, dtype='Int64'),
+        'total_score': np.arange(1000, dtype='int64'),
+        'reason_codes': [('AGE_20', 'REGULATORY')] * 1000,
+        'efficiency': [np.nan, 66.5] * 500,
+    })
+    handle = registry.register(leads, kind='Scored leads')
+    assert handle.startswith('ds_scored_leads_') and handle in registry
+    assert registry.resolve(handle) is registry.get(handle) and len(registry.get(handle)) == 1000
+
+    summary = registry.describe(handle, sample_rows=3, sample_columns=['facility', 'plant_age', 'reason_codes'])
+    text = json.dumps(summary)  # plain JSON: no numpy scalars, NaN or tuples left
+    assert summary['rows'] == 1000 and len(summary['sample']) == 3 and len(text) < 1000
+    assert summary['sample'][1] == {'facility': 'Plant 1', 'plant_age': None, 'reason_codes': ['AGE_20', 'REGULATORY']}
+    print(f"✓ 1000 rows summarised in {len(text)} characters")
+
+
+def test_inline_leads_and_append():
+    registry = DatasetRegistry()
+    assert len(registry.resolve([{'facility': 'A'}, {'facility': 'B', 'country': 'Italy'}])) == 2
+    assert registry.resolve(None).empty
+
+    handle = registry.register([{'facility_id': 'F1'}], kind='eea_facilities')
+    registry.append(handle, [{'facility_id': 'F2'}, {'facility_id': 'F3'}])
+    assert registry.get(handle)['facility_id'].tolist() == ['F1', 'F2', 'F3']
+
+
+def test_least_recently_used_evicted():
+    registry = DatasetRegistry(max_datasets=2)
+    first = registry.register([{'x': 1}])
+    second = registry.register([{'x': 2}])
+    registry.get(first)  # first is now the most recently used
+    registry.register([{'x': 3}])
+    assert first in registry and second not in registry and len(registry) == 2
+    with pytest.raises(ValueError, match="Unknown dataset handle"):
+        registry.resolve(second)
+
+
+def test_pinned_dataset_survives_eviction():
+    """A campaign's shortlist stays while concurrent campaigns register past the limit"""
+    registry = DatasetRegistry(max_datasets=3)
+    shortlist = registry.register([{'x': 0}], kind='shortlist', pin=True)
+    others = [registry.register([{'x': i}]) for i in range(1, 10)]
+    assert shortlist in registry and len(registry) == 3
+    assert others[-2:] == [h for h in others if h in registry]
+
+    registry.unpin(shortlist)
+    registry.register([{'x': 10}])
+    assert shortlist not in registry and len(registry) == 3
+
+
+def test_registered_handle_kept_when_pinned_tables_fill_registry():
+    registry = DatasetRegistry(max_datasets=2)
+    pinned = [registry.register([{'x': i}], pin=True) for i in range(2)]
+    handle = registry.register([{'x': 2}])
+    assert handle in registry and all(h in registry for h in pinned) and len(registry) == 3
+    assert registry.get(handle)['x'].tolist() == [2]
+
+    later = registry.register([{'x': 3}])  # the oldest unpinned table goes, not the new one
+    assert later in registry and handle not in registry and len(registry) == 3
+
+
+def test_query_rows_chain_through_filter_and_score(tmp_path):
+    """query_database pages -> handle -> filter -> score, as the agent tools pass them"""
+    make_db(tmp_path / 'eea.db', n_facilities=40)
+    store = EEAStore(tmp_path / 'eea.db')
+    registry = DatasetRegistry()
+    page = store.search_facilities({'country': ['DE', 'SE']}, page_size=10, as_of_year=2024)
+    handle = registry.register(page['rows'], kind='eea_facilities')
+    while page['next_cursor']:
+        page = store.search_facilities({'country': ['DE', 'SE']}, cursor=page['next_cursor'], as_of_year=2024)
+        registry.append(handle, page['rows'])
+
+    leads = registry.get(handle)
+    assert len(leads) == 20 and set(leads['country']) == {'Germany', 'Sweden'}
+    decisions = LeadFilter(min_age=15, as_of_year=2024).evaluate(leads)
+    assert (decisions['region'] == 'EU').all()
+    assert decisions['passes_filter'].tolist() == (leads['plant_age'] > 15).tolist()
+
+    scores = score_leads_batch(leads[decisions['passes_filter'].to_numpy()], as_of_year=2024)
+    assert (scores['regulatory_points'] == 25).all() and (scores['age_points'] > 0).all()
+
+
+if __name__ == "__main__":
+    test_register_resolve_and_describe()
+    test_inline_leads_and_append()
+    test_least_recently_used_evicted()
@@ -0,0 +1,127 @@
+"""
+Test cases for the paged EEA SQLite store behind the query_database agent tool
+Filters must be parameterised, pages bounded and cursors must walk every match once
+"""
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'agents'))
+
+from eea_store import EEAStore, MAX_PAGE_SIZE, compile_filter
+
+
+def make_db(path, n_facilities=250):
+    facilities = pd.DataFrame({
+        'Facility_INSPIRE_ID': [f'F{i:04d}' for i in range(n_facilities)],
+        'nameOfFeature': [f'Plant {i}' for i in range(n_facilities)],
+        'parentCompanyName': [f'Co {i % 7}' for i in range(n_facilities)],
+        'city': [f'City {i}' for i in range(n_facilities)],
+        'countryCode': [['DE', 'SE', 'NO', 'PL'][i % 4] for i in range(n_facilities)],
+        'mainActivityCode': [['5(b)', '1(c)', '6(b)'][i % 3] for i in range(n_facilities)],
+        'mainActivityName': ['Incineration', 'Combustion', 'Paper'] * (n_facilities // 3) + ['Incineration'] * (n_facilities % 3),
+        'dateOfStartOfOperation': [f'{1970 + i % 50}-01-01' for i in range(n_facilities)],
+    })
+    releases = pd.DataFrame({
+        'Facility_INSPIRE_ID': [f'F{i:04d}' for i in range(0, n_facilities, 5)],
+        'reportingYear': [2018 + i % 6 for i in range(0, n_facilities, 5)],
+        'pollutantCode': 'PCDD+PCDF(DIOXINS+FURANS)',
+        'pollutantName': 'PCDD + PCDF (dioxins + furans) (as Teq)',
+        'totalPollutantQuantityKg': 0.0001,
+    })
+    installations = pd.DataFrame({
+        'Installation_INSPIRE_ID': [f'I{i:04d}' for i in range(n_facilities)],
+        'Parent_Facility_INSPIRE_ID': [f'F{i:04d}' for i in range(n_facilities)],
+    })
+    parts = pd.DataFrame({
+        'Installation_Part_INSPIRE_ID': [f'P{i:04d}' for i in range(2 * n_facilities)],
+        'Parent_Installation_INSPIRE_ID': [f'I{i // 2:04d}' for i in range(2 * n_facilities)],
+        'totalRatedThermalInput': [float(i % 60) for i in range(2 * n_facilities)],
+    })
+    with sqlite3.connect(path) as conn:
+        facilities.to_sql('2_ProductionFacility', conn, index=False)
+        releases.to_sql('2f_PollutantRelease', conn, index=False)
+        installations.to_sql('3_ProductionInstallation', conn, index=False)
+        parts.to_sql('4_ProductionInstallationPart', conn, index=False)
+    return facilities, releases, parts
+
+
+def test_cursor_walks_all_matches(tmp_path):
+    print("\n=== Testing keyset paging ===")
+    facilities, _, _ = make_db(tmp_path / 'eea.db')
+    store = EEAStore(tmp_path / 'eea.db')
+    filters = {'country': ['DE', 'SE'], 'activity_code': '5'}
+
+    page = store.search_facilities(filters, page_size=1000, as_of_year=2024)
+    assert page['page_size'] == MAX_PAGE_SIZE  # server-side cap
+    total = page['total_matches']
+
+    seen, cursor = [], None
+    while True:
+        page = store.search_facilities(filters, cursor=cursor, page_size=7, as_of_year=2024)
+        assert len(page['rows']) <= 7
+        seen += [row['facility_id'] for row in page['rows']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    expected = facilities[facilities['countryCode'].isin(['DE', 'SE'])
+                          & facilities['mainActivityCode'].str.startswith('5(')]['Facility_INSPIRE_ID']
+    assert seen == sorted(expected) and total == len(expected)
+    print(f"✓ {len(seen)} facilities in pages of 7")
+
+
+def test_pollutant_age_and_capacity_filters(tmp_path):
+    facilities, releases, parts = make_db(tmp_path / 'eea.db')
+    store = EEAStore(tmp_path / 'eea.db')
+    filters = {'pollutant': 'PCDD+PCDF(DIOXINS+FURANS)', 'year_from': 2020, 'min_age': 20, 'min_capacity_mw': 50}
+    page = store.search_facilities(filters, page_size=100, as_of_year=2024)
+
+    capacity = parts.groupby(parts['Parent_Installation_INSPIRE_ID'].str.replace('I', 'F'))['totalRatedThermalInput'].sum()
+    emitting = set(releases.loc[releases['reportingYear'] >= 2020, 'Facility_INSPIRE_ID'])
+    start = facilities.set_index('Facility_INSPIRE_ID')['dateOfStartOfOperation'].str[:4].astype(int)
+    expected = sorted(f for f in emitting if start[f] <= 2004 and capacity[f] >= 50)
+
+    assert [row['facility_id'] for row in page['rows']] == expected
+    assert all(row['plant_age'] >= 20 and row['capacity_mw'] >= 50 for row in page['rows'])
+
+
+def test_filter_values_are_bound_not_interpolated():
+    where, params = compile_filter({'country': "SE') OR 1=1 --"}, 2024)
+    assert "OR 1=1" not in where and params == ["SE') OR 1=1 --"]
+    with pytest.raises(ValueError, match="Unknown filter keys"):
+        compile_filter({'sql': 'DROP TABLE x'}, 2024)
+    with pytest.raises(ValueError, match="must be an integer"):
+        compile_filter({'year_from': '2019'}, 2024)
+
+
+def test_cursor_from_other_filter_rejected(tmp_path):
+    make_db(tmp_path / 'eea.db')
+    store = EEAStore(tmp_path / 'eea.db')
+    cursor = store.search_facilities({'country': 'DE'}, page_size=5)['next_cursor']
+    with pytest.raises(ValueError, match="different filter"):
+        store.search_facilities({'country': 'SE'}, cursor=cursor)
+
+
+def test_searches_from_worker_threads(tmp_path):
+    """query_database runs searches on executor threads; concurrent pages match sequential ones"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    make_db(tmp_path / 'eea.db')
+    store = EEAStore(tmp_path / 'eea.db')
+    filters = [{'country': code} for code in ('DE', 'SE', 'NO', 'PL')] * 5
+    expected = [store.search_facilities(f, page_size=30) for f in filters]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        pages = list(pool.map(lambda f: store.search_facilities(f, page_size=30), filters))
+    assert pages == expected
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cursor_walks_all_matches(Path(tmp))
+    test_filter_values_are_bound_not_interpolated()
@@ -0,0 +1,144 @@
+"""
+Test cases for the constant-memory export engine
+Partitions must match a pandas groupby, and every format must hold exactly the partitioned rows
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+
+from export_engine import PartitionedExport, excel_sheet_name, export_frame, partition_rows, tier_labels
+
+TIERS = [('critical', 80, 101), ('high_value', 60, 80), ('qualified', 40, 60)]
+
+
+def make_frame(n_rows=250, seed=4):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Facility': [f'Plant {i}' for i in range(n_rows)],
+        'Country': rng.choice(['Germany', 'Sweden', 'Poland', None], n_rows),
+        'Lead Score': rng.integers(0, 101, n_rows),
+        'Capacity': np.where(rng.random(n_rows) < 0.1, np.nan, rng.uniform(5, 300, n_rows)),
+    })
+
+
+def test_tier_labels_bounds():
+    print("\n=== Testing tier labels ===")
+    labels = tier_labels(pd.Series([100, 80, 79.9, 60, 59, 40, 39.9, -1, np.nan]), TIERS)
+    assert labels.tolist() == ['critical', 'critical', 'high_value', 'high_value', 'qualified', 'qualified',
+                               None, None, None]
+    # Overlapping tiers: the first listed wins
+    assert tier_labels([70], [('a', 60, 80), ('b', 0, 101)]).tolist() == ['a']
+    print("✓ inclusive lower, exclusive upper bounds")
+
+
+def test_partition_rows_matches_groupby():
+    frame = make_frame()
+    parts = partition_rows(frame['Country'])
+    expected = frame.groupby('Country').indices
+    assert set(parts) == set(expected)  # missing countries are dropped
+    for country, rows in parts.items():
+        assert rows.tolist() == expected[country].tolist()
+    assert partition_rows([]) == {}
+
+
+def test_add_partitions_counts_and_empty_sheets():
+    frame = make_frame(n_rows=30)
+    frame['Lead Score'] = 50  # every row qualified, the other tiers empty
+    export = PartitionedExport(frame)
+    counts = export.add_partitions(tier_labels(frame['Lead Score'], TIERS),
+                                   {'critical': 'Critical', 'high_value': 'High', 'qualified': 'Qualified'})
+    assert counts == {'critical': 0, 'high_value': 0, 'qualified': 30}
+    assert list(export.sheets) == ['Qualified']  # empty tiers skipped
+    export.add_sheet('Empty', np.empty(0, dtype=np.intp), skip_empty=False)
+    export.add_sheet('All')
+    assert export.row_counts() == {'Qualified': 30, 'Empty': 0, 'All': 30}
+
+
+def make_export(frame):
+    export = PartitionedExport(frame, chunk_rows=17)  # several chunks per sheet
+    export.add_partitions(tier_labels(frame['Lead Score'], TIERS),
+                          {'critical': 'CRITICAL: 80+', 'high_value': 'High value', 'qualified': 'Qualified'})
+    export.add_sheet('All leads')
+    return export
+
+
+def expected_sheets(frame):
+    labels = tier_labels(frame['Lead Score'], TIERS)
+    return {
+        'CRITICAL: 80+': frame[labels == 'critical'],
+        'High value': frame[labels == 'high_value'],
+        'Qualified': frame[labels == 'qualified'],
+        'All leads': frame,
+    }
+
+
+def test_write_xlsx_streams_every_sheet(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    frame = make_frame()
+    written = make_export(frame).write(tmp_path / 'leads', formats=('xlsx',))
+    assert written == {'xlsx': tmp_path / 'leads.xlsx'}
+
+    workbook = openpyxl.load_workbook(written['xlsx'])
+    expected = expected_sheets(frame)
+    assert workbook.sheetnames == [excel_sheet_name(name) for name in expected]
+    for name, rows in expected.items():
+        values = list(workbook[excel_sheet_name(name)].values)
+        assert list(values[0]) == list(frame.columns)
+        sheet = pd.DataFrame(values[1:], columns=frame.columns)
+        assert sheet['Facility'].tolist() == rows['Facility'].tolist()
+        assert sheet['Lead Score'].tolist() == rows['Lead Score'].tolist()
+        assert sheet['Country'].isna().sum() == rows['Country'].isna().sum()  # NaN written as empty cells
+
+
+def assert_sheet_files(frame, out_dir, fmt, read):
+    for name, rows in expected_sheets(frame).items():
+        stem = name.replace(': ', '_').replace('+', '').replace(' ', '_')
+        sheet = read(out_dir / f"{stem}.{fmt}")
+        assert sheet['Facility'].tolist() == rows['Facility'].tolist()
+        assert np.allclose(sheet['Capacity'], rows['Capacity'], equal_nan=True)
+
+
+def test_write_csv_per_sheet(tmp_path):
+    frame = make_frame()
+    written = make_export(frame).write(tmp_path / 'leads', formats=('csv',))
+    assert written == {'csv': tmp_path / 'leads_csv'}
+    assert_sheet_files(frame, written['csv'], 'csv', pd.read_csv)
+
+    with pytest.raises(ValueError, match="Unsupported format"):
+        make_export(frame).write(tmp_path / 'leads', formats=('xls',))
+
+
+def test_write_parquet_per_sheet(tmp_path):
+    pytest.importorskip("pyarrow")
+    frame = make_frame()
+    written = make_export(frame).write(tmp_path / 'leads', formats=('parquet',))
+    assert_sheet_files(frame, written['parquet'], 'parquet', pd.read_parquet)
+
+
+def test_export_frame_empty_csv(tmp_path):
+    frame = make_frame().iloc[:0]
+    path = export_frame(frame, tmp_path / 'empty.csv')
+    assert pd.read_csv(path).columns.tolist() == frame.columns.tolist()
+    with pytest.raises(ValueError, match="suffix"):
+        export_frame(frame, tmp_path / 'empty.txt')
+
+
+def test_lead_finder_export_without_xlsx(tmp_path):
+    """export_stage reports what was written instead of indexing the xlsx output"""
+    from waste_to_energy_lead_finder import export_stage
+
+    leads = make_frame(n_rows=40).rename(columns={'Facility': 'nameOfFeature', 'Country': 'countryCode',
+                                                  'Lead Score': 'lead_score'})
+    exported = export_stage(leads, str(tmp_path / 'wte'), formats=('csv',))
+    assert (tmp_path / 'wte_csv' / 'ALL_LEADS.csv').exists()
+    assert exported['tier_counts']['leads'].sum() == (leads['lead_score'] >= 40).sum()
+
+
+if __name__ == "__main__":
+    test_tier_labels_bounds()
+    test_partition_rows_matches_groupby()
@@ -0,0 +1,73 @@
+"""
+Test cases for the grouped facility index
+Every lookup must return the same rows, in the same order, as a boolean-mask filter
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+
+from facility_index import GroupedIndex
+
+
+def make_releases(n_rows=500, seed=8):
+    rng = np.random.default_rng(seed)
+    ids = rng.choice([f'F{i}' for i in range(40)] + [None], n_rows)
+    return pd.DataFrame({
+        'Facility_INSPIRE_ID': ids,
+        'nameOfFeature': [f'Plant {i}' if i else None for i in ids],
+        'city': rng.choice(['Malmo', 'Oslo', None], n_rows, p=[0.45, 0.45, 0.1]),
+        'reportingYear': rng.integers(2015, 2022, n_rows),
+        'quantity_kg': rng.random(n_rows),
+    }, index=np.arange(n_rows) * 3)  # non-default index: positions, not labels
+
+
+def test_lookups_match_mask_filter():
+    print("\n=== Testing single-key index ===")
+    releases = make_releases()
+    index = GroupedIndex(releases)
+    valid = releases['Facility_INSPIRE_ID'].dropna()
+
+    assert len(index) == valid.nunique() and index.keys == list(valid.unique())
+    for facility_id in index.keys:
+        expected = releases[releases['Facility_INSPIRE_ID'] == facility_id]
+        rows = index.rows(facility_id)
+        assert rows['quantity_kg'].tolist() == expected['quantity_kg'].tolist()
+        assert index.count(facility_id) == len(expected)
+    assert len(index.frame) == len(valid)  # missing keys dropped
+    assert (releases['quantity_kg'].to_numpy()[index.source_positions] == index.frame['quantity_kg']).all()
+    print(f"✓ {len(index)} facilities")
+
+
+def test_missing_keys():
+    index = GroupedIndex(make_releases())
+    assert 'F999' not in index and None not in index
+    assert index.bounds('F999') == (0, 0) and index.count('F999') == 0
+    empty = index.rows('F999')
+    assert empty.empty and list(empty.columns) == list(index.frame.columns)
+
+    nothing = GroupedIndex(pd.DataFrame({'Facility_INSPIRE_ID': [None, None], 'quantity_kg': [1.0, 2.0]}))
+    assert len(nothing) == 0 and nothing.frame.empty and list(nothing.groups()) == []
+
+
+def test_composite_key():
+    releases = make_releases()
+    index = GroupedIndex(releases, ['nameOfFeature', 'city'])
+    complete = releases.dropna(subset=['nameOfFeature', 'city'])
+    expected = complete.groupby(['nameOfFeature', 'city'], sort=False)
+
+    assert len(index.frame) == len(complete)  # rows with either key part missing dropped
+    assert index.keys == list(expected.groups)
+    for key, rows in index.groups():
+        assert rows['quantity_kg'].tolist() == expected.get_group(key)['quantity_kg'].tolist()
+    assert ('Plant F1', None) not in index
+    assert index.count(('Plant F999', 'Oslo')) == 0
+
+
+if __name__ == "__main__":
+    test_lookups_match_mask_filter()
+    test_missing_keys()
+    test_composite_key()
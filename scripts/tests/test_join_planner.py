@@ -0,0 +1,77 @@
+"""
+Test cases for the facility-grain join planner
+Part-level energy and emissions must be rolled up before the join, one row per facility
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+
+from join_planner import assert_unique, join_facility_tables
+
+
+def make_tables():
+    """F1: two installations, three parts, two fuels; F2: no energy rows; F3: no installations"""
+    facilities = pd.DataFrame({
+        'Facility_INSPIRE_ID': ['F1', 'F2', 'F3', 'F1'],  # F1 listed twice
+        'nameOfFeature': ['Plant 1', 'Plant 2', 'Plant 3', 'Plant 1'],
+    })
+    installations = pd.DataFrame({
+        'Installation_INSPIRE_ID': ['I1', 'I2', 'I3'],
+        'Parent_Facility_INSPIRE_ID': ['F1', 'F1', 'F2'],
+    })
+    install_parts = pd.DataFrame({
+        'Installation_Part_INSPIRE_ID': ['P1', 'P2', 'P3', 'P4'],
+        'Parent_Installation_INSPIRE_ID': ['I1', 'I1', 'I2', 'I3'],
+    })
+    energy = pd.DataFrame({
+        'Installation_Part_INSPIRE_ID': ['P1', 'P1', 'P2', 'P3', 'P1'],
+        'reportingYear': [2023, 2023, 2023, 2023, 2022],
+        'fuelInput': ['Coal', 'Biomass', 'Biomass', 'Biomass', 'Coal'],
+        'energyInputTJ': [100.0, 40.0, 50.0, 30.0, 999.0],
+    })
+    emissions = pd.DataFrame({
+        'Installation_Part_INSPIRE_ID': ['P1', 'P1', 'P3', 'P4', 'P4'],
+        'reportingYear': [2023, 2023, 2023, 2023, 2022],
+        'pollutant': ['NOX', 'SO2', 'NOX', 'NOX', 'NOX'],
+        'totalPollutantQuantityTNE': [10.0, 5.0, 1.0, 7.0, 99.0],
+    })
+    return facilities, installations, install_parts, energy, emissions
+
+
+def test_one_row_per_facility():
+    """Totals are summed over parts and fuels without fan-out"""
+    print("\n=== Testing facility-grain join ===")
+    facilities, installations, install_parts, energy, emissions = make_tables()
+    classes = pd.Series({'F1': 'WI', 'F2': 'WI', 'F3': 'WI'})
+
+    joined = join_facility_tables(facilities, installations, install_parts, energy, emissions, 2023, classes)
+    assert joined['Facility_INSPIRE_ID'].tolist() == ['F1', 'F2', 'F3']
+    joined = joined.set_index('Facility_INSPIRE_ID')
+
+    assert joined.loc['F1', 'n_installations'] == 2
+    assert joined.loc['F1', 'energyInputTJ'] == pytest.approx(220.0)
+    assert joined.loc['F1', 'n_energy_parts'] == 3
+    assert joined.loc['F1', 'fuelInput'] == 'Biomass'  # 120 TJ biomass vs 100 TJ coal
+    assert joined.loc['F1', 'totalPollutantQuantityTNE'] == pytest.approx(16.0)
+    assert joined.loc['F1', 'flueGasNm3'] > 0
+
+    assert np.isnan(joined.loc['F2', 'energyInputTJ'])
+    assert joined.loc['F2', 'totalPollutantQuantityTNE'] == pytest.approx(7.0)
+    assert joined.loc['F3', 'n_installations'] == 0
+    print("✓ One row per facility with part-level totals")
+
+
+def test_cardinality_violation_raises():
+    df = pd.DataFrame({'Facility_INSPIRE_ID': ['F1', 'F1', 'F2']})
+    with pytest.raises(ValueError, match="one row per facility"):
+        assert_unique(df, 'Facility_INSPIRE_ID', 'facility')
+
+
+if __name__ == "__main__":
+    test_one_row_per_facility()
+    test_cardinality_violation_raises()
@@ -0,0 +1,70 @@
+"""
+Test cases for the export_leads workbook writer
+Every lead lands on exactly one priority sheet plus ALL LEADS, with the column template applied
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'agents'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from lead_export import ALL_LEADS_SHEET, PRIORITY_SHEETS, export_leads_workbook
+from lead_scoring import score_leads_batch
+from test_lead_scoring import EDGE_CASES, MOCK_PLANTS
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def test_priority_sheets_partition_leads(tmp_path):
+    print("\n=== Testing priority partition ===")
+    leads = [dict(lead) for lead in MOCK_PLANTS + EDGE_CASES]
+    leads[-1]['priority'] = 1  # explicit priority wins over the score tier
+    leads[0]['reasons'] = ['listed', 'reasons']
+
+    summary = export_leads_workbook(leads, tmp_path / 'leads.xlsx')
+    counts = summary['row_counts']
+    assert list(counts) == list(PRIORITY_SHEETS.values()) + [ALL_LEADS_SHEET]
+    assert sum(counts[name] for name in PRIORITY_SHEETS.values()) == counts[ALL_LEADS_SHEET] == len(leads)
+
+    workbook = openpyxl.load_workbook(summary['path'])
+    assert workbook.sheetnames == list(counts)
+    for name, count in counts.items():
+        assert workbook[name].max_row == count + 1
+
+    all_leads = pd.DataFrame(list(workbook[ALL_LEADS_SHEET].values)[1:],
+                             columns=[c.value for c in workbook[ALL_LEADS_SHEET][1]])
+    expected = score_leads_batch(leads).set_index('facility')['total_score']
+    assert (all_leads.set_index('facility')['total_score'] == expected[all_leads['facility']]).all()
+    assert all_leads['total_score'].is_monotonic_decreasing
+    critical = [row[3] for row in workbook[PRIORITY_SHEETS[1]].iter_rows(min_row=2, values_only=True)]
+    assert leads[-1]['facility'] in critical
+    print(f"✓ {len(leads)} leads, {counts}")
+
+
+def test_column_template_and_extra_formats(tmp_path):
+    pytest.importorskip("pyarrow")
+    summary = export_leads_workbook(MOCK_PLANTS + EDGE_CASES, tmp_path / 'out' / 'leads',
+                                    also_write=['csv', 'parquet'])
+    sheet = openpyxl.load_workbook(summary['path'])[ALL_LEADS_SHEET]
+    header = [c.value for c in sheet[1]]
+    throughput = header.index('waste_throughput_tonnes_year') + 1
+    assert sheet.cell(row=1, column=1).font.b and sheet.freeze_panes == 'A2'
+    assert sheet.cell(row=2, column=throughput).number_format == '#,##0'
+    assert sheet.column_dimensions['D'].width == 45
+
+    parquet = pd.read_parquet(os.path.join(summary['also_written']['parquet'], 'ALL_LEADS_-_MASTER_LIST.parquet'))
+    assert len(parquet) == len(MOCK_PLANTS + EDGE_CASES)
+    assert len(os.listdir(summary['also_written']['csv'])) == len(PRIORITY_SHEETS) + 1
+
+    with pytest.raises(ValueError, match="Unsupported export format"):
+        export_leads_workbook(MOCK_PLANTS, tmp_path / 'x.xlsx', also_write=['json'])
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_priority_sheets_partition_leads(Path(tmp))
@@ -0,0 +1,101 @@
+"""
+Test cases for the streaming age / region lead filter
+Mask-based decisions must match should_filter_lead; iterators are consumed chunk by chunk
+"""
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'agents'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from lead_filters import LeadFilter, parse_years
+from lead_scoring import score_leads_batch
+from test_wte_scoring import TEST_FACILITIES, should_filter_lead
+
+VARIANTS = [
+    {'name': 'No year', 'country': 'Germany'},
+    {'name': 'No country', 'Start': 1990},
+    {'name': 'Date string', 'country': 'Japan', 'plant_start_year': '1999-06-01'},
+    {'name': 'Bad year', 'country': 'Italy', 'start_year': 'unknown'},
+    {'name': 'Falsy first field', 'country': 'China', 'plant_start_year': 0, 'Start': 2004},
+    {'name': 'Built this year', 'country': 'Poland', 'Start': datetime.now().year},
+    {'name': 'Future', 'country': 'Spain', 'Start': datetime.now().year + 3},
+]
+
+
+def test_matches_should_filter_lead():
+    print("\n=== Testing mask decisions against should_filter_lead ===")
+    leads = TEST_FACILITIES + VARIANTS
+    for min_age, regions in [(15, None), (25, ['EU']), (0, ['EU', 'N.America', 'Other'])]:
+        decisions = LeadFilter(min_age=min_age, regions=regions).evaluate(leads)
+        for lead, (_, row) in zip(leads, decisions.iterrows()):
+            expected = should_filter_lead(lead, min_age=min_age, regulatory_regions=regions)
+            assert (bool(row['passes_filter']), row['filter_reason']) == expected, lead['name']
+    print(f"✓ {len(leads)} leads x 3 criteria identical")
+
+
+def test_parse_years():
+    values = [1995, 1995.0, 1995.5, '1998-05-01', ' 2001 ', 'n/a', pd.Timestamp('2003-02-01'), None]
+    years = parse_years(values).tolist()
+    assert years[0] == years[1] == 1995 and years[3] == 1998 and years[4] == 2001 and years[6] == 2003
+    assert pd.isna(years[2]) and pd.isna(years[5]) and pd.isna(years[7])
+
+
+def test_filter_and_scorer_agree_on_age():
+    """Leads the filter ages are scored with the same age (whole floats, dates, EEA field)"""
+    leads = [
+        {'facility': 'Float year', 'country': 'Germany', 'Start': 1995.0},
+        {'facility': 'EEA date', 'country': 'Italy', 'dateOfStartOfOperation': '1990-01-01'},
+        {'facility': 'Timestamp', 'country': 'Poland', 'start_year': pd.Timestamp('2000-06-01')},
+    ]
+    decisions = LeadFilter(min_age=15, as_of_year=2024).evaluate(leads)
+    scores = score_leads_batch(leads, as_of_year=2024)
+    assert decisions['passes_filter'].all()
+    assert scores['plant_age'].tolist() == decisions['plant_age'].tolist() == [29, 34, 24]
+    assert (scores['age_points'] == 20).all()
+
+
+def test_streams_iterator_in_chunks():
+    print("\n=== Testing streaming over a generator ===")
+    pulled = []
+
+    def leads(n):
+        for i in range(n):
+            pulled.append(i)
+            yield {'facility': f'Plant {i % 50}', 'country': ['Germany', 'USA'][i % 2],
+                   'Start': 1980 + i % 40 if i < 50 else None}
+
+    lead_filter = LeadFilter(min_age=15, as_of_year=2024)
+    stream = lead_filter.stream(leads(1000), chunk_size=100)
+    first = next(stream)
+    assert len(first) == 100 and len(pulled) == 100  # nothing read ahead
+
+    chunks = [first] + list(stream)
+    result = pd.concat(chunks)
+    assert len(result) == 1000 and len(pulled) == 1000
+    # Leads after the first 50 have no start year: the per-facility cache fills it
+    assert result['plant_age'].notna().all()
+    assert (result['plant_age'].to_numpy()[50:] == result['plant_age'].to_numpy()[:50].tolist() * 19).all()
+    assert not result.loc[result['country'] == 'USA', 'passes_filter'].any()
+    print(f"✓ {len(chunks)} chunks of 100, {result['passes_filter'].sum()} passing")
+
+
+def test_memo_limit_keeps_earlier_values(monkeypatch):
+    """Overflowing the start-year memo must not lose values the current chunk still looks up"""
+    import lead_filters
+    monkeypatch.setattr(lead_filters, 'MAX_MEMO_VALUES', 3)
+    lead_filter = LeadFilter(min_age=0, as_of_year=2024)
+    lead_filter.evaluate([{'Start': 2000}, {'Start': 2001}])
+    second = lead_filter.evaluate([{'Start': 2000}, {'Start': 2002}, {'Start': 2003}])
+    assert second['plant_age'].tolist() == [24, 22, 21]
+    assert len(lead_filter._year_memo) == 3
+
+
+if __name__ == "__main__":
+    test_matches_should_filter_lead()
+    test_parse_years()
+    test_filter_and_scorer_agree_on_age()
+    test_streams_iterator_in_chunks()
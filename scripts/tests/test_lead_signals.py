@@ -0,0 +1,62 @@
+"""
+Test cases for the lead signal extraction stage
+Free text is parsed once into typed columns; scoring those must match scoring the raw leads
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'agents'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from lead_signals import SIGNAL_COLUMNS, extract_signals
+from lead_scoring import score_leads_batch
+from test_lead_scoring import EDGE_CASES, MOCK_PLANTS
+
+
+def test_typed_signals():
+    print("\n=== Testing typed signal columns ===")
+    signals = extract_signals([
+        {'emission_levels': 'PCDD/PCDF approaching limits', 'waste_heat_potential': 'Additional 30 MW thermal',
+         'urgency': 'Upgrade planned'},
+        {'emission_levels': 'NOx within 20% of limit', 'waste_heat_potential': 'HIGH - 18 MW', 'plant_start_year': 1999,
+         'current_recovery': 'Boiler end-of-life 2026'},
+        {'waste_heat_potential': '12.5 MW'},
+    ])
+    assert str(signals['dioxin_status'].dtype) == 'category' and signals['dioxin_status'].cat.ordered
+    assert list(signals['dioxin_status']) == ['approaching', 'none', 'none']
+    assert list(signals['emission_status']) == ['approaching', 'at_risk', 'none']
+    assert list(signals['heat_potential_mw']) == [30.0, 18.0, 12.5]
+    assert list(signals['heat_level']) == ['very_high', 'high', 'none']  # 30 MW: by threshold, not by literal
+    assert list(signals['urgency_level']) == ['high', 'critical', 'none']
+    assert signals['start_year'].iloc[1] == 1999 and pd.isna(signals['start_year'].iloc[0])
+    assert signals['efficiency_pct'].tolist() == [75.0] * 3
+    print("✓ Enums, MW figures and defaults parsed")
+
+
+def test_scoring_from_stored_signals(tmp_path):
+    print("\n=== Testing scoring from stored signals ===")
+    pytest.importorskip("pyarrow")
+    leads = MOCK_PLANTS + EDGE_CASES
+    direct = score_leads_batch(leads, as_of_year=2024)
+
+    signals = extract_signals(leads)
+    signals.to_parquet(tmp_path / 'signals.parquet')
+    stored = pd.read_parquet(tmp_path / 'signals.parquet')
+    assert all(c in stored.columns for c in SIGNAL_COLUMNS)
+    assert not any(c in stored.columns for c in ('emission_levels', 'waste_heat_potential', 'urgency'))
+
+    rescored = score_leads_batch(stored, as_of_year=2024)
+    columns = ['total_score', 'qualification', 'reason_codes', 'emission_points', 'heat_points', 'urgency_points']
+    pd.testing.assert_frame_equal(rescored[columns], direct[columns])
+    print(f"✓ {len(leads)} leads rescored from parquet without the raw text")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_typed_signals()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_scoring_from_stored_signals(Path(tmp))
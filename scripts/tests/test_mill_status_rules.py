@@ -0,0 +1,134 @@
+"""
+Test cases for the compiled mill status rules
+The rule table must reproduce the original build_verified_mills keyword chain
+"""
+import itertools
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+
+from mill_status_rules import StatusMatcher, load_status_rules
+
+
+def reference_status(row):
+    """get_status as in the original build_verified_mills.py"""
+    facility = str(row.get('Facility', ''))
+    company = str(row.get('Parent Company', ''))
+    city = str(row.get('City', ''))
+
+    # Exact matches first
+    if 'Kvarnsveden' in facility:
+        return 'CLOSED', 'Permanently closed Sep 2021. Site sold to Northvolt for EV battery gigafactory.'
+    if 'Rottneros Bruk' in facility and 'Rottneros' in city:
+        return 'OPEN - Partial change', 'Groundwood/TMP line closed Dec 2022. CTMP expanded to 165,000 t/yr (SEK 220M invest 2023-24). Still active.'
+    if 'Vallviks' in facility:
+        return 'OPEN', 'Rottneros AB. ECF kraft pulp ~219,000 t/yr. Compliance challenges 2023. 24 jobs cut. Still active.'
+    if 'Nordic Paper' in company and 'SAFFLE' in city.upper():
+        return 'OPEN - Partial change', 'Pulp line closed Jan 2022 (switched to external pulp). Paper machines (PFAS-free greaseproof) continue. ~180 employees. Nov 2025: 37 job cuts & filing closing.'
+    if 'Nordic Paper' in company and 'BACKHAMMAR' in city.upper().replace('A','A').replace('Ä','A'):
+        return 'OPEN - Investing', 'SEK 850M investment in new wood room + electrostatic filter 2024-25. Permit for 20%+ capacity increase granted Feb 2023.'
+    if 'Nordic Paper' in company and 'MOTFORS' in city.upper():
+        return 'OPEN', 'Specialty kraft paper, ~80 employees. Nov 2025: 9 job cut warning. No full closure announced.'
+    if 'Hyltebruk' in city.upper() or 'HYLTE' in city.upper():
+        return 'OPEN - New Owner: Hylte Paper', 'Sold by Stora Enso to Sweden Timber Apr 2023. Renamed Hylte Paper. 245,000 t/yr newsprint, ~270 employees.'
+    if 'NYMOLLA' in city.upper() or 'NYMALLA' in city.upper():
+        return 'OPEN - New Owner: Sylvamo', 'Sold by Stora Enso to Sylvamo (US) Jan 2023. 485,000 t/yr uncoated woodfree. 520 employees.'
+    if 'LESSEBO' in city.upper():
+        return 'OPEN - New Owner: Lessebo Bruk', 'Vida Paper (previous owner) went insolvent 2022. Norwegian investors acquired Feb 2023 as Lessebo Bruk. Uncoated fine paper.'
+    if 'Fiskeby' in facility:
+        return 'OPEN - New Owner: RDM Group', 'Acquired by Italian RDM Group May 2023. 170,000 t/yr recovered-fibre board. ~200 employees.'
+    if 'Aspa' in facility:
+        return 'OPEN - New Owner: Sweden Timber', 'Sold by Ahlstrom to Sweden Timber Oct 2024. 200,000 t/yr specialty pulp, 174 employees.'
+    if 'Munksjo' in facility and 'BILLINGSFORS' in city.upper():
+        return 'OPEN - Renamed: Ahlstrom', 'Ahlstrom-Munksjo rebranded to Ahlstrom 2022. ~70,000 t/yr specialty/electrotechnical paper. PulpEye analyzer 2024.'
+    if 'BillerudKorsnas' in company or 'Billerud' in company:
+        return 'OPEN - Renamed: Billerud', 'BillerudKorsnas renamed to Billerud Oct 2022. All Swedish mills remain active.'
+    if 'Smurfit' in company:
+        return 'OPEN - Renamed: Smurfit Westrock', 'Smurfit Kappa + WestRock merger completed Jul 2024. Europes largest kraftliner, 700,000+ t/yr, ~510 employees.'
+    if 'Metsaboard' in company.replace(' ','').lower() or ('Metsa Board' in company and 'HUSUM' in city.upper()):
+        return 'OPEN - Expanding', 'EUR 230M BM1 expansion complete, inaugurated Apr 2024. 600,000 t/yr FBB. BM2 conversion suspended Feb 2025 but operating.'
+    if 'Metsatissue' in company.replace(' ','').lower() or 'Tissue' in company:
+        return 'OPEN - Expanding', 'EUR 230M tissue machine investment. New machine planned H2 2025. Capacity doubling to 145,000 t/yr.'
+    if 'Mondi' in company:
+        return 'OPEN - Investing', 'Major modernisation approved Mar 2023 (new cooking plant + bark boiler, complete end 2026). 377 employees, ~EUR 110M revenue 2024.'
+    if 'SCA Obbola' in facility:
+        return 'OPEN - Expanding', 'New worlds-largest kraftliner machine started Q1 2023. 725,000 t/yr. Ramp-up resolved 2025.'
+    if 'SCA Munksund' in facility or 'Munksund' in facility:
+        return 'OPEN - Investing', 'SEK 150M investment in black liquor + pine oil (2023-24). ~300 employees, 400,000 t/yr kraftliner.'
+    if 'SCA' in company and ('OSTRAND' in city.upper() or 'TIMRA' in city.upper() or 'Ostrand' in facility or 'Astrands' in facility):
+        return 'OPEN', 'Ostrand: worlds largest single-line NBSK pulp, 900,000 t/yr. Ongoing quality improvements 2024.'
+    if 'STORA ENSO PULP' in company.upper() or ('Skutskar' in facility):
+        return 'OPEN - Investing', 'EUR 40M fluff pulp upgrade 2022-24. Europes largest fluff pulp producer. CO2 capture pilot 2024.'
+    if 'Stora Enso' in company and 'SKOGHALL' in city.upper():
+        return 'OPEN - Expanding', 'Board machine rebuild H2 2023, added ~100,000 t/yr. Now 900,000+ t/yr packaging board.'
+    if 'Stora Enso' in company and 'FORS' in city.upper():
+        return 'OPEN', 'Fossil-CO2-free folding boxboard mill. Active and unaffected by 2023 Stora Enso restructuring.'
+    if 'Waggeryd' in facility:
+        return 'OPEN', 'BCTMP 190,000-225,000 t/yr. 45 employees. ATA Timber Group owned. Active exports.'
+    if 'Domsjo' in facility or 'Domsj' in facility:
+        return 'OPEN', 'Aditya Birla Group. Dissolving pulp 165,657 t (FY2024), lignin, bioethanol. 20-yr Ecohelix deal Dec 2024.'
+    if 'Iggesund' in facility:
+        return 'OPEN', 'Holmen Iggesund. Premium paperboard. Valmet reel control upgrade 2025. EcoVadis Platinum rated.'
+    if 'Holmen Paper' in company and 'HALLSTA' in city.upper():
+        return 'OPEN', 'Holmen Paper. 2 machines (LWU + specialty). ~370 employees. Condition monitoring upgrades ongoing.'
+    if 'Holmen Paper' in company and 'NORRKOPING' in city.upper().replace('O','O'):
+        return 'OPEN - Investing', 'Holmen Braviken. SEK 450M rebuild PM52 completed autumn 2024. Added fluting/packaging. ~605,000 t/yr.'
+    if 'Sodra' in company.replace('o','o').replace('o','o') or 'Sodra' in company:
+        return 'OPEN - Investing', 'Sodra Cell. All 3 mills (Monsterass, Morrum, Varo) active. Lignin plant under construction for 2027. ABB advanced process control 2024.'
+    if 'Edet' in facility or 'Essity' in company:
+        return 'OPEN', 'Essity Hygiene & Health AB. Edet bruk active.'
+    if 'Ahlstrom' in company:
+        return 'OPEN', 'Ahlstrom (rebranded from Ahlstrom-Munksjo 2022). Mill active.'
+
+    return 'OPEN', 'Active as of EEA 2021 data. No closure reported in web research.'
+
+
+FACILITIES = ['STORA ENSO PAPER AB, Kvarnsveden Mill', 'Rottneros Bruk AB', 'Vallviks Bruk', 'Fiskeby Board AB',
+              'Aspa Bruk', 'Munksjo Paper', 'SCA Obbola AB', 'SCA Munksund AB', 'Ostrand Massafabrik',
+              'Skutskar Bruk', 'Waggeryd Cell AB', 'Domsjo Fabriker', 'Iggesund Paperboard', 'Edet Bruk',
+              'Generic Mill AB']
+COMPANIES = ['Nordic Paper AB', 'BillerudKorsnas AB', 'Smurfit Kappa', 'Metsa Board Sverige AB', 'Metsa Tissue AB',
+             'Mondi AB', 'SCA AB', 'STORA ENSO PULP AB', 'Stora Enso AB', 'Holmen Paper AB', 'Sodra Cell AB',
+             'Essity AB', 'Ahlstrom AB', 'Unknown Owner']
+CITIES = ['Rottneros', 'Saffle', 'BACKHAMMAR', 'Motfors', 'Hyltebruk', 'Nymolla', 'Lessebo', 'Billingsfors',
+          'Husum', 'Timra', 'Skoghall', 'Fors', 'Hallstavik', 'Norrkoping', 'Stockholm']
+
+
+def test_rules_match_original_chain():
+    print("\n=== Testing compiled rules against the keyword chain ===")
+    mills = pd.DataFrame(list(itertools.product(FACILITIES, COMPANIES, CITIES)),
+                         columns=['Facility', 'Parent Company', 'City'])
+    result = StatusMatcher(load_status_rules()).match(mills)
+
+    # The original 'Metsaboard' in company.lower() never matched, so Metsa Board only
+    # counted in Husum; the rule now matches the company anywhere (see next test)
+    same = ~((mills['Parent Company'] == 'Metsa Board Sverige AB') & (mills['City'] != 'Husum'))
+    expected = [reference_status(row) for row in mills[same].to_dict('records')]
+    assert list(zip(result.loc[same, 'status'], result.loc[same, 'note'])) == expected
+    print(f"✓ {len(mills)} mills, {result['rule'].nunique()} rules used")
+
+
+def test_diacritics_and_missing_values():
+    mills = pd.DataFrame({
+        'Facility': ['Bruk', None, 'Bruk'],
+        'Parent Company': ['Nordic Paper AB', 'Södra Skogsägarna', 'Metsaboard Sverige AB'],
+        'City': ['Bäckhammar', None, 'Stockholm'],
+    })
+    result = StatusMatcher(load_status_rules()).match(mills)
+    assert result['status'].tolist() == ['OPEN - Investing', 'OPEN - Investing', 'OPEN - Expanding']
+
+
+def test_rule_without_pattern_rejected(tmp_path):
+    path = tmp_path / 'rules.csv'
+    path.write_text("facility,company,city,status,note\n,,,CLOSED,no pattern\n")
+    with pytest.raises(ValueError, match="has no pattern"):
+        load_status_rules(path)
+
+
+if __name__ == "__main__":
+    test_rules_match_original_chain()
+    test_diacritics_and_missing_values()
@@ -0,0 +1,160 @@
+"""
+Test cases for the sector peer percentile table
+Signals must match a plain pandas groupby rank, whether built, batched or read back from SQLite
+"""
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from peer_benchmarks import PEER_GROUP, PeerTable, build_peer_table, load_peer_table
+from sector_risk_scanner import MIN_PEERS, scan_sector_risk
+from test_sector_risk_scanner import make_tables
+
+NOX = ['Nitrogen oxides (NOx/NO2)', 'Nitrogen oxides']
+
+
+def make_inputs(n_facilities=60, seed=5):
+    rng = np.random.default_rng(seed)
+    ids = [f'F{i}' for i in range(n_facilities)]
+    facilities = pd.DataFrame({
+        'Facility_INSPIRE_ID': ids,
+        'mainActivityCode': rng.choice(['1(c)', '5(b)', '6(b)'], n_facilities),
+    })
+    n_rows = n_facilities * 12
+    releases = pd.DataFrame({
+        'Facility_INSPIRE_ID': rng.choice(ids, n_rows),
+        'reportingYear': rng.choice([2020, 2021], n_rows),
+        'pollutantName': rng.choice(['Nitrogen oxides (NOx/NO2)', 'Sulphur oxides', 'Carbon monoxide'], n_rows),
+        'medium': rng.choice(['AIR', 'WATER'], n_rows),
+        'totalPollutantQuantityKg': rng.choice([100.0, 2500.0, 40000.0, 700000.0], n_rows) * rng.random(n_rows),
+    })
+    energy = pd.DataFrame({
+        'Facility_INSPIRE_ID': ids * 2,
+        'reportingYear': [2020] * n_facilities + [2021] * n_facilities,
+        'energyInputTJ': np.where(rng.random(2 * n_facilities) < 0.2, np.nan, rng.uniform(10, 500, 2 * n_facilities)),
+    })
+    return facilities, releases, energy
+
+
+def reference_table(facilities, releases, energy):
+    """Independent pandas reference: sum per key, then rank within each peer group"""
+    table = releases.groupby(['Facility_INSPIRE_ID', 'reportingYear', 'pollutantName', 'medium'],
+                             as_index=False)['totalPollutantQuantityKg'].sum()
+    table = table.merge(facilities, on='Facility_INSPIRE_ID').merge(
+        energy, on=['Facility_INSPIRE_ID', 'reportingYear'], how='left')
+    table['intensity'] = table['totalPollutantQuantityKg'] / table['energyInputTJ']
+    peers = table.groupby(PEER_GROUP)
+    table['percentile'] = peers['totalPollutantQuantityKg'].rank(pct=True)
+    table['intensity_percentile'] = peers['intensity'].rank(pct=True)
+    table['peer_count'] = peers['totalPollutantQuantityKg'].transform('size')
+    return table
+
+
+def assert_matches_reference(peer_table, reference):
+    for row in reference.itertuples(index=False):
+        signal = peer_table.lookup(row.Facility_INSPIRE_ID, row.reportingYear, row.pollutantName, row.medium)
+        assert np.isclose(signal.quantity_kg, row.totalPollutantQuantityKg)
+        assert np.isclose(signal.percentile, row.percentile)
+        assert np.isclose(signal.intensity_percentile, row.intensity_percentile, equal_nan=True)
+        assert signal.peer_count == row.peer_count
+
+
+def test_signals_match_groupby_reference():
+    print("\n=== Testing peer percentiles against a pandas groupby ===")
+    facilities, releases, energy = make_inputs()
+    reference = reference_table(facilities, releases, energy)
+    peer_table = build_peer_table(releases, facilities, energy)
+
+    assert len(peer_table) == len(reference)
+    assert_matches_reference(peer_table, reference)
+
+    # facility_signals returns the same signals keyed by (pollutant, medium)
+    some = reference[(reference['Facility_INSPIRE_ID'] == 'F7') & (reference['reportingYear'] == 2021)]
+    signals = peer_table.facility_signals('F7', 2021)
+    assert sorted(signals) == sorted(zip(some['pollutantName'], some['medium']))
+    assert peer_table.facility_signals('missing', 2021) == {}
+    print(f"✓ {len(reference)} facility/pollutant/year rows match")
+
+
+def test_batch_percentiles_match_lookup_any():
+    facilities, releases, energy = make_inputs()
+    # Odd facilities report NOx under its older name, and some under both (the first alias wins)
+    renamed = releases['Facility_INSPIRE_ID'].str[1:].astype(int) % 2 == 1
+    releases.loc[renamed & (releases.index % 3 > 0), 'pollutantName'] = releases['pollutantName'].replace(
+        'Nitrogen oxides (NOx/NO2)', 'Nitrogen oxides')
+    peer_table = build_peer_table(releases, facilities, energy)
+    ids = [f'F{i}' for i in range(70)]  # the last ten report nothing
+    percentile, peer_count = peer_table.percentiles(ids, 2021, NOX)
+    for row, facility_id in enumerate(ids):
+        signal = peer_table.lookup_any(facility_id, 2021, NOX)
+        if signal is None:
+            assert np.isnan(percentile[row]) and peer_count[row] == 0
+        else:
+            assert percentile[row] == signal.percentile and peer_count[row] == signal.peer_count
+    assert np.isnan(percentile[-10:]).all()
+    assert [len(a) for a in peer_table.percentiles([], 2021, NOX)] == [0, 0]
+
+
+def test_persisted_table_round_trip(tmp_path):
+    facilities, releases, energy = make_inputs()
+    db_path = tmp_path / 'converted.db'
+    assert load_peer_table(db_path) is None  # no database yet
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE other (x INTEGER)")
+    conn.commit()
+    assert load_peer_table(db_path) is None  # database without the table
+
+    build_peer_table(releases, facilities, energy).to_sql(conn)
+    conn.close()
+    loaded = load_peer_table(db_path)
+    assert isinstance(loaded, PeerTable)
+    ids = [f'F{i}' for i in range(60)]
+    for built, read in zip(build_peer_table(releases, facilities, energy).percentiles(ids, 2021, NOX),
+                           loaded.percentiles(ids, 2021, NOX)):
+        assert np.array_equal(built, read, equal_nan=True)
+    assert_matches_reference(loaded, reference_table(facilities, releases, energy))
+
+
+def test_readers_default_to_the_imported_database():
+    """The finder's default --peer-db is the database import_v16 writes the table into"""
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'download'))
+    import import_v16
+    from waste_to_energy_lead_finder import PEER_DB_PATH
+
+    assert PEER_DB_PATH == import_v16.DB_PATH
+
+
+def test_sector_scan_scores_peer_percentiles():
+    facilities, releases = make_tables(n_facilities=60, seed=11)
+    nox = pd.DataFrame({  # every facility reports NOx, so each activity has enough peers to rank
+        'Facility_INSPIRE_ID': facilities['Facility_INSPIRE_ID'],
+        'reportingYear': 2021,
+        'pollutantName': 'Nitrogen oxides',
+        'medium': 'AIR',
+        'totalPollutantQuantityKg': np.linspace(1000.0, 150000.0, len(facilities)),
+    })
+    releases = pd.concat([releases, nox], ignore_index=True)
+    peer_table = build_peer_table(releases, facilities)
+    plain = scan_sector_risk(facilities, releases, year=2021).facilities
+    ranked = scan_sector_risk(facilities, releases, year=2021, peer_table=peer_table).facilities
+
+    percentile, peer_count = peer_table.percentiles(ranked['Facility_INSPIRE_ID'].tolist(), 2021, NOX)
+    scored = peer_count >= MIN_PEERS
+    expected = np.where(scored & (percentile >= 0.9), 10, np.where(scored & (percentile >= 0.75), 5, 0))
+    assert expected.any()
+    assert (ranked['risk_score'] == np.minimum(plain['risk_score'] + expected, 100)).all()
+    top = ranked['risk_flags'].str.contains('Top-decile NOx among')
+    assert (top == (expected == 10)).all()
+
+
+if __name__ == "__main__":
+    test_signals_match_groupby_reference()
+    test_batch_percentiles_match_lookup_any()
+    test_sector_scan_scores_peer_percentiles()
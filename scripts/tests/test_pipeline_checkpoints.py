@@ -0,0 +1,108 @@
+"""
+Test cases for content-hashed stage checkpoints
+A rerun must resume from the first stage whose inputs changed
+"""
+import importlib
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+
+pytest.importorskip("pyarrow")
+
+from pipeline_checkpoints import StagedPipeline, frame_hash
+
+
+def filter_stage(facilities, country):
+    return {'selected': facilities[facilities['countryCode'] == country]}
+
+
+def total_stage(selected):
+    return {'totals': selected.groupby('countryCode', as_index=False)['energyInputTJ'].sum()}
+
+
+def run_stages(checkpoint_dir, facilities, country='DE'):
+    pipeline = StagedPipeline(checkpoint_dir, verbose=False)
+    selected = pipeline.run('filter', filter_stage, inputs={'facilities': facilities}, params={'country': country})
+    totals = pipeline.run('total', total_stage, inputs={'selected': selected['selected']})
+    return totals['totals'], pipeline.timing_report()
+
+
+def test_resume_from_first_changed_stage(tmp_path):
+    """Unchanged inputs load every stage; an edit outside the filter reruns only the filter"""
+    print("\n=== Testing checkpoint resume ===")
+    facilities = pd.DataFrame({
+        'countryCode': ['DE', 'DE', 'SE', 'NL'],
+        'energyInputTJ': [100.0, 250.0, 80.0, 40.0],
+    })
+
+    first, timings = run_stages(tmp_path, facilities)
+    assert timings['status'].tolist() == ['ran', 'ran']
+
+    second, timings = run_stages(tmp_path, facilities)
+    assert timings['status'].tolist() == ['checkpoint', 'checkpoint']
+    pd.testing.assert_frame_equal(first.reset_index(drop=True), second.reset_index(drop=True))
+
+    # Swedish row edited: filter input changed, but its DE output (and so the total stage) did not
+    edited = facilities.copy()
+    edited.loc[2, 'energyInputTJ'] = 999.0
+    _, timings = run_stages(tmp_path, edited)
+    assert timings['status'].tolist() == ['ran', 'checkpoint']
+
+    # Different parameter: both stages rerun, superseded checkpoints are dropped
+    totals, timings = run_stages(tmp_path, edited, country='SE')
+    assert timings['status'].tolist() == ['ran', 'ran']
+    assert totals['energyInputTJ'].tolist() == [999.0]
+    assert sorted(p.name.split('-')[0] for p in tmp_path.iterdir()) == ['filter', 'total']
+    print("✓ Reruns resume from the first changed stage")
+
+
+def test_frame_hash_sensitive_to_content_and_dtype():
+    df = pd.DataFrame({'a': [1, 2, 3]})
+    assert frame_hash(df) == frame_hash(df.copy())
+    assert frame_hash(df) != frame_hash(df.assign(a=[1, 2, 4]))
+    assert frame_hash(df) != frame_hash(df.astype('float64'))
+
+
+def test_helper_edit_invalidates_checkpoint(tmp_path):
+    """Editing a helper module the stage calls reruns the stage"""
+    code = tmp_path / 'code'
+    code.mkdir()
+    (code / 'ckpt_helpers.py').write_text("FACTOR = 2\n\ndef scale(values):\n    return values * FACTOR\n")
+    (code / 'ckpt_stages.py').write_text(
+        "from ckpt_helpers import scale\n\ndef scale_stage(facilities):\n"
+        "    return {'scaled': facilities.assign(energyInputTJ=scale(facilities['energyInputTJ']))}\n")
+    sys.path.insert(0, str(code))
+    try:
+        import ckpt_helpers
+        import ckpt_stages
+        facilities = pd.DataFrame({'energyInputTJ': [1.0, 2.0]})
+
+        def run():
+            pipeline = StagedPipeline(tmp_path / 'checkpoints', verbose=False)
+            out = pipeline.run('scale', ckpt_stages.scale_stage, inputs={'facilities': facilities})
+            return out['scaled']['energyInputTJ'].tolist(), pipeline.timing_report()['status'].tolist()
+
+        assert run() == ([2.0, 4.0], ['ran'])
+        assert run() == ([2.0, 4.0], ['checkpoint'])
+
+        # A different size too, so the import system cannot reuse a same-second bytecode cache
+        (code / 'ckpt_helpers.py').write_text("FACTOR = 30\n\ndef scale(values):\n    return values * FACTOR\n")
+        importlib.reload(ckpt_helpers)
+        importlib.reload(ckpt_stages)
+        assert run() == ([30.0, 60.0], ['ran'])
+    finally:
+        sys.path.remove(str(code))
+        sys.modules.pop('ckpt_helpers', None)
+        sys.modules.pop('ckpt_stages', None)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_resume_from_first_changed_stage(Path(tmp))
+    test_frame_hash_sensitive_to_content_and_dtype()
@@ -0,0 +1,60 @@
+"""
+Test cases for the offline pre-ranking of EEA waste-to-energy facilities
+The shortlist must be the best-scoring candidates, with the same points the agent's scorers give
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'agents'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from eea_store import EEAStore
+from lead_scoring import score_leads_batch
+from prerank import prerank, shortlist_table
+from test_eea_store import make_db
+
+
+def test_shortlist_is_top_of_all_candidates(tmp_path):
+    print("\n=== Testing offline pre-ranking ===")
+    facilities, releases, _ = make_db(tmp_path / 'eea.db')
+    ranking = prerank(top_n=10, as_of_year=2024, db_path=tmp_path / 'eea.db')
+    shortlist = ranking['shortlist']
+
+    candidates = facilities[facilities['mainActivityCode'] == '5(b)']
+    assert ranking['candidates'] == len(candidates) and len(shortlist) == 10
+    assert sum(ranking['qualification_counts'].values()) == len(candidates)
+    assert shortlist['rank'].tolist() == list(range(1, 11))
+    assert shortlist['total_score'].is_monotonic_decreasing
+
+    # Points match an independent count: age + region (DE/PL/SE are EU, NO is not) + recent dioxin
+    recent = set(releases.loc[releases['reportingYear'] >= 2021, 'Facility_INSPIRE_ID'])
+    ages = 2024 - candidates['dateOfStartOfOperation'].str[:4].astype(int)
+    expected = (pd.cut(ages, [-1, 10, 15, 20, 200], labels=[0, 10, 15, 20]).astype(int)
+                + candidates['countryCode'].map({'DE': 25, 'SE': 25, 'PL': 25, 'NO': 0})
+                + candidates['Facility_INSPIRE_ID'].isin(recent) * 25)
+    expected.index = candidates['Facility_INSPIRE_ID']
+    assert (shortlist['total_score'].to_numpy() == expected[shortlist['facility_id']].to_numpy()).all()
+    assert shortlist['total_score'].min() >= expected.drop(shortlist['facility_id']).max()
+    assert (shortlist['dioxin_status'] == 'at_risk').tolist() == shortlist['facility_id'].isin(recent).tolist()
+    print(f"✓ top 10 of {ranking['candidates']}: {shortlist['total_score'].tolist()}")
+
+
+def test_shortlist_rescored_without_reparsing(tmp_path):
+    make_db(tmp_path / 'eea.db')
+    store = EEAStore(tmp_path / 'eea.db', max_page_size=7)  # small pages: the walk must follow the cursor
+    shortlist = prerank(store, top_n=20, as_of_year=2024)['shortlist']
+    rescored = score_leads_batch(shortlist, as_of_year=2024)
+    assert rescored['total_score'].tolist() == shortlist['total_score'].tolist()
+    assert rescored['reason_codes'].tolist() == shortlist['reason_codes'].tolist()
+
+    table = shortlist_table(shortlist.head(3))
+    assert len(table.splitlines()) == 4 and shortlist['facility'].iloc[0] in table
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_shortlist_is_top_of_all_candidates(Path(tmp))
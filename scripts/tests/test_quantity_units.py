@@ -0,0 +1,75 @@
+"""
+Test cases for quantity unit normalisation
+Every EEA quantity column must land in canonical kg, with the reporting basis taken from code or name
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+
+from quantity_units import (
+    BASIS_COLUMN, CANONICAL_KG, CANONICAL_T, MASS_UNIT, POLLUTANT_UNITS, UNIT_COLUMN,
+    get_pollutant_unit, normalise_quantities, unit_metadata_frame
+)
+
+
+def test_source_columns_convert_to_kg():
+    print("\n=== Testing quantity columns ===")
+    kg = normalise_quantities(pd.DataFrame({'totalPollutantQuantityKg': [1500.0, None, 'n/a']}))
+    assert np.allclose(kg[CANONICAL_KG], [1500.0, np.nan, np.nan], equal_nan=True)
+    assert np.allclose(kg[CANONICAL_T], [1.5, np.nan, np.nan], equal_nan=True)
+
+    tonnes = normalise_quantities(pd.DataFrame({'totalPollutantQuantityTNE': [2.5, 0]}))
+    assert tonnes[CANONICAL_KG].tolist() == [2500.0, 0.0]
+
+    legacy = normalise_quantities(pd.DataFrame({'TotalQuantity': ['12', 3]}))
+    assert legacy[CANONICAL_KG].tolist() == [12.0, 3.0]
+
+    # kg wins over tonnes when a table carries both
+    both = normalise_quantities(pd.DataFrame({'totalPollutantQuantityTNE': [9.0], 'totalPollutantQuantityKg': [7.0]}))
+    assert both[CANONICAL_KG].tolist() == [7.0]
+
+    missing = normalise_quantities(pd.DataFrame({'pollutantName': ['Nitrogen oxides']}))
+    assert missing[CANONICAL_KG].isna().all()
+    print("✓ kg, tonnes and legacy columns")
+
+
+def test_basis_from_code_then_name():
+    frame = pd.DataFrame({
+        'pollutantCode': ['PCDD+PCDF(DIOXINS+FURANS)', 'NOX', None, 'HGANDCOMPOUNDS'],
+        'pollutantName': ['PCDD + PCDF (dioxins + furans) (as Teq)', 'Nitrogen oxides',
+                          'Zinc and compounds (as Zn)', 'Mercury and compounds'],
+        'totalPollutantQuantityKg': [0.002, 1e6, 40.0, 3.0],
+    })
+    out = normalise_quantities(frame)
+    assert out[BASIS_COLUMN].tolist() == ['as Teq', 'mass', 'as Zn', 'as Hg']
+    assert out[UNIT_COLUMN].tolist() == ['kg TEQ/year', 'kg/year', 'kg/year', 'kg/year']
+    assert isinstance(out[BASIS_COLUMN].dtype, pd.CategoricalDtype)
+    assert CANONICAL_KG not in frame.columns  # input left untouched
+
+    # Explicit columns override the defaults
+    renamed = frame.rename(columns={'pollutantName': 'name'}).drop(columns='pollutantCode')
+    assert normalise_quantities(renamed, name_column='name')[BASIS_COLUMN].tolist() == [
+        'as Teq', 'mass', 'as Zn', 'mass']
+
+
+def test_normalise_is_idempotent():
+    out = normalise_quantities(pd.DataFrame({'totalPollutantQuantityTNE': [1.0]}))
+    assert normalise_quantities(out) is out
+
+
+def test_pollutant_unit_metadata():
+    dioxin = get_pollutant_unit('PCDD+PCDF(DIOXINS+FURANS)')
+    assert (dioxin.report_unit, dioxin.report_factor) == ('g TEQ/year', 1000.0)
+    assert get_pollutant_unit('CO2') is MASS_UNIT
+    table = unit_metadata_frame()
+    assert table['code'].tolist() == list(POLLUTANT_UNITS)
+    assert set(table.columns) == {'code', 'basis', 'canonical_unit', 'report_unit', 'report_factor'}
+
+
+if __name__ == "__main__":
+    test_source_columns_convert_to_kg()
+    test_basis_from_code_then_name()
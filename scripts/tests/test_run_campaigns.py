@@ -0,0 +1,74 @@
+"""
+Test cases for the concurrent campaign runner
+Campaigns must overlap up to the concurrency limit, write separate outputs and fail independently
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'agents'))
+
+from run_campaigns import run_campaigns
+
+
+def fake_campaigns(durations, events, fail=()):
+    """Campaigns that sleep for their duration and record the number running at once"""
+    running = []
+
+    def make(name, seconds):
+        async def campaign(output_dir, quiet):
+            assert quiet and 'warm' in events
+            running.append(name)
+            events.append(len(running))
+            await asyncio.sleep(seconds)
+            running.remove(name)
+            if name in fail:
+                raise RuntimeError(f"{name} broke")
+            output_dir.mkdir(parents=True)
+            (output_dir / 'report.md').write_text(name)
+            return {'cost_usd': 0.01, 'turns': 3}
+        return campaign
+
+    return {name: make(name, seconds) for name, seconds in durations.items()}
+
+
+def test_batch_takes_the_slowest_campaign(tmp_path):
+    print("\n=== Testing concurrent campaigns ===")
+    durations = {'a': 0.3, 'b': 0.1, 'c': 0.1, 'd': 0.05}
+    events = []
+
+    async def warm():
+        events.append('warm')
+
+    batch = asyncio.run(run_campaigns(fake_campaigns(durations, events, fail={'c'}), concurrency=4,
+                                      output_root=tmp_path, warm=warm))
+    assert events[0] == 'warm' and max(events[1:]) == 4
+    assert batch['wall_s'] < 0.3 + 0.1  # the slowest campaign, not the sum (0.55s)
+
+    results = {r['campaign']: r for r in batch['campaigns']}
+    assert list(results) == list(durations)
+    assert results['c']['status'] == 'failed' and 'c broke' in results['c']['error']
+    assert [results[n]['status'] for n in 'abd'] == ['done'] * 3
+    for name in 'abd':
+        assert open(os.path.join(results[name]['output_dir'], 'report.md')).read() == name
+    assert json.loads(open(os.path.join(batch['batch_dir'], 'batch.json')).read()) == batch
+    print(f"✓ 4 campaigns in {batch['wall_s']:.2f}s")
+
+
+def test_concurrency_limit(tmp_path):
+    events = ['warm']
+    batch = asyncio.run(run_campaigns(fake_campaigns({'a': 0.05, 'b': 0.05, 'c': 0.05}, events),
+                                      concurrency=2, output_root=tmp_path))
+    assert max(events[1:]) == 2 and batch['wall_s'] >= 0.1
+    with pytest.raises(ValueError, match="concurrency"):
+        asyncio.run(run_campaigns({}, concurrency=0, output_root=tmp_path))
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_batch_takes_the_slowest_campaign(Path(tmp))
@@ -0,0 +1,134 @@
+"""
+Test cases for the country x sector risk scanner
+Vectorised scores must match the original per-mill Sweden scoring
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+
+from sector_risk_scanner import AIR_POLL, WATER_POLL, scan_sector_risk
+
+
+def make_tables(n_facilities=40, seed=3):
+    rng = np.random.default_rng(seed)
+    facilities = pd.DataFrame({
+        'Facility_INSPIRE_ID': [f'F{i}' for i in range(n_facilities)],
+        'nameOfFeature': [f'Mill {i % 30}' for i in range(n_facilities)],  # some mills under two IDs
+        'city': [f'Town {i % 30}' for i in range(n_facilities)],
+        'countryCode': rng.choice(['SE', 'FI', 'DE'], n_facilities),
+        'parentCompanyName': [f'Owner {i % 5}' for i in range(n_facilities)],
+        'mainActivityName': rng.choice([
+            'Industrial plants for the production of pulp from timber',
+            'Industrial plants for the production of paper and board',
+            'Installations for the incineration of non-hazardous waste',
+        ], n_facilities),
+    })
+    pollutants = sorted(set(AIR_POLL + WATER_POLL))
+    n_rows = n_facilities * 40
+    releases = pd.DataFrame({
+        'Facility_INSPIRE_ID': [f'F{i}' for i in rng.integers(0, n_facilities, n_rows)],
+        'reportingYear': rng.choice([2017, 2018, 2019, 2020, 2021], n_rows),
+        'pollutantName': rng.choice(pollutants, n_rows),
+        'medium': rng.choice(['AIR', 'WATER', 'LAND'], n_rows),
+        'totalPollutantQuantityKg': rng.choice([0.5, 800.0, 3000.0, 90000.0, 300000.0, 1.2e6], n_rows),
+    })
+    return facilities, releases
+
+
+def reference_scores(facilities, releases):
+    """Per-mill scoring as in the original sweden_paper_mills_emission_analysis.py"""
+    mills = facilities[(facilities['countryCode'] == 'SE') &
+                       facilities['mainActivityName'].str.contains('paper|pulp|board', case=False, na=False)]
+    pr = releases[releases['Facility_INSPIRE_ID'].isin(mills['Facility_INSPIRE_ID'])].merge(
+        mills[['Facility_INSPIRE_ID', 'nameOfFeature', 'city']], on='Facility_INSPIRE_ID')
+    pr = pr.rename(columns={'totalPollutantQuantityKg': 'kg'})
+
+    abs2021 = pr[pr['reportingYear'] == 2021].groupby(['nameOfFeature', 'city', 'medium', 'pollutantName'])['kg'].sum()
+    abs2021 = abs2021.reset_index()
+    air = abs2021[(abs2021['medium'] == 'AIR') & abs2021['pollutantName'].isin(AIR_POLL)].pivot_table(
+        index=['nameOfFeature', 'city'], columns='pollutantName', values='kg', aggfunc='sum', fill_value=0)
+    water = abs2021[(abs2021['medium'] == 'WATER') & abs2021['pollutantName'].isin(WATER_POLL)].pivot_table(
+        index=['nameOfFeature', 'city'], columns='pollutantName', values='kg', aggfunc='sum', fill_value=0)
+
+    trend = pr[pr['reportingYear'].isin([2017, 2019, 2021]) & pr['medium'].isin(['AIR', 'WATER'])
+               & pr['pollutantName'].isin(AIR_POLL + WATER_POLL)]
+    trend = trend.groupby(['nameOfFeature', 'city', 'medium', 'pollutantName', 'reportingYear'])['kg'].sum()
+    trend = trend.unstack('reportingYear').reindex(columns=[2017, 2019, 2021]).fillna(0).reset_index()
+    trend['pct'] = (trend[2021] - trend[2019]) / trend[2019].replace(0, np.nan) * 100
+    rising = trend[(trend['pct'] > 20) & (trend[2021] > 5000)]
+
+    scores = {}
+    for (name, city), _ in mills.groupby(['nameOfFeature', 'city']):
+        score, flags = 0, []
+        r = rising[(rising['nameOfFeature'] == name) & (rising['city'] == city)]
+        if len(r):
+            score += min(len(r) * 10, 30)
+            flags.append(f"{len(r)} pollutant(s) increasing (max +{r['pct'].max():.0f}% vs 2019)")
+        if (name, city) in air.index:
+            row = air.loc[(name, city)]
+            nox, sox, pm = row.get('Nitrogen oxides', 0), row.get('Sulphur oxides', 0), row.get('Particulate matter', 0)
+            co, hg = row.get('Carbon monoxide', 0), row.get('Mercury and compounds (as Hg)', 0)
+            if nox > 500000:
+                score += 25; flags.append(f"HIGH NOx: {nox/1000:.0f} t/yr")
+            elif nox > 200000:
+                score += 15; flags.append(f"ELEVATED NOx: {nox/1000:.0f} t/yr")
+            if sox > 200000:
+                score += 20; flags.append(f"HIGH SOx: {sox/1000:.0f} t/yr")
+            if pm > 100000:
+                score += 20; flags.append(f"HIGH Particulate matter: {pm/1000:.0f} t/yr")
+            if co > 1000000:
+                score += 15; flags.append(f"HIGH CO (recovery boiler): {co/1000:.0f} t/yr")
+            if hg > 0:
+                score += 20; flags.append(f"Mercury reported: {hg:.1f} kg/yr")
+        if (name, city) in water.index:
+            row = water.loc[(name, city)]
+            aox, tn = row.get('Halogenated organic compounds (as AOX)', 0), row.get('Total nitrogen', 0)
+            tp, toc = row.get('Total phosphorus', 0), row.get('Total organic carbon(as total C or COD/3)', 0)
+            if aox > 5000:
+                score += 25; flags.append(f"AOX water discharge: {aox/1000:.1f} t/yr")
+            elif aox > 1000:
+                score += 10; flags.append(f"AOX water discharge: {aox/1000:.1f} t/yr")
+            if tn > 100000:
+                score += 15; flags.append(f"Total Nitrogen (water): {tn/1000:.0f} t/yr")
+            if tp > 10000:
+                score += 15; flags.append(f"Total Phosphorus (water): {tp/1000:.0f} t/yr")
+            if toc > 500000:
+                score += 10; flags.append(f"High TOC (water): {toc/1000:.0f} t/yr")
+        scores[(name, city)] = (min(score, 100), '; '.join(flags) if flags else 'No major flags')
+    return scores
+
+
+def test_scan_matches_per_mill_scoring():
+    print("\n=== Testing vectorised scan against per-mill scoring ===")
+    facilities, releases = make_tables()
+    expected = reference_scores(facilities, releases)
+
+    result = scan_sector_risk(
+        facilities, releases, countries=['SE'], activity_pattern='paper|pulp|board',
+        year=2021, key=['nameOfFeature', 'city'], trend_years=[2017, 2019, 2021]
+    )
+    scanned = {
+        (row.nameOfFeature, row.city): (row.risk_score, row.risk_flags)
+        for row in result.facilities.itertuples(index=False)
+    }
+    assert scanned == expected
+    assert (result.rising['pct_change_19_21'] > 20).all()
+    assert result.rising['pct_change_19_21'].is_monotonic_decreasing
+    print(f"✓ {len(scanned)} mills, {int((result.facilities['risk_score'] > 0).sum())} with risk flags")
+
+
+def test_scan_defaults_cover_all_countries():
+    """No country / activity filter: every facility ID gets exactly one row"""
+    facilities, releases = make_tables(n_facilities=25, seed=9)
+    result = scan_sector_risk(facilities, releases)
+    assert sorted(result.facilities['Facility_INSPIRE_ID']) == sorted(facilities['Facility_INSPIRE_ID'])
+    assert result.facilities['risk_score'].between(0, 100).all()
+
+
+if __name__ == "__main__":
+    test_scan_matches_per_mill_scoring()
+    test_scan_defaults_cover_all_countries()
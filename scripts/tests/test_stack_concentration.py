@@ -0,0 +1,41 @@
+"""
+Test cases for the stack-concentration estimator
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+
+from stack_concentration import FD_FACTORS, concentration_mg_nm3, flue_gas_volume
+
+
+def test_flue_gas_volume_reference_o2():
+    """Volume = GJ x Fd x 20.9 / (20.9 - O2_ref), with class and fuel defaults"""
+    print("\n=== Testing flue-gas volume ===")
+    volume = flue_gas_volume(
+        [1000, 1000, 1000, np.nan, 0],
+        [None, 'NaturalGas', 'Coal', 'Coal', 'Coal'],
+        ['WI', 'LCP', 'LCP', 'LCP', 'LCP']
+    )
+    assert np.isclose(volume[0], 1e6 * FD_FACTORS['Waste'] * 20.9 / (20.9 - 11))  # WI: 11% O2
+    assert np.isclose(volume[1], 1e6 * FD_FACTORS['NaturalGas'] * 20.9 / (20.9 - 3))  # gas: 3% O2
+    assert np.isclose(volume[2], 1e6 * FD_FACTORS['Coal'] * 20.9 / (20.9 - 6))  # solid: 6% O2
+    assert np.isnan(volume[3]) and np.isnan(volume[4])
+    print(f"✓ 1000 TJ waste -> {volume[0]:.3e} Nm³/year at 11% O2")
+
+
+def test_concentration():
+    """1 t in 1e9 Nm³ is 1 mg/Nm³; no volume gives NaN"""
+    print("\n=== Testing concentration ===")
+    result = concentration_mg_nm3([1.0, 450.0, 5.0], [1e9, 1.768e9, np.nan])
+    assert np.isclose(result[0], 1.0)
+    assert 250 < result[1] < 260
+    assert np.isnan(result[2])
+    print("✓ Concentrations correct")
+
+
+if __name__ == "__main__":
+    test_flue_gas_volume_reference_o2()
+    test_concentration()
@@ -0,0 +1,97 @@
+"""
+Test cases for the agent telemetry spans and the summary ranking
+A simulated run (SDK-shaped messages, traced tools) must land in the JSONL store with costs allocated
+"""
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'agents'))
+
+from telemetry import Telemetry, traced_tool
+
+
+@traced_tool
+async def slow_tool(args, extra):
+    await asyncio.sleep(0.02)
+    return {"content": [{"type": "text", "text": "x" * 4000}]}
+
+
+@traced_tool
+async def fast_tool(args, extra):
+    return {"content": [{"type": "text", "text": "ok"}]}
+
+
+@traced_tool
+async def failing_tool(args, extra):
+    raise ValueError("bad input")
+
+
+def assistant(*tool_names, input_tokens=1000, output_tokens=200):
+    content = [SimpleNamespace(name=name) for name in tool_names] or [SimpleNamespace(text="done")]
+    usage = {"input_tokens": input_tokens, "output_tokens": output_tokens}
+    return SimpleNamespace(type="assistant", message=SimpleNamespace(content=content, usage=usage))
+
+
+async def simulated_run(telemetry, pipeline):
+    async with telemetry.run(pipeline) as run:
+        run.observe(assistant("slow_tool", "fast_tool"))
+        await slow_tool({"leads": list(range(100))}, None)
+        await fast_tool({}, None)
+        with pytest.raises(ValueError):
+            await failing_tool({}, None)
+        run.observe(assistant(input_tokens=3000, output_tokens=300))
+        run.observe(SimpleNamespace(type="result", duration_ms=1500, total_cost_usd=0.09, num_turns=2,
+                                    usage={"input_tokens": 4000, "output_tokens": 500}))
+
+
+def test_spans_written_with_cost(tmp_path):
+    print("\n=== Testing span recording ===")
+    telemetry = Telemetry(tmp_path / 'spans.jsonl')
+    asyncio.run(simulated_run(telemetry, 'find_qualified_leads'))
+
+    spans = [json.loads(line) for line in (tmp_path / 'spans.jsonl').read_text().splitlines()]
+    kinds = [s['kind'] for s in spans]
+    assert kinds.count('turn') == 2 and kinds.count('tool') == 3 and kinds[-1] == 'run'
+    assert len({s['run_id'] for s in spans}) == 1
+
+    tools = {s['name']: s for s in spans if s['kind'] == 'tool'}
+    assert tools['slow_tool']['wall_ms'] >= 20 and tools['slow_tool']['result_bytes'] == 4000
+    assert tools['slow_tool']['est_tokens'] == (tools['slow_tool']['arg_bytes'] + 4000) // 4
+    assert tools['failing_tool']['error'].startswith('ValueError')
+
+    turns = [s for s in spans if s['kind'] == 'turn']
+    assert turns[0]['tool_calls'] == ['slow_tool', 'fast_tool']
+    assert sum(t['cost_usd'] for t in turns) == pytest.approx(0.09)
+    assert turns[1]['cost_usd'] == pytest.approx(0.09 * 3300 / 4500)
+    assert tools['slow_tool']['cost_usd'] == pytest.approx(0.09 * tools['slow_tool']['est_tokens'] / 4500)
+    print(f"✓ {len(spans)} spans, run cost split over turns and tools")
+
+
+def test_summary_ranks_tools_across_runs(tmp_path):
+    telemetry = Telemetry(tmp_path / 'spans.jsonl')
+    asyncio.run(simulated_run(telemetry, 'find_qualified_leads'))
+    asyncio.run(simulated_run(telemetry, 'evaluate_leads'))
+
+    summary = telemetry.summary(top=2)
+    assert summary['slowest'].index[0] == 'slow_tool' and len(summary['slowest']) == 2
+    assert summary['slowest'].loc['slow_tool', 'calls'] == 2
+    assert summary['most_expensive'].index[0] == 'slow_tool'
+    assert summary['runs'].loc['evaluate_leads', 'runs'] == 1
+    assert summary['runs']['total_cost_usd'].sum() == pytest.approx(0.18)
+
+
+def test_tools_outside_a_run_are_not_recorded(tmp_path):
+    assert asyncio.run(fast_tool({}, None))["content"][0]["text"] == "ok"
+    assert Telemetry(tmp_path / 'none.jsonl').summary() == {}
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_spans_written_with_cost(Path(tmp))
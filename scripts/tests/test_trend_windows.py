@@ -0,0 +1,80 @@
+"""
+Test cases for the rolling-window trend engine
+Strided window changes and k-of-n rise flags must match a plain per-year loop
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'analysis'))
+
+from trend_windows import build_cube, rising_k_of_n, window_changes
+
+
+def make_cube(seed=5):
+    rng = np.random.default_rng(seed)
+    n_rows = 400
+    years = rng.integers(2016, 2025, n_rows)
+    cube = build_cube(
+        rng.integers(0, 12, n_rows), rng.integers(0, 4, n_rows), years,
+        rng.choice([0.0, 100.0, 2500.0, 40000.0], n_rows), n_entities=12, n_series=4
+    )
+    return cube
+
+
+def test_build_cube_sums_rows_on_contiguous_years():
+    print("\n=== Testing cube construction ===")
+    cube = build_cube([0, 0, 1, 1, -1], [0, 0, 1, 1, 0], [2017, 2017, 2019, 2030, 2017],
+                      [5.0, 7.0, 3.0, 9.0, 1.0], n_entities=2, n_series=2, last_year=2021)
+    assert cube.years.tolist() == [2017, 2018, 2019, 2020, 2021]
+    assert cube.at(2017)[0, 0] == 12.0
+    assert cube.at(2019)[1, 1] == 3.0
+    assert cube.values.sum() == 15.0  # 2030 row and negative code skipped
+    with pytest.raises(ValueError, match="outside cube span"):
+        cube.year_index(2016)
+    print("✓ Rows summed, out-of-span rows skipped")
+
+
+def test_window_changes_match_loop():
+    print("\n=== Testing strided window changes ===")
+    cube = make_cube()
+    windows = [1, 2, 4]
+    changes = window_changes(cube, windows)
+    assert changes.shape == cube.values.shape + (len(windows),)
+
+    values = cube.values
+    for t in range(values.shape[-1]):
+        for w_i, w in enumerate(windows):
+            expected = np.full(values.shape[:2], np.nan)
+            if t - w >= 0:
+                base = values[..., t - w]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    expected = np.where(base > 0, (values[..., t] - base) / base * 100, np.nan)
+            np.testing.assert_allclose(changes[..., t, w_i], expected)
+
+    anchored = window_changes(cube, windows, anchor=2024)
+    np.testing.assert_allclose(anchored, changes[..., -1, :])
+    print(f"✓ {len(windows)} windows x {values.shape[-1]} anchors")
+
+
+def test_rising_k_of_n_matches_loop():
+    print("\n=== Testing rising k of n flags ===")
+    cube = make_cube(seed=11)
+    values = cube.values
+    flags = rising_k_of_n(cube, k=2, n=3)
+    for t in range(values.shape[-1]):
+        count = np.zeros(values.shape[:2], dtype=int)
+        for s in range(max(t - 2, 1), t + 1):
+            count += (values[..., s - 1] > 0) & (values[..., s] > values[..., s - 1])
+        np.testing.assert_array_equal(flags[..., t], count >= 2)
+
+    np.testing.assert_array_equal(rising_k_of_n(cube, k=2, n=3, anchor=2024), flags[..., -1])
+    print(f"✓ {int(flags[..., -1].sum())} series rising in 2 of the last 3 years")
+
+
+if __name__ == "__main__":
+    test_build_cube_sums_rows_on_contiguous_years()
+    test_window_changes_match_loop()
+    test_rising_k_of_n_matches_loop()
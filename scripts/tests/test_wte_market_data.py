@@ -0,0 +1,101 @@
+"""
+Test cases for the cached global WtE market data loader
+Tables load once per content, off the event loop, with one shared in-flight load
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'agents'))
+
+from wte_market_data import MarketData
+
+pytest.importorskip("pyarrow")
+
+FILES = {"active_plants": "plants.csv", "projects": "projects.csv"}
+
+
+class CountingMarketData(MarketData):
+    """Counts CSV parses and blocking loads (and the threads they ran on)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loads, self.parses, self.threads = 0, 0, set()
+
+    def load_table(self, key):
+        self.loads += 1
+        self.threads.add(threading.get_ident())
+        return super().load_table(key)
+
+    def _parse(self, source):
+        self.parses += 1
+        return super()._parse(source)
+
+
+def write_sources(directory, plants=3):
+    pd.DataFrame({'Plant': [f'P{i}' for i in range(plants)], 'Country': 'Germany', 'Start': 1995}).to_csv(
+        directory / FILES['active_plants'], index=False)
+    pd.DataFrame({'Project': ['X'], 'Status': ['Planned']}).to_csv(directory / FILES['projects'], index=False)
+
+
+def test_concurrent_calls_share_one_load(tmp_path):
+    print("\n=== Testing shared in-flight load ===")
+    write_sources(tmp_path)
+    market = CountingMarketData(tmp_path, files=FILES)
+
+    async def many_calls():
+        return await asyncio.gather(*(market.get('active_plants') for _ in range(8)))
+
+    results = asyncio.run(many_calls())
+    assert market.loads == 1 and all(df is results[0] for df in results)
+    assert threading.get_ident() not in market.threads  # parsed in the executor
+    assert len(results[0]) == 3
+    print("✓ 8 concurrent calls, 1 load")
+
+
+def test_parquet_cache_invalidation(tmp_path):
+    print("\n=== Testing cache invalidation by mtime and hash ===")
+    write_sources(tmp_path)
+    first = CountingMarketData(tmp_path, files=FILES)
+    tables = asyncio.run(first.get_all())
+    assert set(tables) == set(FILES) and first.parses == 2
+    assert (tmp_path / '.cache' / 'active_plants.parquet').exists()
+
+    # New process, unchanged sources: served from parquet
+    second = CountingMarketData(tmp_path, files=FILES)
+    pd.testing.assert_frame_equal(asyncio.run(second.get('active_plants')), tables['active_plants'])
+    assert second.parses == 0
+
+    # Touched but identical: the hash keeps the cache
+    source = tmp_path / FILES['active_plants']
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    third = CountingMarketData(tmp_path, files=FILES)
+    asyncio.run(third.get('active_plants'))
+    assert third.parses == 0
+
+    # Changed content: re-parsed
+    write_sources(tmp_path, plants=5)
+    fourth = CountingMarketData(tmp_path, files=FILES)
+    assert len(asyncio.run(fourth.get('active_plants'))) == 5
+    assert fourth.parses == 1
+    print("✓ Cache reused until the content changed")
+
+
+def test_missing_file_skipped_and_retried(tmp_path):
+    market = MarketData(tmp_path, files=FILES)
+    assert asyncio.run(market.get_all()) == {}
+    write_sources(tmp_path)
+    assert set(asyncio.run(market.get_all())) == set(FILES)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_concurrent_calls_share_one_load, test_parquet_cache_invalidation):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))